@@ -1,7 +1,9 @@
 import os
 import time
-from dotenv import load_dotenv
-from google import genai
+from stt_translate.clients import gemini_client, load_env
+from stt_translate.cache import ResultCache, file_digest
+from stt_translate.gemini_files import UploadManager
+from stt_translate import tracing
 
 # -----------------------------------------------------
 # 1. CONFIGURATION
@@ -9,6 +11,8 @@ from google import genai
 TIMESTAMPED = False   # Set this flag to False for non-timestamped version
 AUDIO_FILE_PATH = r"data\2_Negative_Memories.mp3"
 OUTPUT_DIR = r"output\transcribed\gemini"
+MODEL_NAME = "gemini-2.5-pro"  # Better multilingual & code-mixed support
+AUTO_INLINE = True  # Send clips under GEMINI_INLINE_MAX_MB inline, skipping the upload round-trip
 
 # -----------------------------------------------------
 # 2. START TIMER
@@ -18,25 +22,16 @@ start_time = time.time()
 # -----------------------------------------------------
 # 3. LOAD ENVIRONMENT VARIABLES
 # -----------------------------------------------------
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
+load_env()
 
 # -----------------------------------------------------
 # 4. INITIALIZE GEMINI CLIENT
 # -----------------------------------------------------
-client = genai.Client(api_key=GEMINI_API_KEY)
+client = gemini_client()
+uploads = UploadManager(client)  # one upload per audio file, reused until it expires
 
 # -----------------------------------------------------
-# 5. UPLOAD AUDIO FILE
-# -----------------------------------------------------
-print(f"Uploading audio file: {AUDIO_FILE_PATH}")
-myfile = client.files.upload(file=AUDIO_FILE_PATH)
-print(f"Upload complete. File ID: {myfile.name}")
-
-# -----------------------------------------------------
-# 6. BUILD PROMPT BASED ON VERSION FLAG
+# 5. BUILD PROMPT BASED ON VERSION FLAG
 # -----------------------------------------------------
 if TIMESTAMPED:
     print("\n🧠 Using TIMESTAMPED transcription prompt...\n")
@@ -70,15 +65,35 @@ else:
     output_file = os.path.join(OUTPUT_DIR, "gemini_stt_upload_pro_versioned.txt")
 
 # -----------------------------------------------------
-# 7. GENERATE CONTENT
+# 6. CHECK RESULT CACHE (same audio + model + prompt)
 # -----------------------------------------------------
-print("🚀 Generating transcription...\n")
-response = client.models.generate_content(
-    model="gemini-2.5-pro",  # Better multilingual & code-mixed support
-    contents=[prompt, myfile]
-)
+cache = ResultCache()
+audio_hash = file_digest(AUDIO_FILE_PATH)
+cache_key = cache.make_key(audio_hash, "gemini", MODEL_NAME, prompt=prompt)
+final_text = cache.get(cache_key)
+
+if final_text is not None:
+    print("Transcript served from cache, skipping upload and generation.\n")
+else:
+    # -------------------------------------------------
+    # 7. UPLOAD AUDIO FILE (OR REUSE) AND GENERATE CONTENT
+    # -------------------------------------------------
+    if AUTO_INLINE:
+        audio_part = uploads.part(AUDIO_FILE_PATH)[0]
+    else:
+        audio_part = uploads.get(AUDIO_FILE_PATH).as_part()
 
-final_text = response.text or "(No transcription text returned)"
+    print("🚀 Generating transcription...\n")
+    with tracing.span("request", provider="gemini", model=MODEL_NAME) as span:
+        response = client.models.generate_content(
+            model=MODEL_NAME,
+            contents=[prompt, audio_part]
+        )
+        span.set(**tracing.usage_attributes(response))
+
+    if response.text:
+        cache.put(cache_key, response.text, provider="gemini", model=MODEL_NAME, audio_hash=audio_hash)
+    final_text = response.text or "(No transcription text returned)"
 
 # -----------------------------------------------------
 # 8. DISPLAY OUTPUT
@@ -97,13 +112,7 @@ with open(output_file, "w", encoding="utf-8") as f:
 print(f"Transcript saved successfully at:\n{output_file}")
 
 # -----------------------------------------------------
-# 10. CLEANUP (DELETE TEMP FILE FROM GEMINI)
-# -----------------------------------------------------
-client.files.delete(name=myfile.name)
-print(f"Temporary uploaded file deleted: {myfile.name}")
-
-# -----------------------------------------------------
-# 11. END TIMER
+# 10. END TIMER
 # -----------------------------------------------------
 end_time = time.time()
 elapsed_time = end_time - start_time
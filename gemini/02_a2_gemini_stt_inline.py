@@ -1,8 +1,9 @@
 import os
 import time
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
+from stt_translate.clients import gemini_client, load_env
+from stt_translate.cache import ResultCache, file_digest
+from stt_translate.gemini_files import UploadManager
+from stt_translate import tracing
 
 # -----------------------------------------------------
 # 1. CONFIGURATION
@@ -10,6 +11,7 @@ from google.genai import types
 TIMESTAMPED = False   # Set to False for non-timestamped transcription
 AUDIO_FILE_PATH = r"data\2_Negative_Memories.mp3"
 OUTPUT_DIR = r"output\transcribed\gemini"
+MODEL_NAME = "gemini-2.5-flash"  # Best for multilingual, code-mixed STT
 
 # -----------------------------------------------------
 # 2. START TIMER
@@ -19,26 +21,15 @@ start_time = time.time()
 # -----------------------------------------------------
 # 3. LOAD API KEY
 # -----------------------------------------------------
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
+load_env()
 
 # -----------------------------------------------------
 # 4. INITIALIZE CLIENT
 # -----------------------------------------------------
-client = genai.Client(api_key=GEMINI_API_KEY)
+client = gemini_client()
 
 # -----------------------------------------------------
-# 5. READ AUDIO AS BYTES (inline mode)
-# -----------------------------------------------------
-print(f"Reading audio file as bytes: {AUDIO_FILE_PATH}")
-with open(AUDIO_FILE_PATH, "rb") as f:
-    audio_bytes = f.read()
-print("Audio file loaded successfully (inline mode).")
-
-# -----------------------------------------------------
-# 6. BUILD PROMPT BASED ON VERSION FLAG
+# 5. BUILD PROMPT BASED ON VERSION FLAG
 # -----------------------------------------------------
 if TIMESTAMPED:
     print("\nUsing TIMESTAMPED transcription prompt...\n")
@@ -71,21 +62,38 @@ else:
     output_file = os.path.join(OUTPUT_DIR, "gemini_stt_inline_flash.txt")
 
 # -----------------------------------------------------
-# 7. BUILD INLINE AUDIO PART
+# 6. CHECK RESULT CACHE (same audio + model + prompt)
 # -----------------------------------------------------
-audio_part = types.Part.from_bytes(data=audio_bytes, mime_type="audio/mp3")
+cache = ResultCache()
+audio_hash = file_digest(AUDIO_FILE_PATH)
+cache_key = cache.make_key(audio_hash, "gemini", MODEL_NAME, prompt=prompt)
+final_text = cache.get(cache_key)
 
-# -----------------------------------------------------
-# 8. CALL GEMINI MODEL
-# -----------------------------------------------------
-print("Sending inline audio data to Gemini...\n")
+if final_text is not None:
+    print("Transcript served from cache, skipping the Gemini call.\n")
+else:
+    # -------------------------------------------------
+    # 7. BUILD INLINE PART
+    # -------------------------------------------------
+    # The audio is compacted (STT_UPLOAD_CODEC, default opus:32k) and inlined when it fits under
+    # GEMINI_INLINE_MAX_MB; a longer file is uploaded instead of being read into memory
+    audio_part, route = UploadManager(client).part(AUDIO_FILE_PATH)
+
+    # -------------------------------------------------
+    # 8. CALL GEMINI MODEL
+    # -------------------------------------------------
+    print(f"Sending audio to Gemini ({route})...\n")
 
-response = client.models.generate_content(
-    model="gemini-2.5-flash",  # Best for multilingual, code-mixed STT
-    contents=[prompt, audio_part]
-)
+    with tracing.span("request", provider="gemini", model=MODEL_NAME) as span:
+        response = client.models.generate_content(
+            model=MODEL_NAME,
+            contents=[prompt, audio_part]
+        )
+        span.set(**tracing.usage_attributes(response))
 
-final_text = response.text or "(No transcription text returned)"
+    if response.text:
+        cache.put(cache_key, response.text, provider="gemini", model=MODEL_NAME, audio_hash=audio_hash)
+    final_text = response.text or "(No transcription text returned)"
 
 # -----------------------------------------------------
 # 9. DISPLAY OUTPUT
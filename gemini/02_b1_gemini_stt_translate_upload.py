@@ -1,7 +1,8 @@
 import os
 import time
-from dotenv import load_dotenv
-from google import genai
+from stt_translate.clients import gemini_client, load_env
+from stt_translate.cache import ResultCache, file_digest
+from stt_translate.gemini_files import UploadManager
 
 # -----------------------------------------------------
 # 1. CONFIGURATION
@@ -19,25 +20,16 @@ start_time = time.time()
 # -----------------------------------------------------
 # 3. LOAD ENVIRONMENT VARIABLES
 # -----------------------------------------------------
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
+load_env()
 
 # -----------------------------------------------------
 # 4. INITIALIZE GEMINI CLIENT
 # -----------------------------------------------------
-client = genai.Client(api_key=GEMINI_API_KEY)
+client = gemini_client()
+uploads = UploadManager(client)  # one upload per audio file, reused until it expires
 
 # -----------------------------------------------------
-# 5. UPLOAD AUDIO FILE
-# -----------------------------------------------------
-print(f"Uploading audio file for translation: {AUDIO_FILE_PATH}")
-myfile = client.files.upload(file=AUDIO_FILE_PATH)
-print(f"Upload complete. File ID: {myfile.name}")
-
-# -----------------------------------------------------
-# 6. TRANSLATION PROMPT
+# 5. TRANSLATION PROMPT
 # -----------------------------------------------------
 prompt = (
     "You are a professional speech translation assistant.\n"
@@ -51,16 +43,31 @@ prompt = (
 )
 
 # -----------------------------------------------------
-# 7. GENERATE TRANSLATION
+# 6. CHECK RESULT CACHE (same audio + model + prompt)
 # -----------------------------------------------------
-print("Translating audio to English... please wait.\n")
+cache = ResultCache()
+audio_hash = file_digest(AUDIO_FILE_PATH)
+cache_key = cache.make_key(audio_hash, "gemini", MODEL_NAME, prompt=prompt)
+final_text = cache.get(cache_key)
 
-response = client.models.generate_content(
-    model=MODEL_NAME,
-    contents=[prompt, myfile]
-)
+if final_text is not None:
+    print("Translation served from cache, skipping upload and generation.\n")
+else:
+    # -------------------------------------------------
+    # 7. UPLOAD AUDIO FILE (OR REUSE) AND GENERATE TRANSLATION
+    # -------------------------------------------------
+    myfile = uploads.get(AUDIO_FILE_PATH)
+
+    print("Translating audio to English... please wait.\n")
 
-final_text = response.text or "(No translation text returned)"
+    response = client.models.generate_content(
+        model=MODEL_NAME,
+        contents=[prompt, myfile.as_part()]
+    )
+
+    if response.text:
+        cache.put(cache_key, response.text, provider="gemini", model=MODEL_NAME, audio_hash=audio_hash)
+    final_text = response.text or "(No translation text returned)"
 
 # -----------------------------------------------------
 # 8. DISPLAY OUTPUT
@@ -80,13 +87,7 @@ with open(output_file, "w", encoding="utf-8") as f:
 print(f"English translation saved successfully at:\n{output_file}")
 
 # -----------------------------------------------------
-# 10. CLEANUP (DELETE TEMP FILE FROM GEMINI)
-# -----------------------------------------------------
-client.files.delete(name=myfile.name)
-print(f"Temporary uploaded file deleted: {myfile.name}")
-
-# -----------------------------------------------------
-# 11. END TIMER
+# 10. END TIMER
 # -----------------------------------------------------
 end_time = time.time()
 elapsed_time = end_time - start_time
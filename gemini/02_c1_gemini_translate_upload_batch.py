@@ -1,8 +1,11 @@
 import os
 import json
-import time
-from dotenv import load_dotenv
-from google import genai
+from stt_translate.batch_poller import BatchPoller
+from stt_translate.clients import api_key, gemini_client
+from stt_translate.cache import ResultCache, file_digest
+from stt_translate.gemini_batch import BatchShard, GeminiBatchJob
+from stt_translate.gemini_files import UPLOAD_TAG
+from stt_translate.gemini_files import UploadManager
 
 # -------------------------------------------------------------
 # 1. CONFIGURATION
@@ -18,22 +21,35 @@ PROMPT = (
 )
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 BATCH_FILE = os.path.join(OUTPUT_DIR, "batch_requests.json")
+KEYMAP_FILE = os.path.join(OUTPUT_DIR, "batch_requests.keys.jsonl")  # request key -> source audio
+MAX_ATTEMPTS = 3            # A failed request is resubmitted on its own, up to this many submissions
 
 # -------------------------------------------------------------
 # 2. INITIALIZATION
 # -------------------------------------------------------------
-load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
+API_KEY = api_key("GEMINI_API_KEY")
 
-client = genai.Client(api_key=API_KEY)
+client = gemini_client()
 
 # -------------------------------------------------------------
-# 3. UPLOAD AUDIO FILE
+# 2b. CHECK RESULT CACHE (same audio + model + prompt)
 # -------------------------------------------------------------
-print(f"Uploading audio: {AUDIO_PATH}")
-music_file = client.files.upload(file=AUDIO_PATH)
+REQUEST_KEY = "translation_request"
+cache = ResultCache()
+audio_hash = file_digest(AUDIO_PATH)
+cache_key = cache.make_key(audio_hash, "gemini-batch", MODEL, prompt=PROMPT)
+cached_text = cache.get(cache_key)
+if cached_text is not None:
+    output_file = os.path.join(OUTPUT_DIR, f"{REQUEST_KEY}_output.txt")
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(cached_text)
+    print(f"Translation served from cache, no batch job submitted: {output_file}")
+    exit(0)
+
+# -------------------------------------------------------------
+# 3. UPLOAD AUDIO FILE (OR REUSE A REGISTERED UPLOAD)
+# -------------------------------------------------------------
+music_file = UploadManager(client).get(AUDIO_PATH)
 print(f"Uploaded: {music_file.name} | MIME: {music_file.mime_type}")
 
 # -------------------------------------------------------------
@@ -41,7 +57,7 @@ print(f"Uploaded: {music_file.name} | MIME: {music_file.mime_type}")
 # -------------------------------------------------------------
 requests_data = [
     {
-        "key": "translation_request",
+        "key": REQUEST_KEY,
         "request": {
             "contents": [
                 {
@@ -64,12 +80,15 @@ print(f"Creating batch JSONL file: {BATCH_FILE}")
 with open(BATCH_FILE, "w", encoding="utf-8") as f:
     for req in requests_data:
         f.write(json.dumps(req) + "\n")
+with open(KEYMAP_FILE, "w", encoding="utf-8") as f:
+    f.write(json.dumps({"key": REQUEST_KEY, "source": AUDIO_PATH, "chunk": 0}) + "\n")
 
 # -------------------------------------------------------------
 # 5. UPLOAD JSONL TO FILES API
 # -------------------------------------------------------------
 print("Uploading JSONL batch file...")
-uploaded_batch_file = client.files.upload(file=BATCH_FILE)
+uploaded_batch_file = client.files.upload(file=BATCH_FILE,
+                                         config={"display_name": f"{UPLOAD_TAG}batch-audio-translation"})
 print(f"Batch file uploaded: {uploaded_batch_file.name}")
 
 # -------------------------------------------------------------
@@ -84,69 +103,34 @@ batch_job = client.batches.create(
 print(f"Job created: {batch_job.name}")
 
 # -------------------------------------------------------------
-# 7. POLL UNTIL COMPLETED
-# -------------------------------------------------------------
-print("Waiting for translation to finish...")
-while True:
-    job = client.batches.get(name=batch_job.name)
-    if job.state.name in (
-        "JOB_STATE_SUCCEEDED",
-        "JOB_STATE_FAILED",
-        "JOB_STATE_CANCELLED",
-    ):
-        break
-    print(f"  Current state: {job.state.name} ...")
-    time.sleep(20)
-
-if job.state.name != "JOB_STATE_SUCCEEDED":
-    print(f"Job failed: {job.state.name}")
-    exit(1)
-
-print("Translation job completed successfully.")
-
-# -------------------------------------------------------------
-# 8. DOWNLOAD RESULTS
+# 7. POLL WITH BACKOFF, THEN PARSE AND SAVE THE TRANSLATION
 # -------------------------------------------------------------
-result_file = job.dest.file_name
-print(f"Downloading result file: {result_file}")
-
-file_content_bytes = client.files.download(file=result_file)
-file_content = file_content_bytes.decode("utf-8")
-
-# -------------------------------------------------------------
-# 9. PARSE TRANSLATION AND SAVE
-# -------------------------------------------------------------
-for line in file_content.splitlines():
-    if not line.strip():
-        continue
-
-    parsed = json.loads(line)
-    key = parsed.get("key", "translation")
-    response = parsed.get("response", {})
-    candidates = response.get("candidates", [])
-    if not candidates:
-        continue
+def save_translation(result):
+    if result.error:
+        print(f"Request {result.key} failed: {result.error}")
+        return
+    if not result.text:
+        print("No translation text found in response.")
+        return
+    if result.key == REQUEST_KEY:
+        cache.put(cache_key, result.text, provider="gemini-batch", model=MODEL, audio_hash=audio_hash)
+    output_file = os.path.join(OUTPUT_DIR, f"{result.key}_output.txt")
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(result.text)
+    print(f"Saved translation: {output_file}")
 
-    translation_text = (
-        candidates[0]
-        .get("content", {})
-        .get("parts", [{}])[0]
-        .get("text", "")
-        .strip()
-    )
 
-    if translation_text:
-        output_file = os.path.join(OUTPUT_DIR, f"{key}_output.txt")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(translation_text)
-        print(f"Saved translation: {output_file}")
-    else:
-        print("No translation text found in response.")
+print("Waiting for translation to finish...")
+shard = BatchShard(index=0, path=BATCH_FILE, keymap_path=KEYMAP_FILE, requests=len(requests_data),
+                   file_name=uploaded_batch_file.name)
+poller = BatchPoller(interval=10, max_interval=60)
+poller.add(GeminiBatchJob(client, MODEL, shard, batch_job, API_KEY, save_translation, max_attempts=MAX_ATTEMPTS,
+                          display_name="audio-translation-batch"))
+poller.run()
 
 # -------------------------------------------------------------
 # 10. CLEANUP
 # -------------------------------------------------------------
-print("Cleaning up temporary batch files...")
-client.files.delete(name=uploaded_batch_file.name)
-print("Deleted batch JSONL file from Gemini storage.")
+# GeminiBatchJob deletes each uploaded JSONL (retries included) from Gemini storage once it is collected
+print("Batch JSONL files deleted from Gemini storage.")
 print("Done.")
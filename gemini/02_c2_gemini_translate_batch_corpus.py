@@ -0,0 +1,91 @@
+import os
+import time
+from collections import defaultdict
+from stt_translate.batch_poller import BatchPoller
+from stt_translate.clients import api_key, gemini_client
+from stt_translate.gemini_files import UploadManager
+from stt_translate.gemini_batch import (
+    GeminiBatchJob,
+    iter_chunk_requests,
+    iter_file_requests,
+    submit_shards,
+    write_shards,
+)
+from stt_translate.sarvam_batch import find_audio_files
+
+# -------------------------------------------------------------
+# 1. CONFIGURATION
+# -------------------------------------------------------------
+INPUT_DIR = r"data"                                   # Every .wav/.mp3 under this folder
+OUTPUT_DIR = r"output\translated\gemini\gemini_batch_corpus"
+SHARD_DIR = os.path.join(OUTPUT_DIR, "shards")
+MODEL = "gemini-2.5-flash"
+CHUNK_DURATION = None       # None = one request per file (Files API), e.g. 29 = inline chunks
+MAX_SHARD_REQUESTS = 10_000
+UPLOAD_WORKERS = 4
+MAX_ATTEMPTS = 3            # Submissions per request; failed keys are resubmitted on their own
+PROMPT = (
+    "Translate this audio clip into English. "
+    "The speaker may use Hindi, Gujarati, or both. "
+    "Do not transcribe; only provide the English translation. "
+    "Preserve tone and meaning accurately with correct grammar."
+)
+
+start_time = time.time()
+
+# -------------------------------------------------------------
+# 2. INITIALIZATION
+# -------------------------------------------------------------
+API_KEY = api_key("GEMINI_API_KEY")
+
+client = gemini_client()
+
+# -------------------------------------------------------------
+# 3. STREAM REQUESTS INTO SHARDS AND SUBMIT THEM AS THEY CLOSE
+# -------------------------------------------------------------
+audio_paths = find_audio_files(INPUT_DIR)
+print(f"Building batch requests for {len(audio_paths)} audio files...")
+
+if CHUNK_DURATION:
+    requests = iter_chunk_requests(audio_paths, PROMPT, chunk_duration=CHUNK_DURATION)
+else:
+    uploads = UploadManager(client, max_workers=UPLOAD_WORKERS)
+    requests = iter_file_requests(audio_paths, PROMPT, upload=uploads.get, max_workers=UPLOAD_WORKERS)
+
+shards = write_shards(requests, SHARD_DIR, max_requests=MAX_SHARD_REQUESTS)
+submitted = submit_shards(client, MODEL, shards, max_workers=UPLOAD_WORKERS, display_name="audio-translation")
+
+# -------------------------------------------------------------
+# 4. POLL ALL JOBS TOGETHER AND PARSE EACH ONE AS SOON AS IT FINISHES
+# -------------------------------------------------------------
+texts = defaultdict(dict)   # source -> {chunk index: text}
+
+
+def save_result(result):
+    if result.error:
+        print(f"  {result.source} chunk {result.chunk}: {result.error}")
+        return
+    texts[result.source][result.chunk] = result.text
+
+
+poller = BatchPoller(interval=10, max_interval=120)
+for shard, job in submitted:
+    poller.add(GeminiBatchJob(client, MODEL, shard, job, API_KEY, save_result, max_attempts=MAX_ATTEMPTS,
+                              display_name="audio-translation"))
+poller.run()
+
+# -------------------------------------------------------------
+# 5. SAVE ONE TRANSLATION PER SOURCE FILE
+# -------------------------------------------------------------
+for source, chunks in texts.items():
+    relative = os.path.relpath(source, INPUT_DIR)
+    output_file = os.path.join(OUTPUT_DIR, os.path.splitext(relative)[0] + ".txt")
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(" ".join(chunks[index] for index in sorted(chunks)))
+print(f"Saved {len(texts)} translations under: {OUTPUT_DIR}")
+
+end_time = time.time()
+elapsed_time = end_time - start_time
+minutes, seconds = divmod(elapsed_time, 60)
+print(f"\nTotal processing time: {minutes:.0f} min {seconds:.2f} sec")
@@ -0,0 +1,88 @@
+import os
+import time
+from stt_translate.clients import gemini_client, load_env
+from stt_translate.cache import ResultCache, file_digest
+from stt_translate.gemini_combined import (
+    PROMPT,
+    records_from_json,
+    records_to_json,
+    transcribe_and_translate,
+)
+from stt_translate.gemini_files import UploadManager
+
+# -----------------------------------------------------
+# 1. CONFIGURATION
+# -----------------------------------------------------
+AUDIO_FILE_PATH = r"data\2_Negative_Memories.mp3"
+OUTPUT_DIR = r"output\combined\gemini"
+MODEL_NAME = "gemini-2.5-flash"
+
+# -----------------------------------------------------
+# 2. START TIMER
+# -----------------------------------------------------
+start_time = time.time()
+
+# -----------------------------------------------------
+# 3. LOAD ENVIRONMENT VARIABLES
+# -----------------------------------------------------
+load_env()
+
+# -----------------------------------------------------
+# 4. INITIALIZE GEMINI CLIENT
+# -----------------------------------------------------
+client = gemini_client()
+uploads = UploadManager(client)  # one upload per audio file, reused until it expires
+
+# -----------------------------------------------------
+# 5. CHECK RESULT CACHE (same audio + model + prompt)
+# -----------------------------------------------------
+cache = ResultCache()
+audio_hash = file_digest(AUDIO_FILE_PATH)
+cache_key = cache.make_key(audio_hash, "gemini-combined", MODEL_NAME, prompt=PROMPT)
+cached = cache.get(cache_key)
+
+if cached is not None:
+    print("Segments served from cache, skipping upload and generation.\n")
+    records = records_from_json(cached)
+else:
+    # -------------------------------------------------
+    # 6. ONE CALL: TRANSCRIBE + TRANSLATE AS STRUCTURED JSON
+    # -------------------------------------------------
+    myfile = uploads.get(AUDIO_FILE_PATH)
+    print("🚀 Transcribing and translating in a single pass...\n")
+    records = transcribe_and_translate(client, myfile.as_part(), model=MODEL_NAME)
+    if records:
+        cache.put(cache_key, records_to_json(records), provider="gemini-combined",
+                  model=MODEL_NAME, audio_hash=audio_hash)
+
+# -----------------------------------------------------
+# 7. DISPLAY OUTPUT
+# -----------------------------------------------------
+print("\n================= SEGMENTS =================\n")
+for record in records:
+    print(f"[{record.start:7.1f}s - {record.end:7.1f}s] ({record.language}) {record.native_text}")
+    print(f"{'':22}→ {record.english_text}")
+print("\n============================================\n")
+
+# -----------------------------------------------------
+# 8. SAVE OUTPUT (segments JSON + plain native / English text)
+# -----------------------------------------------------
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+base_name = os.path.splitext(os.path.basename(AUDIO_FILE_PATH))[0]
+outputs = {
+    f"{base_name}_segments.json": records_to_json(records),
+    f"{base_name}_native.txt": "\n".join(record.native_text for record in records),
+    f"{base_name}_english.txt": "\n".join(record.english_text for record in records),
+}
+for name, content in outputs.items():
+    with open(os.path.join(OUTPUT_DIR, name), "w", encoding="utf-8") as f:
+        f.write(content)
+print(f"Saved {len(records)} segments under:\n{OUTPUT_DIR}")
+
+# -----------------------------------------------------
+# 9. END TIMER
+# -----------------------------------------------------
+end_time = time.time()
+elapsed_time = end_time - start_time
+minutes, seconds = divmod(elapsed_time, 60)
+print(f"\nTotal processing time: {minutes:.0f} min {seconds:.2f} sec")
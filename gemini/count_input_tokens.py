@@ -1,36 +1,37 @@
-from google import genai
-import os
-from dotenv import load_dotenv
+from stt_translate.clients import gemini_client
+from stt_translate.estimate import RATES, audio_input_tokens, probe_duration
+from stt_translate.gemini_files import UploadManager
 
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
+audio_file_path = r"data\2_Negative_Memories.mp3"
+MODEL_NAME = "gemini-2.5-flash"
+VERIFY_ONLINE = False   # True = also upload (or reuse the upload) and ask the API to count
 
-client = genai.Client(api_key=GEMINI_API_KEY)
+prompt = (
+    "You are a professional speech translation assistant.\n"
+    "Listen to the given audio clip carefully and translate everything spoken "
+    "into clear, natural English.\n\n"
+    "The speaker may use Hindi, Gujarati, or a mix of both.\n"
+    "Do not provide the transcription in the original language—only output "
+    "the English translation.\n"
+    "Maintain the tone and meaning accurately, and ensure proper grammar and "
+    "punctuation in English.\n"
+)
 
-audio_file_path = r"data\2_Negative_Memories.mp3"
-print(f"Uploading audio file: {audio_file_path}")
+# Offline estimate: audio tokens come from the duration alone (32 tokens per second)
+rate = next(rate for rate in RATES if rate.model == MODEL_NAME)
+duration = probe_duration(audio_file_path)
+print(f"Audio duration: {duration:.1f} sec")
+print(f"Estimated audio input tokens ({MODEL_NAME}): {audio_input_tokens(duration, rate)}")
 
-myfile = client.files.upload(file=audio_file_path)
-print(f"Upload complete. File ID: {myfile.name}")
+if VERIFY_ONLINE:
+    client = gemini_client()
 
-client = genai.Client()
-response = client.models.count_tokens(
-  model='gemini-2.5-flash',
-  contents=[
-        (
-            "You are a professional speech translation assistant.\n"
-            "Listen to the given audio clip carefully and translate everything spoken "
-            "into clear, natural English.\n\n"
-            "The speaker may use Hindi, Gujarati, or a mix of both.\n"
-            "Do not provide the transcription in the original language—only output "
-            "the English translation.\n"
-            "Maintain the tone and meaning accurately, and ensure proper grammar and "
-            "punctuation in English.\n"
-        ),
-        myfile
-    ]
-)
+    # Reuses the upload made by the transcription/translation scripts when there is one
+    myfile = UploadManager(client).get(audio_file_path)
+
+    response = client.models.count_tokens(
+      model=MODEL_NAME,
+      contents=[prompt, myfile.as_part()]
+    )
 
-print(response)
\ No newline at end of file
+    print(response)
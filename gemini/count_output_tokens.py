@@ -1,18 +1,18 @@
-import tiktoken
+from stt_translate.estimate import count_text_tokens
 
-# Path to your transcription file
-file_path = r"output\translated\gemini\gemini_translation_upload_flash.txt"
+# Transcription files or whole output directories to count
+paths = [
+    r"output\transcribed\gemini",
+    r"output\translated\gemini",
+]
 
-# Choose a tokenizer model (e.g. GPT-4, GPT-3.5)
-# For Gemini output, GPT-4 tokenizer will give a close approximation
-encoding = tiktoken.encoding_for_model("gpt-4")
+# For Gemini output, the GPT-4 tokenizer (cl100k_base) gives a close approximation
+if __name__ == "__main__":
+    # Files are tokenized in parallel worker processes
+    tokens = count_text_tokens(paths, encoding_name="cl100k_base")
 
-# Read the transcription text
-with open(file_path, "r", encoding="utf-8") as f:
-    text = f.read()
+    for path, count in sorted(tokens.items()):
+        print(f"{count:>10}  {path}")
 
-# Tokenize the text
-tokens = encoding.encode(text)
-
-# Count tokens
-print(f"Total tokens: {len(tokens)}")
+    # Count tokens
+    print(f"Total tokens: {sum(tokens.values())} across {len(tokens)} files")
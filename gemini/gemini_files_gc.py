@@ -0,0 +1,14 @@
+from stt_translate.clients import gemini_client
+from stt_translate.gemini_files import UploadManager
+
+# Deletes uploads made by UploadManager that no registry entry points to and that
+# are older than MIN_AGE_HOURS, and forgets registry entries that have expired or
+# vanished from the Files API. A dry run only reports; nothing is changed.
+DRY_RUN = True   # Set to False to actually delete the orphaned uploads
+MIN_AGE_HOURS = 24   # Younger uploads may still be in use by another machine's batch job
+
+client = gemini_client()
+
+orphans = UploadManager(client, max_workers=8).collect_garbage(min_age=MIN_AGE_HOURS * 3600, dry_run=DRY_RUN)
+for name in orphans:
+    print(f"{'Would delete' if DRY_RUN else 'Deleted'}: {name}")
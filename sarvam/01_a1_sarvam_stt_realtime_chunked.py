@@ -1,60 +1,56 @@
-from sarvamai import SarvamAI
 import os
-import subprocess
 import time
-from dotenv import load_dotenv
+from stt_translate.clients import load_env, sarvam_clients
+from stt_translate.cache import ResultCache, file_digest
+from stt_translate.chunking import ChunkFailure, stream_chunks, stream_speech_chunks, write_failures
+from stt_translate.compact import CompactStats, chunk_encoding, compact_chunk
+from stt_translate.concurrency import AdaptiveLimiter, RetryPolicy, map_ordered
+from stt_translate.demux import VIDEO_EXTENSIONS, extract_audio
+from stt_translate.journal import ChunkJournal, append_partial, clear_checkpoint, journal_path, partial_path
+from stt_translate.segmenter import SilenceSegmenter
+from stt_translate.stitch import TimedText, dump_piece, load_piece, response_text, response_words, stitch
+from stt_translate import tracing
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
 
-# Retrieve API key
-SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
+# Total chunk requests in flight, and the cap for any single API key
+MAX_WORKERS = int(os.getenv("SARVAM_MAX_WORKERS", "8"))
+PER_KEY_LIMIT = int(os.getenv("SARVAM_PER_KEY_LIMIT", "4"))
 
-# Validate
-if not SARVAM_API_KEY:
-    raise ValueError("SARVAM_API_KEY not found. Please set it in your .env file.")
+# Tries per chunk on 429/5xx/network errors; a key's concurrency halves on 429s and regrows on success
+MAX_ATTEMPTS = int(os.getenv("SARVAM_MAX_ATTEMPTS", "5"))
+
+# Cut chunks at pauses and drop silence (False = blind 29 second cuts)
+SILENCE_AWARE = True
+
+# Seconds shared by neighbouring fixed-length chunks (only when SILENCE_AWARE is False);
+# the overlapping words are stitched out of the joined text using Sarvam's word timestamps
+OVERLAP = 0.0
+
+# Chunks are re-encoded before upload: "flac" is lossless and about half the size of WAV,
+# "opus:24k" is several-fold smaller, "off" sends WAV (overridden by STT_CHUNK_CODEC)
+CHUNK_ENCODING = chunk_encoding()
+compacted = CompactStats()
 
 # Start timing before transcription
 start_time = time.time()
 
-client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
+# One client per comma-separated SARVAM_API_KEY, sharing a keep-alive connection pool
+clients = sarvam_clients()
+
+# Chunk results are cached by audio hash + chunk offsets, so reruns only send changed chunks
+cache = ResultCache()
 
 def file_format_check(audio_file_path):
-    supported_formats = ['.wav', '.mp3']
+    supported_formats = ['.wav', '.mp3', *VIDEO_EXTENSIONS]
     ext = os.path.splitext(audio_file_path)[1].lower()
     if ext not in supported_formats:
-            print(f"Unsupported file format '{ext}'. Please upload a WAV or MP3 file.")
+            print(f"Unsupported file format '{ext}'. Please upload a WAV, MP3 or MP4/MKV/WebM/MOV file.")
             return False
     print(f"File '{audio_file_path}' supported!")
     return True
 
-def split_audio_ffmpeg(audio_path, chunk_duration=29, output_dir=r"output\chunked\stt_chunked"):
-    os.makedirs(output_dir, exist_ok=True)
-    ext = os.path.splitext(audio_path)[1].lower()
-    base_name = os.path.splitext(os.path.basename(audio_path))[0]
-    output_pattern = os.path.join(output_dir, f"{base_name}_%03d{ext}")
-    codec = "pcm_s16le" if ext == ".wav" else "libmp3lame"
-    command = [
-        "ffmpeg",
-        "-i", audio_path,
-        "-f", "segment",
-        "-segment_time", str(chunk_duration),
-        "-c:a", codec,
-        output_pattern
-    ]
-    print("Running command:", " ".join(command))
-    result = subprocess.run(command, capture_output=True, text=True)
-    print("Return code:", result.returncode)
-    print("STDOUT:\n", result.stdout)
-    print("STDERR:\n", result.stderr)
-    output_files = sorted([
-        os.path.join(output_dir, f) for f in os.listdir(output_dir)
-        if f.endswith(ext)
-    ])
-    print("Chunks generated:", output_files)
-    return output_files
-
-
 # language_code="hi-IN" for Manually tagging Hindi, language_code="gu-IN" for Gujarati
 # language_code="unknown" for Auto detection
 # No language_code parametet for Code Mixed Speech
@@ -78,38 +74,104 @@ def split_audio_ffmpeg(audio_path, chunk_duration=29, output_dir=r"output\chunke
 
 #     return " ".join(full_transcript).strip()
 
-def transcribe_audio_chunks_sdk(chunk_paths, client, model="saarika:v2.5"):
-    
-    full_transcript = []
-
-    for idx, chunk_path in enumerate(chunk_paths):
-        print(f"\nTranscribing chunk {idx + 1}/{len(chunk_paths)} → {chunk_path}")
-        with open(chunk_path, "rb") as audio_file:
-            try:
-                response = client.speech_to_text.transcribe(
-                    file=audio_file,
-                    model=model
-                )
-                print("Chunk Response:", response)
-                full_transcript.append(str(response))
-            except Exception as e:
-                print(f"Error with chunk {chunk_path}: {e}")
-
-    return " ".join(full_transcript).strip()
+# Chunks are sent concurrently (round-robin over the clients) as soon as ffmpeg cuts them,
+# and joined back in chunk order
+def transcribe_audio_chunks_sdk(chunks, clients, audio_hash, model="saarika:v2.5",
+                                max_workers=MAX_WORKERS, per_key_limit=PER_KEY_LIMIT, failures=None, overlap=0.0,
+                                journal=None, output_path=None):
+
+    def transcribe_chunk(job):
+        idx, chunk = job
+        client = clients[idx % len(clients)]
+        # Chunks finished before an interruption come straight from the checkpoint journal
+        if journal is not None and (done := journal.get(chunk)) is not None:
+            return TimedText(chunk.start, chunk.end, done)
+        print(f"\nTranscribing chunk {idx + 1} ({chunk.start:.1f}s - {chunk.end:.1f}s) → {chunk.filename}")
+        # Stitching needs the bare transcript and word timings rather than the response repr, so they are cached apart
+        cache_key = cache.make_key(audio_hash, "sarvam", model, prompt="timed" if overlap else "",
+                                   start=chunk.start, end=chunk.end)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"Chunk {idx + 1} served from cache")
+            piece = load_piece(chunk.start, chunk.end, cached) if overlap else TimedText(chunk.start, chunk.end, cached)
+            if journal is not None:
+                journal.record(chunk, piece.text)
+            return piece
+        upload = compact_chunk(chunk, CHUNK_ENCODING, compacted)
+        with tracing.span("request", provider="sarvam", model=model, chunk=idx, bytes=len(upload.data)):
+            response = client.speech_to_text.transcribe(
+                file=upload.as_upload(),
+                model=model,
+                **({"with_timestamps": True} if overlap else {})
+            )
+        print(f"Chunk {idx + 1} Response:", response)
+        if overlap:
+            piece = TimedText(chunk.start, chunk.end, response_text(response), response_words(response, chunk.start))
+        else:
+            piece = TimedText(chunk.start, chunk.end, str(response))
+        cache.put(cache_key, dump_piece(piece) if overlap else piece.text, provider="sarvam", model=model,
+                  audio_hash=audio_hash, start=chunk.start, end=chunk.end)
+        if journal is not None:
+            journal.record(chunk, piece.text)
+        return piece
+
+    # A chunk that still fails after retries leaves a placeholder and a failure record
+    def record_failure(job, error):
+        failure = ChunkFailure.from_error(job[1], error)
+        print(f"Chunk {job[0] + 1} failed after retries: {failure.error}")
+        if failures is not None:
+            failures.append(failure)
+        return TimedText(failure.start, failure.end, failure.placeholder())
+
+    results = map_ordered(
+        transcribe_chunk,
+        enumerate(chunks),
+        max_workers=max_workers,
+        key=lambda job: job[0] % len(clients),
+        limiter=AdaptiveLimiter(per_key_limit),
+        retry=RetryPolicy(attempts=MAX_ATTEMPTS),
+        on_error=record_failure,
+    )
+    # The ordered text so far is kept in <output>.partial while chunks come back
+    if output_path:
+        results = append_partial(results, partial_path(output_path))
+    full_transcript = list(results)
+
+    return stitch(full_transcript, overlap).strip()
 
 
 audio_file_path = r"C:\Users\Abhijit\Matrix\Work\Jio_Institute\Internship_PureBillion\STT-and-Translate-POC\data\2_Negative_Memories.mp3"
 if file_format_check(audio_file_path):
-    chunks = split_audio_ffmpeg(audio_path=audio_file_path)
-    print("Data chunked successfully!")
-    # 2. Transcribe each chunk and collate
-    if chunks:
-        final_transcript = transcribe_audio_chunks_sdk(chunks, client)
+    # A video's audio track is stream-copied out first, without decoding the video
+    audio_file_path = extract_audio(audio_file_path)
+    # Chunks are cut in memory and streamed straight into the API calls
+    if SILENCE_AWARE:
+        segmenter = SilenceSegmenter(max_chunk=29.0)
+        chunks = stream_speech_chunks(audio_file_path, segmenter=segmenter)
+    else:
+        chunks = stream_chunks(audio_file_path, chunk_duration=29, overlap=OVERLAP)
+
+    # Define output path
+    output_path = r"C:\Users\Abhijit\Matrix\Work\Jio_Institute\Internship_PureBillion\STT-and-Translate-POC\output\transcribed\01_a1_stt_transcribed_R3.txt"
+
+    # Each finished chunk is journaled next to the output, so a rerun after a crash only sends the missing ones
+    chunking = "silence:29" if SILENCE_AWARE else f"fixed:29:{OVERLAP}"
+    journal = ChunkJournal(journal_path(output_path), {"audio": file_digest(audio_file_path), "provider": "sarvam",
+                                                       "model": "saarika:v2.5", "translate": False, "chunking": chunking})
+    if len(journal):
+        print(f"Resuming: {len(journal)} chunks already done")
+    failures = []
+    final_transcript = transcribe_audio_chunks_sdk(chunks, clients, file_digest(audio_file_path), failures=failures,
+                                                   overlap=0.0 if SILENCE_AWARE else OVERLAP,
+                                                   journal=journal, output_path=output_path)
+    journal.close()
+    if SILENCE_AWARE:
+        print(f"\nSilence-aware chunking: {segmenter.stats.summary()}")
+    if compacted.items:
+        print(f"Chunk upload size: {compacted.summary()}")
+    if final_transcript:
         print("\nFinal Combined Transcript:\n")
         print(final_transcript)
-        # Define output path
-        output_path = r"C:\Users\Abhijit\Matrix\Work\Jio_Institute\Internship_PureBillion\STT-and-Translate-POC\output\transcribed\01_a1_stt_transcribed_R3.txt"
-
         # Ensure directory exists
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
@@ -117,9 +179,16 @@ if file_format_check(audio_file_path):
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(final_transcript)
 
+        # Failed chunks are not journaled, so the journal is kept for a rerun to retry just those
+        clear_checkpoint(output_path, keep_journal=bool(failures))
+
+        if failures:
+            write_failures(failures, output_path + ".failed.json")
+            print(f"\n{len(failures)} chunks failed; see {output_path}.failed.json")
+
         print(f"\nTranscript saved at:\n{output_path}")
     else:
-        print("No audio chunks generated. Transcription aborted.")
+        print("No audio chunks transcribed. Transcription aborted.")
 
 # End timing
 end_time = time.time()
@@ -1,48 +1,75 @@
-from sarvamai import SarvamAI
+import json
 import os
 import subprocess
 import time
 from pathlib import Path
-from dotenv import load_dotenv
+from stt_translate.clients import load_env, sarvam_client
+from stt_translate.cache import ResultCache, file_digest
+from stt_translate.sarvam_batch import BatchManifest, SarvamBatchDriver
 
 # Load environment variables from .env file
-load_dotenv()
-
-# Retrieve API key
-SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
-
-# Validate
-if not SARVAM_API_KEY:
-    raise ValueError("SARVAM_API_KEY not found. Please set it in your .env file.")
+load_env()
 
 # Start timing before transcription
 start_time = time.time()
 
-client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
-
 audio_files = [r"C:\Users\Abhijit\Matrix\Work\Jio_Institute\Internship_PureBillion\STT-and-Translate-POC\data\2_Negative_Memories.mp3"]  # Update with your file path
 output_dir = Path(r"C:\Users\Abhijit\Matrix\Work\Jio_Institute\Internship_PureBillion\STT-and-Translate-POC\output\transcribed\02_a1_stt_batch_R4.txt")
 output_dir.mkdir(exist_ok=True)
 
+MODEL = "saarika:v2.5"
+JOB_OPTIONS = dict(
+    with_diarization=False,
+    with_timestamps=True,
+    language_code="hi-IN",
+    num_speakers=1,
+)
+MAX_ATTEMPTS = 2  # Files that fail inside a finished job are resubmitted on their own
+# Job IDs are recorded here before polling starts, so rerunning after a crash or Ctrl+C
+# re-attaches to the submitted job instead of paying for a new one
+MANIFEST_PATH = output_dir / "manifest.sqlite"
+
+# Per-file results are cached by audio hash + model + job options; only uncached files are uploaded
+cache = ResultCache()
+
+def cached_output_path(audio_file):
+    return output_dir / f"{os.path.basename(audio_file)}.json"
+
 def run_stt_sync():
-    client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
-    job = client.speech_to_text_job.create_job(
-        model="saarika:v2.5",
-        with_diarization=False,
-        with_timestamps=True,
-        language_code="hi-IN",
-        num_speakers=1,
-    )
-    print(f"Job created: {job._job_id}")
-    job.upload_files(file_paths=audio_files, timeout=120.0)
-    job.start()
+    audio_hashes = {audio_file: file_digest(audio_file) for audio_file in audio_files}
+    cache_keys = {
+        audio_file: cache.make_key(audio_hashes[audio_file], "sarvam-batch", MODEL,
+                                   prompt=json.dumps(JOB_OPTIONS, sort_keys=True))
+        for audio_file in audio_files
+    }
+    pending_files = []
+    for audio_file, cache_key in cache_keys.items():
+        cached = cache.get(cache_key)
+        if cached is None:
+            pending_files.append(audio_file)
+            continue
+        cached_output_path(audio_file).write_text(cached, encoding="utf-8")
+        print(f"Served from cache: {audio_file}")
+
+    if not pending_files:
+        print(f"All files served from cache. Output saved to: {output_dir}")
+        return
+
+    # Built (and the SDK imported) only when some file is not cached
+    manifest = BatchManifest(str(MANIFEST_PATH))
+    driver = SarvamBatchDriver(sarvam_client(), manifest, str(output_dir), model=MODEL, job_options=JOB_OPTIONS,
+                               max_attempts=MAX_ATTEMPTS, poll_interval=5, max_poll_interval=30)
     print("Transcription started...")
-    job.wait_until_complete(poll_interval=5, timeout=60)
-    
-    if job.is_failed():
-        raise RuntimeError("Transcription failed")
-    
-    job.download_outputs(output_dir=str(output_dir))
+    driver.run(pending_files, retry_failed=True)  # files that failed in an earlier run get another go
+
+    errors = manifest.file_errors(pending_files)
+    for audio_file in pending_files:
+        result_path = cached_output_path(audio_file)
+        if audio_file in errors or not result_path.exists():
+            print(f"Transcription failed: {audio_file} ({errors.get(audio_file) or 'no output'})")
+            continue
+        cache.put(cache_keys[audio_file], result_path.read_text(encoding="utf-8"),
+                  provider="sarvam-batch", model=MODEL, audio_hash=audio_hashes[audio_file])
     print(f"Transcription completed. Output saved to: {output_dir}")
 
 run_stt_sync()
@@ -1,40 +1,61 @@
-from sarvamai import SarvamAI
+import json
 import os
 import subprocess
 import time
 from pathlib import Path
-from dotenv import load_dotenv
-# Load environment variables from .env file
-load_dotenv()
-
-# Retrieve API key
-SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
+from stt_translate.clients import load_env, sarvam_client
+from stt_translate.cache import ResultCache, file_digest
 
-# Validate
-if not SARVAM_API_KEY:
-    raise ValueError("SARVAM_API_KEY not found. Please set it in your .env file.")
+# Load environment variables from .env file
+load_env()
 
 # Start timing before transcription
 start_time = time.time()
 
-client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
-
 audio_files = [r"C:\Users\Abhijit\Matrix\Work\Jio_Institute\Internship_PureBillion\STT-and-Translate-POC\data\2_Negative_Memories.mp3"]  # Update with your file path
 output_dir = Path(r"output\translated\02_a2_sarvam_stt_translate_batch_R1.txt")
 output_dir.mkdir(exist_ok=True)
 
+MODEL = "saaras:v2.5"
+JOB_OPTIONS = dict(
+    with_diarization=False,
+    # num_speakers=1,
+    # prompt="Official meeting"
+)
+
+# Per-file results are cached by audio hash + model + job options; only uncached files are uploaded
+cache = ResultCache()
+
+def cached_output_path(audio_file):
+    return output_dir / f"{os.path.basename(audio_file)}.json"
+
 def run_sttt_sync():
-    client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
+    audio_hashes = {audio_file: file_digest(audio_file) for audio_file in audio_files}
+    cache_keys = {
+        audio_file: cache.make_key(audio_hashes[audio_file], "sarvam-batch", MODEL,
+                                   prompt=json.dumps(JOB_OPTIONS, sort_keys=True))
+        for audio_file in audio_files
+    }
+    pending_files = []
+    for audio_file, cache_key in cache_keys.items():
+        cached = cache.get(cache_key)
+        if cached is None:
+            pending_files.append(audio_file)
+            continue
+        cached_output_path(audio_file).write_text(cached, encoding="utf-8")
+        print(f"Served from cache: {audio_file}")
+
+    if not pending_files:
+        print(f"All files served from cache. Output saved to: {output_dir}")
+        return
+
+    # Built (and the SDK imported) only when some file is not cached
+    client = sarvam_client()
 
-    job = client.speech_to_text_translate_job.create_job(
-        model="saaras:v2.5",
-        with_diarization=False
-        # num_speakers=1,
-        # prompt="Official meeting"
-    )
+    job = client.speech_to_text_translate_job.create_job(model=MODEL, **JOB_OPTIONS)
 
     print(f"Job created: {job._job_id}")
-    job.upload_files(file_paths=audio_files, timeout=120.0)
+    job.upload_files(file_paths=pending_files, timeout=120.0)
     job.start()
     print("Translation started...")
     job.wait_until_complete(poll_interval=5, timeout=60)
@@ -43,6 +64,11 @@ def run_sttt_sync():
         raise RuntimeError("Translation failed")
 
     job.download_outputs(output_dir=str(output_dir))
+    for audio_file in pending_files:
+        result_path = cached_output_path(audio_file)
+        if result_path.exists():
+            cache.put(cache_keys[audio_file], result_path.read_text(encoding="utf-8"),
+                      provider="sarvam-batch", model=MODEL, audio_hash=audio_hashes[audio_file])
     print(f"Translation completed. Output saved to: {output_dir}")
 
 run_sttt_sync()
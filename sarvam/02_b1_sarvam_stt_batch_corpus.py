@@ -0,0 +1,35 @@
+import time
+from stt_translate.clients import sarvam_client
+from stt_translate.sarvam_batch import BatchManifest, SarvamBatchDriver, find_audio_files
+
+# Corpus configuration
+INPUT_DIR = r"data"                                   # Every .wav/.mp3 under this folder is processed
+OUTPUT_DIR = r"output\transcribed\sarvam\corpus"      # One <file>.json per input, mirroring INPUT_DIR
+MANIFEST_PATH = r"output\transcribed\sarvam\corpus\manifest.sqlite"
+TRANSLATE = False                                     # True = saaras STT + translate jobs
+MAX_JOBS_IN_FLIGHT = 4
+RETRY_FAILED = False                                  # Requeue files that failed in an earlier run
+
+# Start timing before transcription
+start_time = time.time()
+
+# Re-running after a crash re-attaches to the jobs recorded in the manifest
+driver = SarvamBatchDriver(
+    sarvam_client(),
+    BatchManifest(MANIFEST_PATH),
+    OUTPUT_DIR,
+    model="saaras:v2.5" if TRANSLATE else "saarika:v2.5",
+    translate=TRANSLATE,
+    job_options={} if TRANSLATE else dict(with_timestamps=True, language_code="hi-IN"),
+    input_root=INPUT_DIR,
+    max_jobs_in_flight=MAX_JOBS_IN_FLIGHT,
+)
+driver.run(find_audio_files(INPUT_DIR), retry_failed=RETRY_FAILED)
+print(f"Outputs saved under: {OUTPUT_DIR}")
+
+# End timing
+end_time = time.time()
+elapsed_time = end_time - start_time
+minutes, seconds = divmod(elapsed_time, 60)
+
+print(f"\nTotal transcription time: {minutes:.0f} min {seconds:.2f} sec")
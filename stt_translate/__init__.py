@@ -0,0 +1,5 @@
+"""Shared helpers for the STT and translation POC scripts.
+
+Install the project with ``uv sync`` so the scripts under ``sarvam/`` and
+``gemini/`` can import from this package.
+"""
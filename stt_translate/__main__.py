@@ -0,0 +1,218 @@
+"""Command-line entry point: ``python -m stt_translate <command>``.
+
+Usage::
+
+    python -m stt_translate run --provider sarvam --mode realtime data/2_Negative_Memories.mp3
+    python -m stt_translate run --provider gemini --mode auto data
+    python -m stt_translate run --provider gemini --mode async data --max-in-flight 48
+    python -m stt_translate run --provider gemini --mode routed --tiers sarvam:saarika:v2.5,gemini:gemini-2.5-pro data
+    python -m stt_translate run --provider gemini --mode combined data --output-dir output/combined/gemini
+    python -m stt_translate run --provider sarvam --mode realtime data --trace output/traces/run.json --metrics-port 9464
+    python -m stt_translate translate output/run --output-dir output/translated/text
+    python -m stt_translate stream --realtime data/2_Negative_Memories.mp3
+    arecord -f S16_LE -r 16000 -c 1 -t wav | python -m stt_translate stream -
+    python -m stt_translate estimate --audio data --corpus-hours 10000
+    python -m stt_translate benchmark data/bench --runs sarvam/realtime gemini/inline
+    python -m stt_translate segments export --format srt --output-dir output/subtitles
+
+Only the selected provider's SDK is imported.
+"""
+import argparse
+import os
+import sys
+import time
+
+
+def run_command(args):
+    from stt_translate import clients, pipeline
+
+    start_time = time.time()
+    try:
+        saved = pipeline.run(
+            args.provider,
+            args.mode,
+            args.inputs,
+            args.output_dir,
+            translate=args.translate,
+            model=args.model,
+            max_workers=args.max_workers,
+            per_key_limit=args.per_key_limit,
+            overlap=args.overlap,
+            upload_codec=args.upload_codec,
+            chunk_codec=args.chunk_codec,
+            tiers=args.tiers,
+            max_in_flight=args.max_in_flight,
+            timeout=args.timeout,
+        )
+    finally:
+        clients.close()
+    print(f"Saved {len(saved)} outputs under: {args.output_dir}")
+    minutes, seconds = divmod(time.time() - start_time, 60)
+    print(f"\nTotal processing time: {minutes:.0f} min {seconds:.2f} sec")
+
+
+def translate_command(args):
+    from stt_translate import clients, translation
+
+    start_time = time.time()
+    try:
+        saved = translation.run(
+            args.inputs,
+            args.output_dir,
+            model=args.model,
+            max_tokens=args.max_tokens,
+            max_segments=args.max_segments,
+            max_workers=args.max_workers,
+        )
+    finally:
+        clients.close()
+    print(f"Saved {len(saved)} translations under: {args.output_dir}")
+    minutes, seconds = divmod(time.time() - start_time, 60)
+    print(f"\nTotal translation time: {minutes:.0f} min {seconds:.2f} sec")
+
+
+def stream_command(args):
+    import asyncio
+
+    from stt_translate import clients, pipeline
+    from stt_translate.concurrency import RetryPolicy
+    from stt_translate.streaming import run_stream
+
+    model = args.model or pipeline.DEFAULT_MODELS[("sarvam", args.translate)]
+    start_time = time.time()
+    first_text = []
+
+    def show(result):
+        if result.final:
+            print(f"\n[final {result.end:.1f}s] {result.text}")
+            return
+        if result.text and not first_text:
+            first_text.append(time.time() - start_time)
+        print(f"[{result.start:6.1f}-{result.end:6.1f}s +{result.latency:.1f}s] {result.text}", flush=True)
+
+    failures = []
+    try:
+        transcript = asyncio.run(run_stream(
+            args.source,
+            pipeline.sarvam_window_transcriber(model, translate=args.translate, chunk_codec=args.chunk_codec,
+                                               timestamps=args.overlap > 0),
+            show,
+            window=args.window,
+            overlap=args.overlap,
+            max_in_flight=args.max_in_flight,
+            realtime=args.realtime,
+            follow=args.follow,
+            retry=RetryPolicy(attempts=args.max_attempts),
+            failures=failures,
+        ))
+    finally:
+        clients.close()
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(transcript)
+        if failures:
+            from stt_translate.chunking import write_failures
+
+            write_failures(failures, args.output + ".failed.json")
+    if failures:
+        print(f"{len(failures)} windows failed")
+    if first_text:
+        print(f"Time to first text: {first_text[0]:.2f} sec")
+    minutes, seconds = divmod(time.time() - start_time, 60)
+    print(f"Total streaming time: {minutes:.0f} min {seconds:.2f} sec")
+
+
+def add_tracing_arguments(parser):
+    parser.add_argument("--trace", help="Write a JSON trace of every stage here (default STT_TRACE_FILE)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this port while running (default STT_METRICS_PORT)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m stt_translate")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Transcribe or translate audio files with one provider")
+    run.add_argument("inputs", nargs="+", help="Audio files or directories")
+    run.add_argument("--provider", choices=["sarvam", "gemini"], required=True)
+    run.add_argument("--mode", required=True,
+                     help="sarvam: realtime|batch, gemini: auto|async|upload|inline|combined|routed")
+    run.add_argument("--translate", action="store_true", help="Translate to English instead of transcribing")
+    run.add_argument("--model", help="Override the provider's default model")
+    run.add_argument("--output-dir", default="output/run")
+    run.add_argument("--max-workers", type=int, default=8, help="Chunk requests in flight (sarvam realtime)")
+    run.add_argument("--per-key-limit", type=int, default=4, help="Chunk requests in flight per Sarvam key")
+    run.add_argument("--overlap", type=float, default=0.0,
+                     help="Seconds shared by neighbouring fixed 29 s chunks, stitched afterwards (sarvam realtime)")
+    run.add_argument("--upload-codec", help="codec[:bitrate] or off for Gemini uploads/inline audio "
+                                            "(default STT_UPLOAD_CODEC or opus:32k)")
+    run.add_argument("--chunk-codec", help="codec[:bitrate] or off for Sarvam chunks (default STT_CHUNK_CODEC or flac)")
+    run.add_argument("--tiers", help="provider:model,... tried cheapest first in routed mode "
+                                     "(default STT_ROUTER_TIERS or Gemini flash-lite, flash, pro)")
+    run.add_argument("--max-in-flight", type=int,
+                     help="Most requests pending at once in gemini async mode (default 16)")
+    run.add_argument("--timeout", type=float, help="Seconds per request in gemini async mode (default 600)")
+    run.add_argument("--mock", action="store_true", help="Use the offline stt_translate.mock clients")
+    add_tracing_arguments(run)
+    run.set_defaults(handler=run_command)
+
+    stream = commands.add_parser("stream", help="Transcribe a live, growing or piped source as it arrives (sarvam)")
+    stream.add_argument("source", help="Audio file, named pipe, or - for stdin")
+    stream.add_argument("--translate", action="store_true", help="Translate to English instead of transcribing")
+    stream.add_argument("--model", help="Override the default Sarvam model")
+    stream.add_argument("--window", type=float, default=5.0, help="Seconds of audio per request")
+    stream.add_argument("--overlap", type=float, default=1.0, help="Seconds shared by neighbouring windows")
+    stream.add_argument("--max-in-flight", type=int, default=4, help="Windows being transcribed at once")
+    stream.add_argument("--max-attempts", type=int, default=5, help="Tries per window on 429/5xx/network errors")
+    stream.add_argument("--realtime", action="store_true", help="Read a file at 1x speed, as if it were live")
+    stream.add_argument("--follow", action="store_true", help="Keep reading a file that is still being written")
+    stream.add_argument("--chunk-codec", help="codec[:bitrate] or off for windows (default STT_CHUNK_CODEC or flac)")
+    stream.add_argument("--output", help="Also save the final transcript here")
+    stream.add_argument("--mock", action="store_true", help="Use the offline stt_translate.mock clients")
+    add_tracing_arguments(stream)
+    stream.set_defaults(handler=stream_command)
+
+    translate = commands.add_parser("translate", help="Translate existing transcripts to English (text only)")
+    translate.add_argument("inputs", nargs="+", help="Transcript .txt/.json files or directories")
+    translate.add_argument("--model", default="gemini-2.5-flash", help="Gemini text model")
+    translate.add_argument("--output-dir", default="output/translated/text")
+    translate.add_argument("--max-tokens", type=int, default=4000, help="Estimated input tokens per request")
+    translate.add_argument("--max-segments", type=int, default=80, help="Segments per request")
+    translate.add_argument("--max-workers", type=int, default=8, help="Requests in flight")
+    translate.add_argument("--mock", action="store_true", help="Use the offline stt_translate.mock clients")
+    add_tracing_arguments(translate)
+    translate.set_defaults(handler=translate_command)
+
+    commands.add_parser("estimate", help="Offline token/cost/time forecast (see stt_translate.estimate)",
+                        add_help=False)
+    commands.add_parser("benchmark", help="Per-stage provider benchmark (see stt_translate.benchmark)",
+                        add_help=False)
+    commands.add_parser("segments", help="Summarize/export/import the segment store (see stt_translate.segment_store)",
+                        add_help=False)
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["estimate"]:
+        from stt_translate import estimate
+
+        return estimate.main(argv[1:])
+    if argv[:1] == ["benchmark"]:
+        from stt_translate import benchmark
+
+        return benchmark.main(argv[1:])
+    if argv[:1] == ["segments"]:
+        from stt_translate import segment_store
+
+        return segment_store.main(argv[1:])
+    args = parser.parse_args(argv)
+    if args.mock:
+        os.environ["STT_MOCK"] = "1"
+    if args.trace or args.metrics_port is not None:
+        from stt_translate import tracing
+
+        tracing.configure(args.trace, args.metrics_port)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""One poll loop for many Gemini and Sarvam batch jobs at once.
+
+The single-job scripts block on one job at a time (``time.sleep(20)`` in a
+``while True`` loop, or ``wait_until_complete``) and only read results once
+everything is done. A ``BatchPoller`` holds any number of jobs from either
+provider and polls each one on its own schedule. A job is next polled
+``interval`` seconds after it was submitted. The wait grows by ``backoff``
+per unchanged poll, up to ``max_interval``, and drops back to ``interval``
+whenever the job changes state (queued -> running). A job's results are
+collected as soon as that job finishes, while the others keep running.
+
+A job is any object with:
+
+* ``name``, ``provider`` and ``model`` attributes
+* ``poll()``, which returns the provider's current state string
+* ``finished(state)``, which is True for terminal states
+* ``collect(state)``, which handles the results and returns follow-up jobs
+  to track, e.g. a resubmission of the keys or files that failed
+
+``gemini_batch.GeminiBatchJob`` and ``sarvam_batch.SarvamBatchJob`` are the two adapters.
+"""
+import time
+
+from stt_translate import tracing
+
+
+class BatchPoller:
+    """Polls registered jobs with per-job backoff and collects each one when it finishes."""
+
+    def __init__(self, interval=5.0, max_interval=120.0, backoff=1.5):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        # name -> [job, seconds until next poll, next poll time, last state seen]
+        self._jobs = {}
+
+    def add(self, job):
+        self._jobs[job.name] = [job, self.interval, time.monotonic() + self.interval, None]
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def next_due(self):
+        """Monotonic time of the next scheduled poll, or None when nothing is tracked."""
+        return min((entry[2] for entry in self._jobs.values()), default=None)
+
+    def poll_due(self):
+        """Poll every job whose turn has come; collect the finished ones."""
+        now = time.monotonic()
+        for name, entry in list(self._jobs.items()):
+            job, interval, due, last = entry
+            if due > now:
+                continue
+            try:
+                with tracing.span("poll", provider=job.provider, model=job.model, job=name) as span:
+                    state = job.poll()
+                    span.set(state=state)
+            except Exception as e:
+                print(f"Polling job {name} failed: {e}")
+                state = last
+            if state is not None and job.finished(state):
+                try:
+                    follow_ups = job.collect(state) or []
+                except Exception as e:
+                    # The job stays tracked, so collecting is tried again on the next poll
+                    print(f"Collecting job {name} failed: {e}")
+                else:
+                    del self._jobs[name]
+                    for follow_up in follow_ups:
+                        self.add(follow_up)
+                    continue
+            if state != last:
+                if state is not None:
+                    print(f"Job {name}: {state}")
+                interval = self.interval
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
+            entry[1:] = [interval, time.monotonic() + interval, state]
+
+    def wait(self, until=None):
+        """Sleep until the next poll is due (or ``until``, a monotonic time, if that is sooner)."""
+        due = self.next_due()
+        if due is None:
+            return
+        if until is not None:
+            due = min(due, until)
+        time.sleep(max(0.0, due - time.monotonic()))
+
+    def run(self, timeout=None):
+        """Poll until every job (follow-ups included) is collected, or raise TimeoutError."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._jobs:
+            self.poll_due()
+            if not self._jobs:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"{len(self._jobs)} batch jobs still running after {timeout:g}s: "
+                                   f"{', '.join(self._jobs)}")
+            self.wait(deadline)
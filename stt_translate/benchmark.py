@@ -0,0 +1,274 @@
+"""Per-stage benchmark of every provider/mode over a fixed audio set.
+
+Each run sends the same audio through the real ``pipeline.run`` mode (or, for
+``gemini/batch``, the ``gemini_batch`` shard and poller path the corpus script
+uses), so chunking, retries, the adaptive limiters and upload routing are all
+part of the measurement. The result cache, upload registry, segment store and
+extracted/compacted audio are pointed at a throwaway directory, so every run
+makes real calls. Stage times come from the tracing spans the pipeline emits
+(extract, split, encode, upload, request, poll, download, write), captured in
+memory for the run. Stage times are summed over all calls, so stages that run
+concurrently can add up to more than the wall time. Chunks and files that
+still failed after retries are counted as errors, and failed request attempts
+(retried or not) are reported separately. The report is JSON (full detail)
+plus a CSV with one row per run, which replaces the hand-maintained
+comparison sheet.
+
+Usage::
+
+    python -m stt_translate.benchmark data/bench --runs sarvam/realtime gemini/inline gemini/upload
+    python -m stt_translate benchmark data/bench --repeat 3 --report output/benchmarks/report.json
+    python -m stt_translate benchmark data/bench --mock  # offline, against stt_translate.mock
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from stt_translate import clients, pipeline, tracing
+from stt_translate.estimate import probe_durations
+from stt_translate.pipeline import DEFAULT_MODELS, MODES, STT_PROMPT, TRANSLATE_PROMPT, collect_inputs
+
+RUNS = tuple(f"{provider}/{mode}" for provider, modes in MODES.items() for mode in modes) + ("gemini/batch",)
+DEFAULT_RUNS = ("sarvam/realtime", "sarvam/batch", "gemini/inline", "gemini/upload", "gemini/batch")
+DEFAULT_REPORT = os.path.join("output", "benchmarks", "report.json")
+
+# Where each run's cache, registry, store and audio copies go instead of their shared defaults
+ISOLATED = {
+    "STT_CACHE_PATH": "results.sqlite",
+    "GEMINI_FILE_REGISTRY": "gemini_files.sqlite",
+    "STT_SEGMENT_STORE": "segments.sqlite",
+    "STT_AUDIO_DIR": "audio",
+    "STT_COMPACT_DIR": "compact",
+}
+
+
+@dataclass
+class RunResult:
+    provider: str
+    mode: str
+    model: str
+    translate: bool
+    files: int
+    audio_seconds: float
+    wall_seconds: float
+    stages: dict = field(default_factory=dict)
+    stage_calls: dict = field(default_factory=dict)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    errors: int = 0  # chunks or files that still failed after retries
+    request_errors: int = 0  # failed request attempts, including ones a retry recovered
+    error: str = None  # why the run itself stopped, if it did
+
+    @property
+    def rtf(self):
+        """Wall seconds per audio second (lower is faster)."""
+        return self.wall_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    @property
+    def audio_hours_per_hour(self):
+        return self.audio_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    def as_dict(self):
+        return {**asdict(self), "rtf": round(self.rtf, 4), "audio_hours_per_hour": round(self.audio_hours_per_hour, 2)}
+
+
+class Usage:
+    """Errors and token counts a run reports outside the tracing spans."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.errors = 0
+
+    def add(self, input_tokens=0, output_tokens=0):
+        with self._lock:
+            self.input_tokens += input_tokens or 0
+            self.output_tokens += output_tokens or 0
+
+    def error(self, count=1):
+        with self._lock:
+            self.errors += count
+
+
+@contextmanager
+def isolated(directory):
+    """Point the result cache, upload registry, segment store and audio copies into ``directory``."""
+    previous = {name: os.environ.get(name) for name in ISOLATED}
+    os.environ.update({name: os.path.join(directory, value) for name, value in ISOLATED.items()})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def failed_chunks(output_dir):
+    """Chunks recorded in the ``.failed.json`` files the pipeline leaves next to its outputs."""
+    total = 0
+    for path in glob.glob(os.path.join(output_dir, "**", "*.failed.json"), recursive=True):
+        with open(path, encoding="utf-8") as f:
+            total += len(json.load(f))
+    return total
+
+
+def bench_pipeline(provider, mode, paths, model, translate, usage, output_dir):
+    saved = pipeline.run(provider, mode, paths, output_dir, translate=translate, model=model)
+    usage.error(len(paths) - len(saved) + failed_chunks(output_dir))
+
+
+def bench_gemini_batch(paths, model, translate, usage, output_dir):
+    from stt_translate.batch_poller import BatchPoller
+    from stt_translate.gemini_batch import GeminiBatchJob, iter_chunk_requests, submit_shards, write_shards
+
+    client = clients.gemini_client()
+    api_key = clients.api_key("GEMINI_API_KEY")
+    prompt = TRANSLATE_PROMPT if translate else STT_PROMPT
+    requests = iter_chunk_requests(paths, prompt)
+    shards = tracing.traced_iter("split", write_shards(requests, os.path.join(output_dir, "shards")))
+    submitted = submit_shards(client, model, shards, display_name="benchmark")
+
+    texts = defaultdict(dict)
+
+    def on_result(result):
+        if result.error:
+            usage.error()
+            return
+        usage.add(result.usage.get("promptTokenCount"), result.usage.get("candidatesTokenCount"))
+        texts[result.source][result.chunk] = result.text
+
+    poller = BatchPoller(interval=10, max_interval=120)
+    for shard, job in submitted:
+        poller.add(GeminiBatchJob(client, model, shard, job, api_key, on_result, display_name="benchmark"))
+    poller.run()
+    for path, chunks in texts.items():
+        target = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + ".txt")
+        with tracing.span("write", provider="gemini", model=model, path=target):
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(" ".join(chunks[index] for index in sorted(chunks)))
+
+
+def run_benchmark(name, paths, audio_seconds, output_dir, translate=False, model=None):
+    provider, mode = name.split("/")
+    model = model or DEFAULT_MODELS[(provider, translate)]
+    usage, error = Usage(), None
+    # A fresh output directory, so no journal or manifest from an earlier run is resumed
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as scratch, isolated(scratch), \
+            tracing.capture() as metrics:
+        start = time.perf_counter()
+        try:
+            if name == "gemini/batch":
+                bench_gemini_batch(paths, model, translate, usage, output_dir)
+            else:
+                bench_pipeline(provider, mode, paths, model, translate, usage, output_dir)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"{name} stopped: {error}")
+            usage.error(len(paths))
+        wall = time.perf_counter() - start
+    # "file" spans wrap the whole per-file run, so they are not a stage of their own
+    totals = {stage: values for stage, values in metrics.totals().items() if stage != "file"}
+    return RunResult(
+        provider=provider,
+        mode=mode,
+        model=model,
+        translate=translate,
+        files=len(paths),
+        audio_seconds=audio_seconds,
+        wall_seconds=wall,
+        stages={stage: round(seconds, 3) for stage, (_, seconds) in totals.items()},
+        stage_calls={stage: count for stage, (count, _) in totals.items()},
+        input_tokens=int(metrics.counter("stt_input_tokens_total")) + usage.input_tokens,
+        output_tokens=int(metrics.counter("stt_output_tokens_total")) + usage.output_tokens,
+        errors=usage.errors,
+        request_errors=int(metrics.counter("stt_span_errors_total", "request")),
+        error=error,
+    )
+
+
+CSV_STAGES = ("extract", "split", "encode", "upload", "request", "poll", "download", "write")
+
+
+def write_report(results, report_path, audio_set):
+    """Write the JSON report and a CSV summary next to it."""
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "audio_set": audio_set,
+        "runs": [result.as_dict() for result in results],
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    csv_path = os.path.splitext(report_path)[0] + ".csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["provider", "mode", "model", "translate", "files", "audio_s", "wall_s", "rtf",
+                         "audio_h_per_h", *(f"{stage}_s" for stage in CSV_STAGES),
+                         "input_tokens", "output_tokens", "errors", "request_errors", "error"])
+        for result in results:
+            writer.writerow([result.provider, result.mode, result.model, result.translate, result.files,
+                             round(result.audio_seconds, 1), round(result.wall_seconds, 2), round(result.rtf, 4),
+                             round(result.audio_hours_per_hour, 2),
+                             *(result.stages.get(stage, 0.0) for stage in CSV_STAGES),
+                             result.input_tokens, result.output_tokens, result.errors, result.request_errors,
+                             result.error or ""])
+    return report_path, csv_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of each provider/mode over a fixed audio set.")
+    parser.add_argument("inputs", nargs="+", help="Audio files or directories (the benchmark set)")
+    parser.add_argument("--runs", nargs="+", default=list(DEFAULT_RUNS), choices=RUNS)
+    parser.add_argument("--translate", action="store_true", help="Benchmark translation instead of transcription")
+    parser.add_argument("--repeat", type=int, default=1, help="Run each provider/mode this many times")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="JSON report path (a .csv is written alongside)")
+    parser.add_argument("--output-dir", default=os.path.join("output", "benchmarks", "outputs"))
+    parser.add_argument("--mock", action="store_true", help="Run against the offline stt_translate.mock clients")
+    args = parser.parse_args(argv)
+    if args.mock:
+        os.environ["STT_MOCK"] = "1"
+
+    paths = collect_inputs(args.inputs)
+    durations = probe_durations(paths)
+    audio_seconds = sum(durations.values())
+    print(f"Benchmark set: {len(paths)} files, {audio_seconds / 60:.1f} min of audio")
+
+    results = []
+    try:
+        for name in args.runs:
+            for attempt in range(args.repeat):
+                output_dir = os.path.join(args.output_dir, name.replace("/", "_"), str(attempt))
+                result = run_benchmark(name, paths, audio_seconds, output_dir, translate=args.translate)
+                results.append(result)
+                stages = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in result.stages.items())
+                print(f"{name} #{attempt + 1}: {result.wall_seconds:.1f}s wall, RTF {result.rtf:.3f}, "
+                      f"{result.audio_hours_per_hour:.1f} audio h/h, {result.errors} errors, "
+                      f"{result.request_errors} failed requests ({stages})")
+    finally:
+        clients.close()
+        if results:
+            audio_set = [{"path": path, "seconds": durations[path]} for path in paths]
+            report_path, csv_path = write_report(results, args.report, audio_set)
+            print(f"Report saved at:\n{report_path}\n{csv_path}")
+
+
+if __name__ == "__main__":
+    main()
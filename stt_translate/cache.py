@@ -0,0 +1,128 @@
+"""Persistent, content-addressed cache for transcription and translation results.
+
+Entries are keyed by the audio content hash, the chunk offsets (if any), the
+provider, the model and a hash of the prompt, so a rerun only pays for calls
+whose inputs actually changed. The cache is a single SQLite file with a size
+cap; the least recently used entries are evicted first.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join("output", "cache", "results.sqlite")
+DEFAULT_MAX_MB = 512
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def text_digest(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of text results, safe to share between threads."""
+
+    def __init__(self, path=None, max_bytes=None):
+        # STT_CACHE_PATH / STT_CACHE_MAX_MB override the defaults (read late so .env applies)
+        path = path or os.getenv("STT_CACHE_PATH", DEFAULT_CACHE_PATH)
+        if max_bytes is None:
+            max_bytes = int(os.getenv("STT_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024
+        self.path = path
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                provider TEXT,
+                model TEXT,
+                audio_hash TEXT,
+                chunk_start REAL,
+                chunk_end REAL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._conn.commit()
+        # Running byte total, so a put does not have to re-sum the table
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    @staticmethod
+    def make_key(audio_hash, provider, model, prompt="", start=None, end=None):
+        """Cache key for one whole-file (no offsets) or per-chunk result."""
+        parts = {
+            "audio": audio_hash,
+            "provider": provider,
+            "model": model,
+            "prompt": text_digest(prompt),
+            "start": None if start is None else round(start, 3),
+            "end": None if end is None else round(end, 3),
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key, value, provider=None, model=None, audio_hash=None, start=None, end=None):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            # Storing it would mean evicting everything else and then the value itself
+            return
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, value, size, provider, model, audio_hash, start, end, now, now),
+            )
+            self._total += size - (row[0] if row else 0)
+            self._evict(key)
+            self._conn.commit()
+
+    def _evict(self, keep, batch=64):
+        """Drop least recently used rows (never ``keep``, the row just written) until under the cap."""
+        while self._total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM results WHERE key != ? ORDER BY last_used LIMIT ?", (keep, batch)
+            ).fetchall()
+            if not rows:
+                break
+            stale = []
+            for key, size in rows:
+                if self._total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                self._total -= size
+            self._conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,199 @@
+"""Stream audio chunks out of ffmpeg without touching the disk.
+
+ffmpeg decodes the source once into 16 kHz mono PCM on a pipe. Each chunk is
+wrapped as an in-memory WAV file as soon as enough samples have arrived, so
+the first chunk can be sent while ffmpeg is still working through the rest.
+``stream_chunks`` cuts blindly every N seconds; ``stream_speech_chunks`` cuts
+at pauses and drops silence.
+"""
+import io
+import json
+import os
+import subprocess
+import wave
+from dataclasses import asdict, dataclass
+
+from stt_translate.segmenter import SilenceSegmenter
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # bytes per sample, 16-bit PCM
+
+
+@dataclass
+class AudioChunk:
+    index: int
+    start: float  # seconds from the start of the source
+    end: float
+    data: bytes  # a complete WAV file
+    filename: str
+    mime_type: str = "audio/wav"
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def as_upload(self):
+        """(filename, bytes, mime type) tuple accepted as ``file=`` by the SDKs."""
+        return (self.filename, self.data, self.mime_type)
+
+
+@dataclass
+class ChunkFailure:
+    """A chunk that still failed after retries, kept so the output shows the gap."""
+
+    index: int
+    start: float
+    end: float
+    filename: str
+    error: str
+
+    @classmethod
+    def from_error(cls, chunk, error):
+        return cls(chunk.index, chunk.start, chunk.end, chunk.filename, f"{type(error).__name__}: {error}")
+
+    def placeholder(self):
+        return f"[untranscribed {self.start:.1f}s-{self.end:.1f}s]"
+
+
+def write_failures(failures, path):
+    """Save failed chunks as JSON next to an output file, e.g. ``<output>.failed.json``."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([asdict(failure) for failure in sorted(failures, key=lambda f: f.index)], f, indent=2)
+
+
+def pcm_command(source, sample_rate=SAMPLE_RATE, realtime=False, follow=False):
+    """ffmpeg command decoding ``source`` to raw mono s16le PCM on stdout.
+
+    ``source`` may be ``"-"`` for stdin. ``realtime`` reads the input at its
+    native rate (replaying a file as if it were live); ``follow`` keeps
+    reading a file that is still being written.
+    """
+    command = ["ffmpeg"]
+    if source != "-":
+        command.append("-nostdin")
+    command += ["-loglevel", "error"]
+    if realtime:
+        command.append("-re")
+    if source == "-":
+        source = "pipe:0"
+    elif follow:
+        command += ["-follow", "1"]
+        source = "file:" + source
+    return command + [
+        "-i", source,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-f", "s16le",
+        "pipe:1",
+    ]
+
+
+def open_pcm_stream(source, sample_rate=SAMPLE_RATE):
+    """Start ffmpeg decoding ``source`` to raw mono s16le PCM on stdout."""
+    return subprocess.Popen(pcm_command(source, sample_rate), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def read_exact(stream, size):
+    """Read up to ``size`` bytes, only returning short at end of stream."""
+    buffer = bytearray()
+    while len(buffer) < size:
+        block = stream.read(size - len(buffer))
+        if not block:
+            break
+        buffer.extend(block)
+    return bytes(buffer)
+
+
+def pcm_to_wav(pcm, sample_rate=SAMPLE_RATE):
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return out.getvalue()
+
+
+def close_pcm_stream(process, source):
+    """Reap ffmpeg, raising if it exited with an error."""
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+        return
+    stderr = process.stderr.read().decode("utf-8", errors="replace")
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed on '{source}' (code {process.returncode}): {stderr.strip()}")
+
+
+def iter_pcm(audio_path, block_bytes, sample_rate=SAMPLE_RATE):
+    """Yield raw PCM blocks of ``block_bytes`` (the last may be shorter)."""
+    process = open_pcm_stream(audio_path, sample_rate=sample_rate)
+    try:
+        while True:
+            pcm = read_exact(process.stdout, block_bytes)
+            pcm = pcm[: len(pcm) - len(pcm) % SAMPLE_WIDTH]
+            if not pcm:
+                break
+            yield pcm
+        process.wait()
+    finally:
+        process.stdout.close()
+        close_pcm_stream(process, audio_path)
+
+
+def stream_chunks(audio_path, chunk_duration=29, sample_rate=SAMPLE_RATE, overlap=0.0):
+    """Yield ``AudioChunk``s of at most ``chunk_duration`` seconds, in order.
+
+    With ``overlap`` seconds, every chunk after the first starts with the
+    last ``overlap`` seconds of the previous one, so a word cut at one
+    boundary is whole in the neighbouring chunk. ``stt_translate.stitch``
+    removes the duplicated words afterwards.
+    """
+    if not 0 <= overlap < chunk_duration:
+        raise ValueError("overlap must be at least 0 and shorter than chunk_duration")
+    base_name = os.path.splitext(os.path.basename(audio_path))[0]
+    bytes_per_second = sample_rate * SAMPLE_WIDTH
+    overlap_bytes = int(overlap * sample_rate) * SAMPLE_WIDTH
+    step_bytes = int(chunk_duration * sample_rate) * SAMPLE_WIDTH - overlap_bytes
+
+    offset = 0
+    tail = b""
+    for index, pcm in enumerate(iter_pcm(audio_path, step_bytes, sample_rate)):
+        data = tail + pcm
+        start = (offset - len(tail)) / bytes_per_second
+        offset += len(pcm)
+        yield AudioChunk(
+            index=index,
+            start=start,
+            end=offset / bytes_per_second,
+            data=pcm_to_wav(data, sample_rate),
+            filename=f"{base_name}_{index:03d}.wav",
+        )
+        tail = data[len(data) - overlap_bytes:] if overlap_bytes else b""
+
+
+def stream_speech_chunks(audio_path, segmenter=None, sample_rate=SAMPLE_RATE):
+    """Yield speech-only ``AudioChunk``s cut at pauses by a ``SilenceSegmenter``.
+
+    Pass your own ``segmenter`` to tune it or to read ``segmenter.stats``
+    (audio seconds removed) once the generator is exhausted.
+    """
+    if segmenter is None:
+        segmenter = SilenceSegmenter(sample_rate=sample_rate)
+    base_name = os.path.splitext(os.path.basename(audio_path))[0]
+    block_bytes = sample_rate * SAMPLE_WIDTH  # one second per read
+
+    def segments():
+        for pcm in iter_pcm(audio_path, block_bytes, sample_rate):
+            yield from segmenter.feed(pcm)
+        yield from segmenter.flush()
+
+    for index, (start, end, samples) in enumerate(segments()):
+        yield AudioChunk(
+            index=index,
+            start=start,
+            end=end,
+            data=pcm_to_wav(samples.astype("<i2").tobytes(), sample_rate),
+            filename=f"{base_name}_{index:03d}.wav",
+        )
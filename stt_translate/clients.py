@@ -0,0 +1,126 @@
+"""Process-wide provider clients, built once and imported lazily.
+
+Scripts and the ``python -m stt_translate`` entry point ask this module for a
+client instead of reading ``.env`` and constructing their own. The provider
+SDKs (``sarvamai``, ``google.genai``) are only imported when a client for
+that provider is first requested, so a Sarvam run never pays for loading the
+Gemini SDK and vice versa. Every Sarvam client shares one keep-alive
+``httpx.Client``; the Gemini client keeps its own connection pool and is
+reused for every file in the process. With ``STT_MOCK=1`` the clients come
+from ``stt_translate.mock`` instead and no SDK or API key is needed.
+"""
+import os
+import threading
+
+# Connection pool for the shared Sarvam HTTP client
+MAX_CONNECTIONS = int(os.getenv("STT_HTTP_MAX_CONNECTIONS", "32"))
+KEEPALIVE_EXPIRY = 60.0
+HTTP_TIMEOUT = 120.0
+
+_lock = threading.Lock()
+_clients = {}
+_env_loaded = False
+
+
+def load_env():
+    """Load ``.env`` into the environment once per process."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _env_loaded = True
+
+
+def api_keys(name):
+    """All comma-separated values of the ``name`` environment variable.
+
+    Raises ``ValueError`` if it is unset or empty, like the scripts always did.
+    """
+    load_env()
+    keys = [key.strip() for key in (os.getenv(name) or "").split(",") if key.strip()]
+    if not keys:
+        raise ValueError(f"{name} not found. Please set it in your .env file.")
+    return keys
+
+
+def _mock_keys(name):
+    load_env()
+    return [key.strip() for key in (os.getenv(name) or "mock-key").split(",") if key.strip()]
+
+
+def api_key(name):
+    from stt_translate import mock
+
+    load_env()
+    return _mock_keys(name)[0] if mock.enabled() else api_keys(name)[0]
+
+
+def _pooled(name, factory):
+    load_env()
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            client = factory()
+            _clients[name] = client
+        return client
+
+
+def http_client():
+    """The keep-alive ``httpx.Client`` shared by the Sarvam clients."""
+
+    def build():
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+        return httpx.Client(limits=limits, timeout=HTTP_TIMEOUT)
+
+    return _pooled("http", build)
+
+
+def sarvam_clients():
+    """One ``SarvamAI`` client per key in ``SARVAM_API_KEY``, in key order."""
+
+    def build():
+        from stt_translate import mock
+
+        if mock.enabled():
+            backend, jobs = mock.Backend(mock.MockConfig.from_env()), {}
+            return [mock.MockSarvam(key, backend=backend, jobs=jobs) for key in _mock_keys("SARVAM_API_KEY")]
+        from sarvamai import SarvamAI
+
+        return [SarvamAI(api_subscription_key=key, httpx_client=http_client())
+                for key in api_keys("SARVAM_API_KEY")]
+
+    return _pooled("sarvam", build)
+
+
+def sarvam_client():
+    """The client for the first Sarvam key (batch jobs only need one)."""
+    return sarvam_clients()[0]
+
+
+def gemini_client():
+    def build():
+        from stt_translate import mock
+
+        if mock.enabled():
+            return mock.MockGemini(_mock_keys("GEMINI_API_KEY")[0])
+        from google import genai
+
+        return genai.Client(api_key=api_key("GEMINI_API_KEY"))
+
+    return _pooled("gemini", build)
+
+
+def close():
+    """Close pooled connections; later calls build fresh clients."""
+    with _lock:
+        http = _clients.pop("http", None)
+        _clients.clear()
+    if http is not None:
+        http.close()
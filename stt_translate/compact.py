@@ -0,0 +1,164 @@
+"""Shrink audio to what the speech models actually use before sending it.
+
+Both providers hear 16 kHz mono, so a stereo 44.1 kHz or 320 kbps track
+mostly costs upload bandwidth and inline payload. ``compact_file`` downmixes,
+resamples and re-encodes a whole file for Gemini uploads and inline requests.
+It keeps the result under ``output/cache/compact``, keyed by the source
+digest and the encoding, so reruns and other stages reuse it. ``compact_chunk``
+does the same in memory for the 16 kHz WAV chunks sent to Sarvam.
+
+An ``Encoding`` is written ``codec[:bitrate]``. For example ``opus:32k``
+(lossy, several-fold smaller), ``flac`` (lossless, about half of PCM) or
+``off``. Gemini uploads read ``STT_UPLOAD_CODEC`` (default ``opus:32k``) and
+Sarvam chunks read ``STT_CHUNK_CODEC`` (default ``flac``). A re-encode that
+comes out larger than its source is dropped and the source is sent instead.
+"""
+import mimetypes
+import os
+import subprocess
+import threading
+from dataclasses import dataclass, replace
+
+from stt_translate import tracing
+from stt_translate.cache import file_digest
+from stt_translate.chunking import SAMPLE_RATE
+
+DEFAULT_COMPACT_DIR = os.path.join("output", "cache", "compact")
+DEFAULT_UPLOAD_CODEC = "opus:32k"
+DEFAULT_CHUNK_CODEC = "flac"
+
+# codec name -> (ffmpeg encoder, container format, MIME type, file suffix, lossy)
+CODECS = {
+    "opus": ("libopus", "ogg", "audio/ogg", ".ogg", True),
+    "flac": ("flac", "flac", "audio/flac", ".flac", False),
+    "mp3": ("libmp3lame", "mp3", "audio/mpeg", ".mp3", True),
+}
+
+
+@dataclass(frozen=True)
+class Encoding:
+    codec: str = "opus"
+    bitrate: str = "32k"  # ignored by lossless codecs
+    sample_rate: int = SAMPLE_RATE
+
+    @classmethod
+    def parse(cls, spec):
+        """``Encoding`` for ``"codec[:bitrate]"``, or None for ``"off"``/empty."""
+        spec = (spec or "").strip().lower()
+        if spec in ("", "off", "none", "wav"):
+            return None
+        codec, _, bitrate = spec.partition(":")
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}'; choose from {sorted(CODECS)} or 'off'")
+        return cls(codec, bitrate or cls.bitrate)
+
+    @property
+    def lossy(self):
+        return CODECS[self.codec][4]
+
+    @property
+    def mime_type(self):
+        return CODECS[self.codec][2]
+
+    @property
+    def suffix(self):
+        return CODECS[self.codec][3]
+
+    @property
+    def tag(self):
+        """Short label used in cache file names and registry keys."""
+        return f"{self.codec}-{self.bitrate}" if self.lossy else self.codec
+
+    def ffmpeg_args(self):
+        encoder, container = CODECS[self.codec][:2]
+        args = ["-vn", "-ac", "1", "-ar", str(self.sample_rate), "-c:a", encoder]
+        if self.lossy:
+            args += ["-b:a", self.bitrate]
+        if self.codec == "opus":
+            args += ["-application", "voip"]
+        return args + ["-f", container]
+
+
+def upload_encoding(codec=None):
+    """Encoding for whole-file uploads/inline audio: ``codec``, else ``STT_UPLOAD_CODEC``."""
+    return Encoding.parse(codec or os.getenv("STT_UPLOAD_CODEC", DEFAULT_UPLOAD_CODEC))
+
+
+def chunk_encoding(codec=None):
+    """Encoding for Sarvam chunks: ``codec``, else ``STT_CHUNK_CODEC``."""
+    return Encoding.parse(codec or os.getenv("STT_CHUNK_CODEC", DEFAULT_CHUNK_CODEC))
+
+
+class CompactStats:
+    """Bytes before/after compaction, summed over a run (thread-safe)."""
+
+    def __init__(self):
+        self.items = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def add(self, bytes_in, bytes_out):
+        with self._lock:
+            self.items += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def summary(self):
+        saved = self.bytes_in - self.bytes_out
+        percent = 100 * saved / self.bytes_in if self.bytes_in else 0.0
+        return (f"compacted {self.items} items: {self.bytes_in / 1e6:.2f} MB -> {self.bytes_out / 1e6:.2f} MB "
+                f"({saved / 1e6:.2f} MB, {percent:.0f}% saved)")
+
+
+def _ffmpeg(args, source, data=None):
+    command = ["ffmpeg", "-nostdin" if data is None else "-hide_banner", "-loglevel", "error"] + args
+    result = subprocess.run(command, input=data, capture_output=True)
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed to compact '{source}' (code {result.returncode}): {message}")
+    return result.stdout
+
+
+def source_mime_type(path):
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def compact_file(path, encoding, directory=None, stats=None):
+    """(path to send, MIME type) for ``path`` re-encoded with ``encoding``.
+
+    Returns ``path`` itself when ``encoding`` is None or the re-encode is not smaller.
+    """
+    if encoding is None:
+        return path, source_mime_type(path)
+    directory = directory or os.getenv("STT_COMPACT_DIR", DEFAULT_COMPACT_DIR)
+    target = os.path.join(directory, f"{file_digest(path)[:32]}_{encoding.tag}{encoding.suffix}")
+    if not os.path.exists(target):
+        os.makedirs(directory, exist_ok=True)
+        partial = target + ".partial"
+        with tracing.span("encode", path=path, codec=encoding.tag, bytes=os.path.getsize(path)):
+            _ffmpeg(["-y", "-i", path] + encoding.ffmpeg_args() + [partial], path)
+        os.replace(partial, target)
+    size_in, size_out = os.path.getsize(path), os.path.getsize(target)
+    if size_out >= size_in:
+        print(f"{path}: {encoding.tag} would not be smaller ({size_in} -> {size_out} bytes), sending as is")
+        return path, source_mime_type(path)
+    if stats is not None:
+        stats.add(size_in, size_out)
+    print(f"{path}: {size_in / 1e6:.2f} MB -> {size_out / 1e6:.2f} MB as {encoding.tag} "
+          f"({100 * (size_in - size_out) / size_in:.0f}% saved)")
+    return target, encoding.mime_type
+
+
+def compact_chunk(chunk, encoding, stats=None):
+    """``chunk`` with its WAV data re-encoded in memory (unchanged if ``encoding`` is None)."""
+    if encoding is None:
+        return chunk
+    with tracing.span("encode", chunk=chunk.index, codec=encoding.tag, bytes=len(chunk.data)):
+        data = _ffmpeg(["-i", "pipe:0"] + encoding.ffmpeg_args() + ["pipe:1"], chunk.filename, data=chunk.data)
+    if len(data) >= len(chunk.data):
+        return chunk
+    if stats is not None:
+        stats.add(len(chunk.data), len(data))
+    return replace(chunk, data=data, filename=os.path.splitext(chunk.filename)[0] + encoding.suffix,
+                   mime_type=encoding.mime_type)
@@ -0,0 +1,264 @@
+"""Bounded-concurrency fan-out for per-chunk API calls.
+
+``map_ordered`` keeps a fixed number of calls in flight. Pass a ``RetryPolicy``
+to retry throttled (429), server (5xx) and network errors with jittered
+exponential backoff that honours ``Retry-After``. Pair it with an
+``AdaptiveLimiter`` to halve a key's concurrency on 429s and grow it again
+while calls succeed (AIMD). ``AsyncAdaptiveLimiter`` does the same for
+coroutines on one event loop.
+"""
+import asyncio
+import contextvars
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+
+
+class KeyedLimiter:
+    """Caps how many calls may be in flight at once for each API key."""
+
+    def __init__(self, per_key_limit):
+        if per_key_limit < 1:
+            raise ValueError("per_key_limit must be at least 1")
+        self.per_key_limit = per_key_limit
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, key):
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_key_limit)
+                self._semaphores[key] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, key):
+        semaphore = self._semaphore(key)
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def on_success(self, key):
+        pass
+
+    def on_throttle(self, key):
+        pass
+
+
+class AdaptiveLimiter:
+    """Per-key concurrency limit adjusted by AIMD.
+
+    Each key starts at ``initial`` slots. Every success adds ``1 / limit``
+    (about one slot per round of calls), up to ``max_per_key``. A 429
+    multiplies the limit by ``decrease``, at most once per ``cooldown``
+    seconds so one burst of rejections counts as one signal.
+    """
+
+    def __init__(self, max_per_key, initial=None, min_per_key=1, decrease=0.5, cooldown=1.0):
+        if max_per_key < 1:
+            raise ValueError("max_per_key must be at least 1")
+        self.max_per_key = max_per_key
+        self.min_per_key = min_per_key
+        self.initial = initial or max(min_per_key, max_per_key // 2)
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._cond = threading.Condition()
+        self._limits = {}
+        self._in_flight = {}
+        self._last_decrease = {}
+
+    def limit(self, key):
+        return self._limits.get(key, self.initial)
+
+    @contextmanager
+    def slot(self, key):
+        with self._cond:
+            while self._in_flight.get(key, 0) >= int(self.limit(key)):
+                self._cond.wait()
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight[key] -= 1
+                self._cond.notify_all()
+
+    def on_success(self, key):
+        with self._cond:
+            limit = self.limit(key)
+            self._limits[key] = min(self.max_per_key, limit + 1 / limit)
+            self._cond.notify_all()
+
+    def on_throttle(self, key):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease.get(key, float("-inf")) < self.cooldown:
+                return
+            self._last_decrease[key] = now
+            self._limits[key] = max(self.min_per_key, self.limit(key) * self.decrease)
+
+
+class AsyncAdaptiveLimiter(AdaptiveLimiter):
+    """``AdaptiveLimiter`` whose ``slot`` is an async context manager for one event loop.
+
+    The limits carry over between event loops (e.g. successive ``asyncio.run`` calls).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop = None
+        self._waiters = None
+
+    def _condition(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._waiters = loop, asyncio.Condition()
+            self._in_flight.clear()
+        return self._waiters
+
+    @asynccontextmanager
+    async def slot(self, key):
+        waiters = self._condition()
+        async with waiters:
+            await waiters.wait_for(lambda: self._in_flight.get(key, 0) < int(self.limit(key)))
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            async with waiters:
+                self._in_flight[key] -= 1
+                waiters.notify_all()
+
+
+def status_code(error):
+    """HTTP status of an SDK or httpx error, if it carries one."""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def retry_after(error):
+    """Seconds from the error's ``Retry-After`` header (delta or HTTP date), if any."""
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def is_retryable(error):
+    """Throttling, server errors, timeouts and dropped connections are worth retrying."""
+    code = status_code(error)
+    if code is not None:
+        return code in (408, 429) or code >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    import httpx
+
+    return isinstance(error, httpx.TransportError)
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 5  # total tries, including the first
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def delay(self, attempt, error):
+        """Wait before retry number ``attempt`` (0-based): Retry-After, else full-jitter backoff."""
+        hinted = retry_after(error)
+        if hinted is not None:
+            return min(hinted, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def call_with_retry(fn, item, policy, limiter=None, key=None, sleep=time.sleep):
+    """Call ``fn(item)`` under ``limiter``'s slot for ``key``, retrying per ``policy``.
+
+    The slot is released while waiting, so a backing-off call does not hold
+    capacity other calls could use.
+    """
+    for attempt in range(policy.attempts):
+        try:
+            if limiter is None:
+                result = fn(item)
+            else:
+                with limiter.slot(key):
+                    result = fn(item)
+        except Exception as e:
+            if attempt == policy.attempts - 1 or not is_retryable(e):
+                raise
+            if limiter is not None and status_code(e) == 429:
+                limiter.on_throttle(key)
+            delay = policy.delay(attempt, e)
+            print(f"Retrying after {type(e).__name__} ({status_code(e) or 'no status'}) in {delay:.1f}s "
+                  f"(attempt {attempt + 2}/{policy.attempts})")
+            sleep(delay)
+            continue
+        if limiter is not None:
+            limiter.on_success(key)
+        return result
+
+
+def map_ordered(fn, items, max_workers=8, per_key_limit=None, key=None, limiter=None, retry=None, on_error=None):
+    """Call ``fn(item)`` concurrently and yield the results in input order.
+
+    ``items`` is consumed lazily, so a generator that is still cutting chunks
+    keeps producing while earlier chunks are in flight. At most ``max_workers``
+    calls are pending at any time. When ``key`` is given, ``key(item)`` names
+    the API key the call is billed to and no key has more than
+    ``per_key_limit`` calls in flight; pass a shared ``limiter`` instead to
+    enforce the limit across several ``map_ordered`` runs.
+
+    With a ``retry`` policy, failed calls are retried with backoff. If
+    ``on_error`` is given, a call that still fails yields
+    ``on_error(item, error)`` instead of raising.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    if limiter is None and key is not None:
+        limiter = KeyedLimiter(per_key_limit or max_workers)
+    policy = retry or RetryPolicy(attempts=1)
+
+    def call(item):
+        try:
+            return call_with_retry(fn, item, policy, limiter, key(item) if key is not None else None)
+        except Exception as e:
+            if on_error is None:
+                raise
+            return on_error(item, e)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    try:
+        for item in items:
+            # Workers run in the caller's context, so tracing spans nest under the caller's span
+            pending.append(executor.submit(contextvars.copy_context().run, call, item))
+            if len(pending) >= max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
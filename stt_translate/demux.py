@@ -0,0 +1,106 @@
+"""Pull the audio track out of video files without decoding anything.
+
+``extract_audio`` stream-copies the first audio track of an MP4/MKV/WebM/MOV
+into an audio-only file (``-map 0:a:0 -c:a copy``). The video is never
+decoded, so a long video takes about as long as copying its audio bytes.
+The container follows the codec, so the result is an ordinary audio file
+that the chunker, the compactor and both APIs accept. Extracted files land
+under ``output/cache/audio`` (``STT_AUDIO_DIR``). Each is named after its
+source and is reused while it is newer than the source.
+
+``iter_extracted`` runs one ffmpeg process per video across a CPU-sized
+worker pool and yields ``(source, audio)`` pairs in input order. The
+pipeline starts chunking the first file while later ones are still being
+extracted. Audio inputs pass straight through. A video that cannot be
+extracted (corrupt, or without an audio track) is reported and skipped, so
+the rest of the corpus still runs.
+"""
+import json
+import os
+import subprocess
+
+from stt_translate import tracing
+from stt_translate.concurrency import map_ordered
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm", ".mov")
+DEFAULT_AUDIO_DIR = os.path.join("output", "cache", "audio")
+
+# audio codec -> container that takes it by stream copy and that the APIs accept
+CONTAINERS = {
+    "aac": ".m4a",
+    "alac": ".m4a",
+    "mp3": ".mp3",
+    "opus": ".ogg",
+    "vorbis": ".ogg",
+    "flac": ".flac",
+}
+FALLBACK_CONTAINER = ".mka"  # Matroska takes any codec; the compactor re-encodes it before upload
+
+
+def is_video(path):
+    return path.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def audio_codec(path):
+    """Codec name of the first audio track of ``path``; raises if there is none."""
+    command = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name",
+        "-of", "json",
+        path,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed on '{path}' (code {result.returncode}): {result.stderr.strip()}")
+    streams = json.loads(result.stdout or "{}").get("streams") or []
+    if not streams:
+        raise ValueError(f"'{path}' has no audio track")
+    return streams[0]["codec_name"]
+
+
+def extract_audio(path, directory=None, input_root=None):
+    """Path of an audio-only copy of video ``path`` (``path`` itself for audio files).
+
+    With ``input_root``, the copy mirrors ``path``'s place under it, so
+    same-named videos in different folders don't collide.
+    """
+    if not is_video(path):
+        return path
+    directory = directory or os.getenv("STT_AUDIO_DIR", DEFAULT_AUDIO_DIR)
+    relative = os.path.relpath(path, input_root) if input_root else os.path.basename(path)
+    codec = audio_codec(path)
+    target = os.path.join(directory, relative + CONTAINERS.get(codec, FALLBACK_CONTAINER))
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+        return target
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = target + ".partial" + os.path.splitext(target)[1]  # ffmpeg picks the muxer from the suffix
+    command = ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", path,
+               "-map", "0:a:0", "-vn", "-sn", "-dn", "-c:a", "copy", partial]
+    with tracing.span("extract", path=path, codec=codec) as span:
+        result = subprocess.run(command, capture_output=True, text=True)
+        span.set(bytes=os.path.getsize(partial) if result.returncode == 0 else None)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to extract audio from '{path}' (code {result.returncode}): "
+                           f"{result.stderr.strip()}")
+    os.replace(partial, target)
+    print(f"{path}: extracted {codec} audio ({os.path.getsize(path) / 1e6:.1f} MB -> "
+          f"{os.path.getsize(target) / 1e6:.1f} MB) to {target}")
+    return target
+
+
+def iter_extracted(paths, directory=None, input_root=None, max_workers=None):
+    """Yield ``(source, audio path)`` for ``paths`` in order, extracting videos in parallel.
+
+    Files whose extraction fails are printed and left out.
+    """
+    max_workers = max_workers or os.cpu_count() or 4
+
+    def skip(path, error):
+        print(f"{path}: skipped, no audio could be extracted: {error}")
+        return None
+
+    for pair in map_ordered(lambda path: (path, extract_audio(path, directory, input_root)), paths,
+                            max_workers=max_workers, on_error=skip):
+        if pair is not None:
+            yield pair
@@ -0,0 +1,185 @@
+"""Offline token, cost and time estimator for audio corpora and transcripts.
+
+Audio input tokens are computed from the ffprobe duration and the provider's
+tokens-per-second rate, so planning a corpus run needs no uploads. Output
+tokens are counted with tiktoken over whole output directories in a process
+pool. ``forecast`` combines both into a per provider/model cost and time
+estimate.
+
+Usage::
+
+    python -m stt_translate.estimate --audio data --outputs output/transcribed/gemini --corpus-hours 10000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".mp4", ".mkv", ".webm")
+TEXT_EXTENSIONS = (".txt", ".json")
+
+
+@dataclass
+class Rate:
+    provider: str
+    model: str
+    audio_tokens_per_second: float = 0.0  # 0 = billed per audio hour instead of per token
+    usd_per_million_input: float = 0.0
+    usd_per_million_output: float = 0.0
+    usd_per_audio_hour: float = 0.0
+    batch_discount: float = 0.0  # fraction taken off in batch mode
+    processing_rtf: float = 0.05  # wall seconds per audio second for one request stream
+
+
+# List prices as of October 2025; check the provider pricing pages before relying on them.
+# Gemini bills audio at 32 tokens per second. Sarvam bills Rs 30 per audio hour (~USD 0.34).
+# processing_rtf values are rough planning defaults; replace them with benchmark numbers.
+RATES = [
+    Rate("gemini", "gemini-2.5-pro", 32, 1.25, 10.00, batch_discount=0.5, processing_rtf=0.10),
+    Rate("gemini", "gemini-2.5-flash", 32, 1.00, 2.50, batch_discount=0.5, processing_rtf=0.05),
+    Rate("gemini", "gemini-2.5-flash-lite", 32, 0.30, 0.40, batch_discount=0.5, processing_rtf=0.03),
+    Rate("sarvam", "saarika:v2.5", usd_per_audio_hour=0.34, processing_rtf=0.10),
+    Rate("sarvam", "saaras:v2.5", usd_per_audio_hour=0.34, processing_rtf=0.10),
+]
+
+
+@dataclass
+class Forecast:
+    provider: str
+    model: str
+    audio_hours: float
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+    wall_hours: float
+
+
+def iter_files(paths, extensions):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(extensions):
+                        yield os.path.join(root, name)
+        elif path.lower().endswith(extensions):
+            yield path
+
+
+def probe_duration(path):
+    """Duration of a media file in seconds, read from the container by ffprobe."""
+    command = ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+               "-of", "default=noprint_wrappers=1:nokey=1", path]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed on '{path}': {result.stderr.strip()}")
+    return float(result.stdout.strip())
+
+
+def probe_durations(paths, max_workers=8):
+    """{path: seconds} for many files, probing several at once."""
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(paths, pool.map(probe_duration, paths)))
+
+
+def audio_input_tokens(seconds, rate):
+    return int(seconds * rate.audio_tokens_per_second)
+
+
+_encoding = None
+
+
+def _count_file_tokens(args):
+    path, encoding_name = args
+    global _encoding
+    if _encoding is None or _encoding.name != encoding_name:
+        import tiktoken
+
+        _encoding = tiktoken.get_encoding(encoding_name)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return path, len(_encoding.encode(f.read(), disallowed_special=()))
+
+
+def count_text_tokens(paths, encoding_name="cl100k_base", max_workers=None):
+    """{path: tokens} over every text file under ``paths``, tokenized in parallel.
+
+    cl100k_base (the GPT-4 encoding) is only an approximation of Gemini's
+    tokenizer, as in the original count_output_tokens script.
+    """
+    files = list(iter_files(paths, TEXT_EXTENSIONS))
+    if not files:
+        return {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return dict(pool.map(_count_file_tokens, [(path, encoding_name) for path in files], chunksize=16))
+
+
+def forecast(audio_seconds, output_tokens_per_audio_second, rates=RATES, batch=False, concurrency=1):
+    """Cost and wall-clock forecast for ``audio_seconds`` of audio on each provider/model."""
+    forecasts = []
+    for rate in rates:
+        input_tokens = audio_input_tokens(audio_seconds, rate)
+        output_tokens = int(audio_seconds * output_tokens_per_audio_second)
+        cost = (
+            input_tokens * rate.usd_per_million_input / 1e6
+            + output_tokens * rate.usd_per_million_output / 1e6
+            + audio_seconds / 3600 * rate.usd_per_audio_hour
+        )
+        if batch:
+            cost *= 1 - rate.batch_discount
+        forecasts.append(Forecast(
+            provider=rate.provider,
+            model=rate.model,
+            audio_hours=audio_seconds / 3600,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=round(cost, 2),
+            wall_hours=audio_seconds * rate.processing_rtf / concurrency / 3600,
+        ))
+    return forecasts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline token/cost/time forecast for an audio corpus.")
+    parser.add_argument("--audio", nargs="+", default=[], help="Audio/video files or directories to probe")
+    parser.add_argument("--outputs", nargs="+", default=[], help="Transcript files or directories to count")
+    parser.add_argument("--corpus-hours", type=float, help="Forecast this many audio hours instead of the probed total")
+    parser.add_argument("--output-tokens-per-second", type=float,
+                        help="Override the output token rate measured from --outputs")
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--batch", action="store_true", help="Apply batch-mode discounts")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel request streams")
+    parser.add_argument("--json", action="store_true", help="Print the forecast as JSON")
+    args = parser.parse_args(argv)
+
+    durations = probe_durations(iter_files(args.audio, AUDIO_EXTENSIONS)) if args.audio else {}
+    probed_seconds = sum(durations.values())
+    tokens = count_text_tokens(args.outputs, args.encoding) if args.outputs else {}
+    # Progress goes to stderr so --json output on stdout stays parseable
+    print(f"Probed {len(durations)} audio files: {probed_seconds / 3600:.2f} h", file=sys.stderr)
+    print(f"Counted {len(tokens)} output files: {sum(tokens.values())} tokens", file=sys.stderr)
+
+    rate = args.output_tokens_per_second
+    if rate is None:
+        # Outputs are assumed to be transcripts of the probed audio, one per file on average
+        per_file_seconds = probed_seconds / len(durations) if durations else 0
+        per_file_tokens = sum(tokens.values()) / len(tokens) if tokens else 0
+        rate = per_file_tokens / per_file_seconds if per_file_seconds else 0.0
+    audio_seconds = args.corpus_hours * 3600 if args.corpus_hours else probed_seconds
+
+    results = forecast(audio_seconds, rate, batch=args.batch, concurrency=args.concurrency)
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+        return
+    print(f"\nForecast for {audio_seconds / 3600:,.1f} audio hours at {rate:.2f} output tokens/s"
+          f"{' (batch)' if args.batch else ''}:")
+    print(f"{'provider':8} {'model':24} {'input tok':>14} {'output tok':>14} {'cost USD':>12} {'wall h':>10}")
+    for result in results:
+        print(f"{result.provider:8} {result.model:24} {result.input_tokens:>14,} {result.output_tokens:>14,} "
+              f"{result.cost_usd:>12,.2f} {result.wall_hours:>10,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Asyncio engine that keeps dozens of Gemini requests in flight from one process.
+
+``02_a1``/``02_a2`` and the ``gemini`` modes of ``pipeline.run`` make one
+blocking ``generate_content`` call at a time, so the process sits idle for
+the whole of every long call. ``AsyncGeminiEngine`` takes a queue of audio
+files or ``AudioChunk``s and runs it on the SDK's async client
+(``client.aio``):
+
+* ``generate_content`` calls share an AIMD window (``AsyncAdaptiveLimiter``),
+  all on one event loop thread. It starts at half of ``max_in_flight``, halves
+  on a 429 and grows back towards ``max_in_flight`` while calls succeed, so a
+  key's concurrency cap costs retries rather than failed items
+* audio is compacted and, when too large to inline, uploaded through the
+  shared ``UploadManager`` (so the upload registry still applies) in worker
+  threads. At most ``max_uploads`` run at once, and they overlap with the
+  requests of files that are already uploaded
+* every request has a ``timeout``. Timeouts, 429s and 5xx are retried
+  under the usual ``RetryPolicy``, and backoff waits do not hold a request slot
+* cancelling the run (Ctrl-C, ``task.cancel()``, or closing ``stream``
+  early) cancels every pending request and every upload not yet started
+
+Whole-file results go through the shared ``ResultCache`` with the same keys
+as ``pipeline``'s Gemini modes, so the sync and async paths reuse each
+other's answers.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+
+from stt_translate import tracing
+from stt_translate.cache import file_digest
+from stt_translate.chunking import AudioChunk
+from stt_translate.compact import compact_chunk, upload_encoding
+from stt_translate.concurrency import AsyncAdaptiveLimiter, RetryPolicy, is_retryable, status_code
+
+# Ceiling of the AIMD window; it starts at half this, within the mock's default of 8 per key
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_MAX_UPLOADS = 4
+DEFAULT_TIMEOUT = 600.0  # seconds per request; a 1-hour file takes a few minutes
+
+
+@dataclass
+class AsyncResult:
+    index: int  # position in the input queue
+    item: object  # the audio path or AudioChunk
+    text: str = ""
+    error: str = None
+    route: str = None  # "cache", "inline", "upload" or "reuse"
+    latency: float = 0.0  # seconds from the first request attempt to the response, retries included
+    input_tokens: int = None
+    output_tokens: int = None
+
+
+class AsyncGeminiEngine:
+    """Transcribes or translates a queue of files/chunks with one ``prompt`` on ``client.aio``."""
+
+    def __init__(self, client, model, prompt, uploads=None, cache=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 max_uploads=DEFAULT_MAX_UPLOADS, timeout=DEFAULT_TIMEOUT, retry=None, config=None):
+        self.client = client
+        self.model = model
+        self.prompt = prompt
+        if uploads is None:
+            from stt_translate.gemini_files import UploadManager
+
+            uploads = UploadManager(client)
+        self.uploads = uploads
+        self.cache = cache
+        self.max_in_flight = max_in_flight
+        self.limiter = AsyncAdaptiveLimiter(max_in_flight)
+        self.max_uploads = max_uploads
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.config = config
+
+    async def _part(self, item):
+        """(Part, route) for one path or chunk; blocking work runs in a thread."""
+        if isinstance(item, AudioChunk):
+            from google.genai import types
+
+            chunk = await asyncio.to_thread(compact_chunk, item, upload_encoding())
+            return types.Part.from_bytes(data=chunk.data, mime_type=chunk.mime_type), "inline"
+        return await asyncio.to_thread(self.uploads.part, item)
+
+    async def _generate(self, part):
+        for attempt in range(self.retry.attempts):
+            try:
+                async with self.limiter.slot(self.model):
+                    try:
+                        response = await asyncio.wait_for(
+                            self.client.aio.models.generate_content(model=self.model, contents=[self.prompt, part],
+                                                                    config=self.config),
+                            self.timeout,
+                        )
+                    except TimeoutError:
+                        raise TimeoutError(f"no response within {self.timeout:g}s") from None
+                self.limiter.on_success(self.model)
+                return response
+            except Exception as e:
+                if status_code(e) == 429:
+                    self.limiter.on_throttle(self.model)
+                if attempt == self.retry.attempts - 1 or not is_retryable(e):
+                    raise
+                delay = self.retry.delay(attempt, e)
+                print(f"Retrying after {type(e).__name__} ({status_code(e) or 'no status'}) in {delay:.1f}s "
+                      f"(attempt {attempt + 2}/{self.retry.attempts})")
+                await asyncio.sleep(delay)
+
+    async def transcribe(self, index, item, uploads):
+        """``AsyncResult`` for one queue item; errors are returned, cancellation propagates."""
+        result = AsyncResult(index, item)
+        name = item.filename if isinstance(item, AudioChunk) else item
+        cache_key = None
+        try:
+            if self.cache is not None and not isinstance(item, AudioChunk):
+                audio_hash = await asyncio.to_thread(file_digest, item)
+                cache_key = self.cache.make_key(audio_hash, "gemini", self.model, prompt=self.prompt)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    result.text, result.route = cached, "cache"
+                    return result
+            async with uploads:
+                part, result.route = await self._part(item)
+            started = time.perf_counter()
+            with tracing.span("request", provider="gemini", model=self.model, path=name) as span:
+                response = await self._generate(part)
+                usage = tracing.usage_attributes(response)
+                span.set(**usage)
+            result.latency = time.perf_counter() - started
+            result.text = (response.text or "").strip()
+            result.input_tokens, result.output_tokens = usage["input_tokens"], usage["output_tokens"]
+            if cache_key is not None and result.text:
+                self.cache.put(cache_key, result.text, provider="gemini", model=self.model, audio_hash=audio_hash)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            print(f"{name}: failed after retries: {result.error}")
+        return result
+
+    async def stream(self, items):
+        """Yield an ``AsyncResult`` per item as each finishes (completion order, not input order).
+
+        To stop early, iterate inside ``contextlib.aclosing(engine.stream(items))``
+        so the remaining work is cancelled when the loop exits.
+        """
+        items = list(items)
+        queue = asyncio.Queue()
+        for job in enumerate(items):
+            queue.put_nowait(job)
+        done = asyncio.Queue()
+        uploads = asyncio.Semaphore(self.max_uploads)
+
+        async def worker():
+            while not queue.empty():
+                index, item = queue.get_nowait()
+                await done.put(await self.transcribe(index, item, uploads))
+
+        # Extra workers prepare the next items' audio while every request slot is busy; the limiter
+        # keeps the actual requests within its current window
+        workers = [asyncio.create_task(worker())
+                   for _ in range(min(len(items), self.max_in_flight + self.max_uploads))]
+        try:
+            for _ in items:
+                yield await done.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def gather(self, items, on_result=None):
+        """All results in input order; ``on_result(result)`` is called as each one finishes."""
+        items = list(items)
+        results = [None] * len(items)
+        async for result in self.stream(items):
+            results[result.index] = result
+            if on_result is not None:
+                on_result(result)
+        return results
+
+    def run(self, items, on_result=None):
+        """Blocking ``gather`` on a fresh event loop."""
+        return asyncio.run(self.gather(items, on_result))
+
+
+def progress_printer(total):
+    """``on_result`` callback printing one line per finished item."""
+    finished = [0]
+
+    def show(result):
+        finished[0] += 1
+        name = result.item.filename if isinstance(result.item, AudioChunk) else os.path.basename(result.item)
+        status = f"failed ({result.error})" if result.error else f"{result.route}, {result.latency:.1f}s"
+        print(f"[{finished[0]}/{total}] {name}: {status}")
+
+    return show
@@ -0,0 +1,309 @@
+"""Streaming, sharded JSONL builder and result reader for the Gemini Batch API.
+
+Request lines are generated lazily for a whole corpus and written to JSONL
+shards that roll over at a request-count or byte limit. Each finished shard
+can be uploaded (and its batch job created) while the next one is still
+being written. Every shard has a ``.keys.jsonl`` sidecar mapping each
+request ``key`` back to its source file and chunk, and result files are
+parsed line by line as they are downloaded instead of being read whole.
+``GeminiBatchJob`` tracks a submitted shard on a ``BatchPoller``,
+resubmits only the keys that failed and deletes the uploaded shard once its
+results are collected. Shard uploads carry ``gemini_files.UPLOAD_TAG``, so
+``UploadManager.collect_garbage`` sweeps those left behind by a crashed run.
+"""
+import base64
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import httpx
+
+from stt_translate import tracing
+from stt_translate.chunking import stream_chunks
+from stt_translate.concurrency import map_ordered
+from stt_translate.gemini_files import UPLOAD_TAG
+
+# The Batch API accepts input files of up to 2 GB
+MAX_SHARD_BYTES = 1_900_000_000
+MAX_SHARD_REQUESTS = 10_000
+TERMINAL_STATES = ("JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED")
+DOWNLOAD_URL = "https://generativelanguage.googleapis.com/download/v1beta/{name}:download?alt=media"
+
+
+def make_key(source_index, chunk_index=0):
+    return f"{source_index:07d}-{chunk_index:05d}"
+
+
+@dataclass
+class BatchShard:
+    index: int
+    path: str
+    keymap_path: str
+    requests: int = 0
+    bytes: int = 0
+    file_name: str = None  # the shard's upload on the Files API, once submitted
+
+
+@dataclass
+class BatchResult:
+    key: str
+    source: str
+    chunk: int
+    start: float = None
+    end: float = None
+    text: str = ""
+    error: str = None
+    usage: dict = field(default_factory=dict)
+
+
+class ShardWriter:
+    """Writes request lines to numbered JSONL shards, rolling over at the limits."""
+
+    def __init__(self, output_dir, prefix="batch", max_requests=MAX_SHARD_REQUESTS, max_bytes=MAX_SHARD_BYTES):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self._shard = None
+        self._file = None
+        self._keymap = None
+        self._next_index = 0
+
+    def _open(self):
+        index = self._next_index
+        self._next_index += 1
+        path = os.path.join(self.output_dir, f"{self.prefix}_{index:05d}.jsonl")
+        self._shard = BatchShard(index=index, path=path, keymap_path=path[: -len(".jsonl")] + ".keys.jsonl")
+        self._file = open(path, "w", encoding="utf-8")
+        self._keymap = open(self._shard.keymap_path, "w", encoding="utf-8")
+
+    def write(self, key, request, meta):
+        """Add one request; returns the shard it closed, if this write rolled over."""
+        line = json.dumps({"key": key, "request": request}, ensure_ascii=False) + "\n"
+        size = len(line.encode("utf-8"))
+        finished = None
+        if self._shard is not None and (
+            self._shard.requests >= self.max_requests or self._shard.bytes + size > self.max_bytes
+        ):
+            finished = self.close()
+        if self._shard is None:
+            self._open()
+        self._file.write(line)
+        self._keymap.write(json.dumps({"key": key, **meta}, ensure_ascii=False) + "\n")
+        self._shard.requests += 1
+        self._shard.bytes += size
+        return finished
+
+    def close(self):
+        """Close the current shard and return it (None if nothing is open)."""
+        if self._shard is None:
+            return None
+        self._file.close()
+        self._keymap.close()
+        shard, self._shard = self._shard, None
+        return shard
+
+
+def write_shards(requests, output_dir, prefix="batch", max_requests=MAX_SHARD_REQUESTS, max_bytes=MAX_SHARD_BYTES):
+    """Consume ``(key, request, meta)`` tuples and yield each shard once it is complete."""
+    writer = ShardWriter(output_dir, prefix, max_requests, max_bytes)
+    for key, request, meta in requests:
+        finished = writer.write(key, request, meta)
+        if finished is not None:
+            yield finished
+    last = writer.close()
+    if last is not None:
+        yield last
+
+
+def _request(prompt, part):
+    return {"contents": [{"parts": [{"text": prompt}, part]}]}
+
+
+def iter_file_requests(audio_paths, prompt, upload, max_workers=1):
+    """One request per source file, referencing the audio through the Files API.
+
+    ``upload(path)`` must return an uploaded file with ``uri`` and
+    ``mime_type``; up to ``max_workers`` uploads run ahead of the writer.
+    """
+    audio_paths = list(audio_paths)
+    uploads = map_ordered(upload, audio_paths, max_workers=max_workers)
+    for source_index, (path, uploaded) in enumerate(zip(audio_paths, uploads)):
+        part = {"file_data": {"file_uri": uploaded.uri, "mime_type": uploaded.mime_type}}
+        yield make_key(source_index), _request(prompt, part), {"source": path, "chunk": 0}
+
+
+def iter_chunk_requests(audio_paths, prompt, chunk_duration=29):
+    """One request per chunk, with the chunk's WAV bytes inlined in the request."""
+    for source_index, path in enumerate(audio_paths):
+        for chunk in stream_chunks(path, chunk_duration=chunk_duration):
+            part = {"inline_data": {"mime_type": chunk.mime_type, "data": base64.b64encode(chunk.data).decode("ascii")}}
+            meta = {"source": path, "chunk": chunk.index, "start": chunk.start, "end": chunk.end}
+            yield make_key(source_index, chunk.index), _request(prompt, part), meta
+
+
+def submit_shard(client, model, shard, display_name="audio-batch"):
+    """Upload one shard and create its batch job; returns the job."""
+    with tracing.span("upload", provider="gemini", model=model, shard=shard.index, bytes=shard.bytes):
+        uploaded = client.files.upload(file=shard.path, config={
+            "mime_type": "jsonl", "display_name": f"{UPLOAD_TAG}batch-{display_name}-{shard.index:05d}"})
+    shard.file_name = uploaded.name
+    with tracing.span("request", provider="gemini", model=model, shard=shard.index, requests=shard.requests):
+        job = client.batches.create(
+            model=model,
+            src=uploaded.name,
+            config={"display_name": f"{display_name}-{shard.index:05d}"},
+        )
+    print(f"Shard {shard.index} ({shard.requests} requests, {shard.bytes / 1e6:.1f} MB) → job {job.name}")
+    return job
+
+
+def delete_shard_upload(client, shard):
+    """Delete a submitted shard's JSONL from the Files API (the garbage collector catches any misses)."""
+    if shard.file_name is None:
+        return
+    try:
+        client.files.delete(name=shard.file_name)
+    except Exception as e:
+        print(f"Deleting batch file {shard.file_name} failed: {e}")
+        return
+    shard.file_name = None
+
+
+def submit_shards(client, model, shards, max_workers=4, display_name="audio-batch"):
+    """Upload shards concurrently as they arrive and create one batch job per shard.
+
+    Returns a list of ``(shard, batch_job)`` in shard order.
+    """
+
+    def submit(shard):
+        return shard, submit_shard(client, model, shard, display_name)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(submit, shard) for shard in shards]
+        return [future.result() for future in futures]
+
+
+def retry_shard(shard, keys, retry_number):
+    """New shard holding only the request lines of ``keys`` from ``shard``, for resubmission."""
+    stem = os.path.splitext(shard.path)[0].split(".retry")[0]
+    path = f"{stem}.retry{retry_number}.jsonl"
+    retry = BatchShard(index=shard.index, path=path, keymap_path=path[: -len(".jsonl")] + ".keys.jsonl")
+    # Shards can be gigabytes of inline audio, so both files are copied line by line
+    with open(shard.path, encoding="utf-8") as source, open(retry.path, "w", encoding="utf-8") as target:
+        for line in source:
+            if json.loads(line)["key"] in keys:
+                target.write(line)
+                retry.requests += 1
+                retry.bytes += len(line.encode("utf-8"))
+    with open(shard.keymap_path, encoding="utf-8") as source, \
+            open(retry.keymap_path, "w", encoding="utf-8") as target:
+        target.writelines(line for line in source if json.loads(line)["key"] in keys)
+    return retry
+
+
+def load_keymap(path):
+    with open(path, encoding="utf-8") as f:
+        return {entry.pop("key"): entry for entry in map(json.loads, f)}
+
+
+def iter_result_lines(file_name, api_key, timeout=600.0):
+    """Stream a batch result file from the Files API one line at a time."""
+    # GEMINI_DOWNLOAD_URL points downloads elsewhere, e.g. at the stt_translate.mock result server
+    url = os.getenv("GEMINI_DOWNLOAD_URL", DOWNLOAD_URL).format(name=file_name)
+    with httpx.stream("GET", url, headers={"x-goog-api-key": api_key}, timeout=timeout) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line.strip():
+                yield line
+
+
+def parse_result_line(line, keymap):
+    """Turn one result line into a ``BatchResult`` mapped back to its source chunk."""
+    parsed = json.loads(line)
+    key = parsed.get("key", "")
+    meta = keymap.get(key, {"source": None, "chunk": None})
+    result = BatchResult(key=key, **meta)
+    if "error" in parsed:
+        result.error = json.dumps(parsed["error"])
+        return result
+    response = parsed.get("response", {})
+    result.usage = response.get("usageMetadata", {})
+    candidates = response.get("candidates", [])
+    if not candidates:
+        result.error = "no candidates returned"
+        return result
+    parts = candidates[0].get("content", {}).get("parts", [])
+    result.text = "".join(part.get("text", "") for part in parts).strip()
+    return result
+
+
+def iter_job_results(job, keymap, api_key):
+    """Yield parsed results of a finished batch job while its result file downloads."""
+    for line in iter_result_lines(job.dest.file_name, api_key):
+        yield parse_result_line(line, keymap)
+
+
+class GeminiBatchJob:
+    """``BatchPoller`` adapter for one Gemini batch job and the shard it was built from.
+
+    When the job finishes its results are streamed to ``on_result`` line by
+    line. Keys that came back with an error or no result at all, or every key of
+    a failed or expired job, are written to a retry shard and submitted again,
+    up to ``max_attempts`` submissions in total. ``on_result`` sees a failed
+    ``BatchResult`` only once its last attempt has failed.
+    """
+
+    provider = "gemini"
+
+    def __init__(self, client, model, shard, job, api_key, on_result, attempt=1, max_attempts=3,
+                 display_name="audio-batch"):
+        self.client = client
+        self.model = model
+        self.shard = shard
+        self.job = job
+        self.name = job.name
+        self.api_key = api_key
+        self.on_result = on_result
+        self.attempt = attempt
+        self.max_attempts = max_attempts
+        self.display_name = display_name
+
+    def poll(self):
+        self.job = self.client.batches.get(name=self.name)
+        return self.job.state.name
+
+    def finished(self, state):
+        return state in TERMINAL_STATES
+
+    def collect(self, state):
+        keymap = load_keymap(self.shard.keymap_path)
+        failed, ok = [], 0
+        if state == "JOB_STATE_SUCCEEDED":
+            with tracing.span("download", provider="gemini", model=self.model, job=self.name, shard=self.shard.index):
+                for result in iter_job_results(self.job, keymap, self.api_key):
+                    keymap.pop(result.key, None)
+                    if result.error:
+                        failed.append(result)
+                    else:
+                        ok += 1
+                        self.on_result(result)
+        failed.extend(BatchResult(key=key, error=f"no result ({state})", **meta) for key, meta in keymap.items())
+
+        retry = bool(failed) and state != "JOB_STATE_CANCELLED" and self.attempt < self.max_attempts
+        print(f"Job {self.name} (shard {self.shard.index}) {state}: {ok} ok, {len(failed)} failed"
+              + (", resubmitting the failed keys" if retry else ""))
+        if not retry:
+            for result in failed:
+                self.on_result(result)
+            delete_shard_upload(self.client, self.shard)
+            return []
+        # The retry shard is cut from the local copy, so this shard's upload is done with either way
+        shard = retry_shard(self.shard, {result.key for result in failed}, self.attempt)
+        job = submit_shard(self.client, self.model, shard, display_name=f"{self.display_name}-retry{self.attempt}")
+        delete_shard_upload(self.client, self.shard)
+        return [GeminiBatchJob(self.client, self.model, shard, job, self.api_key, self.on_result,
+                               attempt=self.attempt + 1, max_attempts=self.max_attempts,
+                               display_name=self.display_name)]
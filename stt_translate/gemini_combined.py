@@ -0,0 +1,104 @@
+"""Single-pass Gemini transcription + translation with structured JSON output.
+
+The audio is sent once and the model returns, per segment, the timestamps,
+the detected language, the native-script transcript and the English
+translation, constrained by a response schema. This replaces one
+transcription call plus one translation call (and their audio tokens) per
+file.
+"""
+import json
+from dataclasses import asdict, dataclass
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+PROMPT = (
+    "You are a professional multilingual transcription and translation assistant.\n"
+    "The speaker may use Hindi, Gujarati, or a mix of both.\n"
+    "Split the audio into consecutive segments at natural sentence or pause boundaries.\n"
+    "For each segment return:\n"
+    "- start and end as MM:SS (or HH:MM:SS) timestamps from the beginning of the audio,\n"
+    "- the language spoken in that segment,\n"
+    "- native_text: the exact transcription in the native script "
+    "(Devanagari for Hindi, Gujarati script for Gujarati), without transliterating or translating,\n"
+    "- english_text: a clear, natural English translation that preserves tone and meaning."
+)
+
+
+class Language(str, Enum):
+    HINDI = "Hindi"
+    GUJARATI = "Gujarati"
+    ENGLISH = "English"
+    OTHER = "Other"
+
+
+class SegmentSchema(BaseModel):
+    start: str = Field(description="Segment start, MM:SS or HH:MM:SS")
+    end: str = Field(description="Segment end, MM:SS or HH:MM:SS")
+    language: Language
+    native_text: str
+    english_text: str
+
+
+class TranscriptSchema(BaseModel):
+    segments: list[SegmentSchema]
+
+
+@dataclass
+class SegmentRecord:
+    start: float  # seconds
+    end: float
+    language: str
+    native_text: str
+    english_text: str
+
+
+def parse_timestamp(value):
+    """'HH:MM:SS', 'MM:SS' or plain seconds (optionally fractional) -> seconds."""
+    seconds = 0.0
+    for part in str(value).strip().split(":"):
+        seconds = seconds * 60 + float(part or 0)
+    return seconds
+
+
+def to_records(transcript, offset=0.0):
+    """Typed records from a parsed ``TranscriptSchema``; ``offset`` shifts chunk-relative times."""
+    return [
+        SegmentRecord(
+            start=offset + parse_timestamp(segment.start),
+            end=offset + parse_timestamp(segment.end),
+            language=segment.language.value,
+            native_text=segment.native_text.strip(),
+            english_text=segment.english_text.strip(),
+        )
+        for segment in transcript.segments
+    ]
+
+
+def generation_config():
+    return {"response_mime_type": "application/json", "response_schema": TranscriptSchema}
+
+
+def parse_response(response):
+    """``TranscriptSchema`` from a structured-output response."""
+    if isinstance(response.parsed, TranscriptSchema):
+        return response.parsed
+    return TranscriptSchema.model_validate_json(response.text or '{"segments": []}')
+
+
+def transcribe_and_translate(client, audio, model="gemini-2.5-flash", prompt=PROMPT, offset=0.0):
+    """Send ``audio`` (an uploaded file or Part) once; returns ``SegmentRecord``s."""
+    response = client.models.generate_content(
+        model=model,
+        contents=[prompt, audio],
+        config=generation_config(),
+    )
+    return to_records(parse_response(response), offset=offset)
+
+
+def records_to_json(records):
+    return json.dumps([asdict(record) for record in records], ensure_ascii=False, indent=2)
+
+
+def records_from_json(text):
+    return [SegmentRecord(**entry) for entry in json.loads(text)]
@@ -0,0 +1,246 @@
+"""Gemini Files API upload manager with a local reuse registry.
+
+One upload of an audio file can serve transcription, translation, token
+counting and batch requests until it expires (48 h on the Files API). The
+registry maps the file's content hash to the uploaded file's name, URI and
+expiry, so every script and stage reuses the same upload instead of sending
+the audio again. ``UploadManager.collect_garbage`` forgets expired entries and
+deletes orphaned uploads: files this manager made (tagged by display name)
+that no registry entry points to and that are old enough not to be mid-use.
+
+Audio is re-encoded by ``stt_translate.compact`` before upload
+(``STT_UPLOAD_CODEC``), and the encoding is part of the registry key, so
+changing it uploads again rather than reusing audio in another format.
+
+``UploadManager.part`` skips the Files API for short clips. Audio that fits
+under ``GEMINI_INLINE_MAX_MB`` once compacted goes inline in the request,
+which saves the upload round-trip. Larger audio is uploaded, and the SDK
+streams it from disk, so only payloads under the limit are ever read into
+memory.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from stt_translate import tracing
+from stt_translate.cache import file_digest
+from stt_translate.compact import CompactStats, compact_file, upload_encoding
+from stt_translate.concurrency import map_ordered
+
+DEFAULT_REGISTRY_PATH = os.path.join("output", "cache", "gemini_files.sqlite")
+FILE_TTL = 48 * 3600
+# Don't hand out an upload that may expire while a long request is still using it
+EXPIRY_MARGIN = 2 * 3600
+# display_name prefix marking uploads made by UploadManager; only these are ever garbage collected
+UPLOAD_TAG = "stt-translate:"
+# Batch jobs can run for 24 hours on a source uploaded by another registry or machine
+GC_MIN_AGE = 24 * 3600
+# Requests are capped at 20 MB; base64 grows inline audio by 4/3 and the prompt needs room
+DEFAULT_INLINE_MAX_MB = 14
+
+
+@dataclass
+class RegisteredFile:
+    content_hash: str
+    name: str
+    uri: str
+    mime_type: str
+    expires_at: float
+
+    def as_part(self):
+        from google.genai import types
+
+        return types.Part.from_uri(file_uri=self.uri, mime_type=self.mime_type)
+
+
+class FileRegistry:
+    """SQLite map of content hash -> uploaded Gemini file."""
+
+    def __init__(self, path=None):
+        path = path or os.getenv("GEMINI_FILE_REGISTRY", DEFAULT_REGISTRY_PATH)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS uploads (
+                content_hash TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                uri TEXT NOT NULL,
+                mime_type TEXT,
+                source_path TEXT,
+                expires_at REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, content_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, name, uri, mime_type, expires_at FROM uploads WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+        return RegisteredFile(*row) if row else None
+
+    def put(self, entry, source_path=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry.content_hash, entry.name, entry.uri, entry.mime_type, source_path, entry.expires_at, time.time()),
+            )
+            self._conn.commit()
+
+    def remove(self, names):
+        with self._lock:
+            self._conn.executemany("DELETE FROM uploads WHERE name = ?", [(name,) for name in names])
+            self._conn.commit()
+
+    def all(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT content_hash, name, uri, mime_type, expires_at FROM uploads").fetchall()
+        return [RegisteredFile(*row) for row in rows]
+
+
+class UploadManager:
+    """Uploads audio once per content hash and hands out the registered file."""
+
+    def __init__(self, client, registry=None, max_workers=4, expiry_margin=EXPIRY_MARGIN, codec=None,
+                 max_inline_bytes=None):
+        self.client = client
+        self.registry = registry or FileRegistry()
+        self.max_workers = max_workers
+        self.expiry_margin = expiry_margin
+        # "codec[:bitrate]" or "off" (upload the source file as is); None reads STT_UPLOAD_CODEC
+        self.encoding = upload_encoding(codec)
+        self.stats = CompactStats()
+        if max_inline_bytes is None:
+            max_inline_bytes = int(float(os.getenv("GEMINI_INLINE_MAX_MB", DEFAULT_INLINE_MAX_MB)) * 1024 * 1024)
+        self.max_inline_bytes = max_inline_bytes
+        self.routes = Counter()  # "inline" / "upload" / "reuse" -> files sent that way by part()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, content_hash):
+        with self._locks_guard:
+            return self._locks.setdefault(content_hash, threading.Lock())
+
+    def _key(self, path):
+        content_hash = file_digest(path)
+        return f"{content_hash}:{self.encoding.tag}" if self.encoding else content_hash
+
+    def get(self, path, compacted=None):
+        """Return a usable upload of ``path``, uploading only if none is registered.
+
+        ``compacted`` is ``compact_file``'s ``(path, mime_type)`` when the caller already has it.
+        """
+        content_hash = self._key(path)
+        # Two stages asking for the same audio at once share one upload
+        with self._lock_for(content_hash):
+            entry = self._reusable(content_hash)
+            if entry is not None:
+                print(f"Reusing upload {entry.name} for {path}")
+                return entry
+            return self._upload(path, content_hash, compacted)
+
+    def part(self, path):
+        """(Part, route) for ``path``, sent inline when small enough and uploaded otherwise.
+
+        ``route`` is ``"reuse"`` when an earlier upload is still registered
+        (no audio is sent at all), ``"inline"`` when the compacted audio is
+        under ``max_inline_bytes``, else ``"upload"``.
+        """
+        if self._reusable(self._key(path)) is not None:
+            route, part = "reuse", self.get(path).as_part()
+        else:
+            send_path, mime_type = compact_file(path, self.encoding, stats=self.stats)
+            size = os.path.getsize(send_path)
+            if size <= self.max_inline_bytes:
+                from google.genai import types
+
+                with open(send_path, "rb") as f:
+                    route, part = "inline", types.Part.from_bytes(data=f.read(), mime_type=mime_type)
+            else:
+                route, part = "upload", self.get(path, compacted=(send_path, mime_type)).as_part()
+            print(f"{path}: sending {route} ({size / 1e6:.2f} MB, inline limit {self.max_inline_bytes / 1e6:.0f} MB)")
+        with self._locks_guard:
+            self.routes[route] += 1
+        return part, route
+
+    def _reusable(self, content_hash):
+        entry = self.registry.get(content_hash)
+        if entry is not None and entry.expires_at - self.expiry_margin > time.time():
+            return entry
+        return None
+
+    def get_many(self, paths):
+        """Yield uploads for ``paths`` in order, uploading up to ``max_workers`` at once."""
+        yield from map_ordered(self.get, paths, max_workers=self.max_workers)
+
+    def _upload(self, path, content_hash, compacted=None):
+        send_path, mime_type = compacted or compact_file(path, self.encoding, stats=self.stats)
+        print(f"Uploading audio file: {send_path}")
+        with tracing.span("upload", provider="gemini", path=path, bytes=os.path.getsize(send_path)):
+            uploaded = self.client.files.upload(
+                file=send_path, config={"mime_type": mime_type, "display_name": f"{UPLOAD_TAG}{content_hash}"})
+        while uploaded.state is not None and uploaded.state.name == "PROCESSING":
+            time.sleep(2)
+            with tracing.span("poll", provider="gemini", file=uploaded.name):
+                uploaded = self.client.files.get(name=uploaded.name)
+        if uploaded.state is not None and uploaded.state.name == "FAILED":
+            raise RuntimeError(f"Gemini failed to process upload {uploaded.name} of {path}")
+        if uploaded.expiration_time is not None:
+            expires_at = uploaded.expiration_time.timestamp()
+        else:
+            expires_at = time.time() + FILE_TTL
+        entry = RegisteredFile(content_hash, uploaded.name, uploaded.uri, uploaded.mime_type, expires_at)
+        self.registry.put(entry, source_path=path)
+        print(f"Upload complete. File ID: {uploaded.name}")
+        return entry
+
+    def collect_garbage(self, min_age=GC_MIN_AGE, dry_run=False):
+        """Forget expired registry entries and delete orphaned uploads; returns the orphans' names.
+
+        An orphan is an upload tagged with ``UPLOAD_TAG`` (made by an
+        ``UploadManager`` or a batch shard submission), at least ``min_age``
+        seconds old and not in this registry. Untagged files (other tools'
+        uploads) and young uploads that another registry may not have recorded
+        yet are never touched. With ``dry_run`` nothing is deleted or removed, only reported.
+        """
+        now = time.time()
+        registered = {entry.name: entry for entry in self.registry.all()}
+        expired = [name for name, entry in registered.items() if entry.expires_at <= now]
+        live = set(registered) - set(expired)
+
+        remote = list(self.client.files.list())
+        orphans = []
+        for f in remote:
+            created = f.create_time.timestamp() if f.create_time is not None else now
+            if (f.display_name or "").startswith(UPLOAD_TAG) and f.name not in live and now - created >= min_age:
+                orphans.append(f.name)
+        # Registry entries whose upload is gone on the server can't be reused either
+        missing = live - {f.name for f in remote}
+
+        print(f"Garbage collection: {len(orphans)} orphaned uploads, {len(expired)} expired and "
+              f"{len(missing)} missing registry entries" + (" (dry run, nothing changed)" if dry_run else ""))
+        if dry_run:
+            return orphans
+        self.registry.remove(expired)
+        self.registry.remove(missing)
+        if orphans:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                list(pool.map(lambda name: self.client.files.delete(name=name), orphans))
+        return orphans
+
+    def release(self, path):
+        """Delete the registered upload of ``path`` now instead of waiting for expiry."""
+        entry = self.registry.get(self._key(path))
+        if entry is not None:
+            self.client.files.delete(name=entry.name)
+            self.registry.remove([entry.name])
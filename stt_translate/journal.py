@@ -0,0 +1,110 @@
+"""Per-file checkpoints so an interrupted chunked run resumes where it stopped.
+
+A ``ChunkJournal`` is an append-only JSONL file next to the output. Its
+first line identifies the run: the audio hash, the provider, the model and
+how the audio was chunked. Every later line holds one finished chunk's
+offsets and text. Each line is written and flushed as soon as its chunk
+comes back, so a crash loses at most the chunks that were in flight. A
+journal left by a different run (other audio, model or chunking) is started
+over, and a line torn by a crash is cut off before new lines are appended.
+
+Unlike ``ResultCache`` entries, journal lines are never evicted, and they
+belong to exactly one output file. ``append_partial`` keeps a readable
+``.partial`` copy of the text finished so far, in chunk order.
+"""
+import json
+import os
+import threading
+
+
+def journal_path(output_path):
+    return output_path + ".journal.jsonl"
+
+
+def _offsets(chunk):
+    return round(chunk.start, 3), round(chunk.end, 3)
+
+
+class ChunkJournal:
+    """Append-only record of one output file's finished chunks, safe to share between threads."""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.done = {}  # (start, end) -> text
+        self._lock = threading.Lock()
+        fresh = True
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            # Only newline-terminated lines are complete; a torn last line is cut off below, or the
+            # next record would be appended to it and lost on the following resume
+            complete = data.rfind(b"\n") + 1
+            lines = data[:complete].decode("utf-8", errors="replace").splitlines()
+            if lines and _load(lines[0]) == header:
+                fresh = False
+                for line in lines[1:]:
+                    record = _load(line)
+                    if record is not None:
+                        self.done[(record["start"], record["end"])] = record["text"]
+                if complete < len(data):
+                    os.truncate(path, complete)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "w" if fresh else "a", encoding="utf-8")
+        if fresh:
+            self._write(header)
+
+    def __len__(self):
+        return len(self.done)
+
+    def get(self, chunk):
+        """Text recorded for ``chunk`` in an earlier (interrupted) run, or None."""
+        return self.done.get(_offsets(chunk))
+
+    def record(self, chunk, text):
+        start, end = _offsets(chunk)
+        with self._lock:
+            self.done[(start, end)] = text
+            self._write({"start": start, "end": end, "text": text})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _load(line):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def partial_path(output_path):
+    return output_path + ".partial"
+
+
+def clear_checkpoint(output_path, keep_journal=False):
+    """Drop the checkpoint files of an output that has now been written.
+
+    ``keep_journal`` when some chunks failed: they are not journaled, so a rerun retries only those.
+    """
+    paths = [partial_path(output_path)] + ([] if keep_journal else [journal_path(output_path)])
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def append_partial(pieces, path):
+    """Yield ``pieces`` (``TimedText``, in order) unchanged, appending each one's text to ``path``."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for piece in pieces:
+            f.write(piece.text.strip() + "\n")
+            f.flush()
+            yield piece
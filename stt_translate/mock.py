@@ -0,0 +1,502 @@
+"""Offline stand-ins for the Sarvam and Gemini SDK clients.
+
+``MockSarvam`` and ``MockGemini`` implement the parts of the SDK surface the
+scripts use (realtime transcribe/translate, batch jobs, the Files API,
+``generate_content`` and batches), so concurrency, retries and backpressure
+can be load-tested without spending quota. Every call sleeps for a latency
+drawn from a configurable distribution and can fail with an injected 429
+(with ``Retry-After``) or 5xx. Each key has an in-flight cap and a
+requests-per-second bucket, and going over either returns a 429. Batch jobs
+move through their states on a timer, and uploaded files expire after a TTL.
+Batch result files are served by a small local HTTP server, because
+``stt_translate.gemini_batch`` downloads them with httpx.
+
+Set ``STT_MOCK=1`` (or pass ``--mock`` to ``python -m stt_translate``) and
+``stt_translate.clients`` hands out these clients instead of the real ones.
+Tune them with the ``STT_MOCK_*`` variables read by ``MockConfig.from_env``.
+"""
+import asyncio
+import datetime
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+
+class MockAPIError(Exception):
+    """HTTP error raised by the mocks, shaped like both SDKs' API errors.
+
+    ``status_code`` and ``body`` match ``sarvamai.core.api_error.ApiError``;
+    ``code`` and ``message`` match ``google.genai.errors.APIError``.
+    """
+
+    def __init__(self, status_code, message="", retry_after=None):
+        super().__init__(f"{status_code} {message}".strip())
+        self.status_code = self.code = status_code
+        self.message = message
+        self.body = {"error": {"code": status_code, "message": message}}
+        self.headers = {} if retry_after is None else {"retry-after": f"{retry_after:.2f}"}
+
+
+@dataclass
+class Latency:
+    """Seconds per call: ``fixed``, ``uniform`` (mean ± spread) or ``lognormal`` (median, sigma)."""
+
+    kind: str = "lognormal"
+    mean: float = 0.5
+    spread: float = 0.3
+    per_audio_second: float = 0.0
+
+    @classmethod
+    def parse(cls, text):
+        """'lognormal:0.5:0.3', 'uniform:1:0.5' or 'fixed:0.2'."""
+        kind, *numbers = text.split(":")
+        return cls(kind, *map(float, numbers))
+
+    def sample(self, audio_seconds=0.0):
+        if self.kind == "fixed":
+            base = self.mean
+        elif self.kind == "uniform":
+            base = random.uniform(self.mean - self.spread, self.mean + self.spread)
+        else:
+            base = random.lognormvariate(0, self.spread) * self.mean
+        return max(0.0, base + self.per_audio_second * audio_seconds)
+
+
+@dataclass
+class MockConfig:
+    latency: Latency = field(default_factory=Latency)
+    error_429_rate: float = 0.0
+    error_5xx_rate: float = 0.0
+    max_in_flight_per_key: int = 8
+    requests_per_second: float = 0.0  # per key, 0 = unlimited
+    retry_after: float = 1.0
+    job_seconds: float = 10.0  # queued -> running -> completed, split evenly
+    batch_error_rate: float = 0.0  # share of files/requests inside a finished batch job that fail
+    file_ttl: float = 48 * 3600
+    processing_seconds: float = 1.0  # Files API PROCESSING state after upload
+    audio_seconds_per_request: float = 29.0  # assumed when the request's audio length is unknown
+
+    @classmethod
+    def from_env(cls):
+        env = os.getenv
+        return cls(
+            latency=Latency.parse(env("STT_MOCK_LATENCY", "lognormal:0.5:0.3")),
+            error_429_rate=float(env("STT_MOCK_429_RATE", "0")),
+            error_5xx_rate=float(env("STT_MOCK_5XX_RATE", "0")),
+            max_in_flight_per_key=int(env("STT_MOCK_MAX_IN_FLIGHT", "8")),
+            requests_per_second=float(env("STT_MOCK_RPS", "0")),
+            retry_after=float(env("STT_MOCK_RETRY_AFTER", "1")),
+            job_seconds=float(env("STT_MOCK_JOB_SECONDS", "10")),
+            batch_error_rate=float(env("STT_MOCK_BATCH_ERROR_RATE", "0")),
+            file_ttl=float(env("STT_MOCK_FILE_TTL", str(48 * 3600))),
+        )
+
+
+class Backend:
+    """Shared admission control, fault injection and call statistics for one provider."""
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._buckets = {}  # key -> (tokens, last refill time)
+        self.stats = {"calls": 0, "ok": 0, "429": 0, "5xx": 0, "max_in_flight": 0}
+
+    def _admit(self, key):
+        config = self.config
+        with self._lock:
+            self.stats["calls"] += 1
+            if self._in_flight.get(key, 0) >= config.max_in_flight_per_key:
+                self.stats["429"] += 1
+                raise MockAPIError(429, "too many concurrent requests", retry_after=config.retry_after)
+            if config.requests_per_second:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(key, (config.requests_per_second, now))
+                tokens = min(config.requests_per_second, tokens + (now - last) * config.requests_per_second)
+                if tokens < 1:
+                    self._buckets[key] = (tokens, now)
+                    self.stats["429"] += 1
+                    raise MockAPIError(429, "rate limit exceeded",
+                                       retry_after=(1 - tokens) / config.requests_per_second)
+                self._buckets[key] = (tokens - 1, now)
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], sum(self._in_flight.values()))
+
+    def call(self, key, audio_seconds=0.0):
+        """Run one simulated request: admit, sleep, maybe fail."""
+        self._admit(key)
+        try:
+            time.sleep(self.config.latency.sample(audio_seconds))
+            self._maybe_fail()
+        finally:
+            with self._lock:
+                self._in_flight[key] -= 1
+
+    async def acall(self, key, audio_seconds=0.0):
+        """``call`` for the async clients: the latency is awaited, so one thread holds many requests."""
+        self._admit(key)
+        try:
+            await asyncio.sleep(self.config.latency.sample(audio_seconds))
+            self._maybe_fail()
+        finally:
+            with self._lock:
+                self._in_flight[key] -= 1
+
+    def _maybe_fail(self):
+        roll = random.random()
+        if roll < self.config.error_429_rate:
+            with self._lock:
+                self.stats["429"] += 1
+            raise MockAPIError(429, "resource exhausted", retry_after=self.config.retry_after)
+        if roll < self.config.error_429_rate + self.config.error_5xx_rate:
+            with self._lock:
+                self.stats["5xx"] += 1
+            raise MockAPIError(random.choice((500, 502, 503)), "internal error")
+        with self._lock:
+            self.stats["ok"] += 1
+
+
+def _audio_seconds(data, config):
+    """Length of a WAV payload (16 kHz mono s16le, as cut by ``chunking``), else the configured default."""
+    if isinstance(data, (bytes, bytearray)) and data[:4] == b"RIFF":
+        return max(0, len(data) - 44) / 32000
+    return config.audio_seconds_per_request
+
+
+def _timed_state(created, job_seconds, states):
+    """Pick the state a job is in ``now``, advancing evenly through ``states``."""
+    elapsed = time.time() - created
+    step = job_seconds / max(1, len(states) - 1)
+    return states[min(int(elapsed / step) if step else len(states) - 1, len(states) - 1)]
+
+
+# --------------------------------------------------------------------------- Sarvam
+
+
+class _SarvamSpeechToText:
+    def __init__(self, backend, key):
+        self._backend = backend
+        self._key = key
+
+    def _respond(self, file, model, translate, with_timestamps=False):
+        data = file[1] if isinstance(file, tuple) else file.read()
+        seconds = _audio_seconds(data, self._backend.config)
+        self._backend.call(self._key, seconds)
+        text = f"[mock {'translation' if translate else 'transcript'} of {len(data)} bytes]"
+        timestamps = None
+        if with_timestamps:
+            # One phrase per word, spread evenly over the clip
+            words = text.split()
+            step = seconds / len(words)
+            timestamps = SimpleNamespace(words=words, start_time_seconds=[i * step for i in range(len(words))],
+                                         end_time_seconds=[(i + 1) * step for i in range(len(words))])
+        return SimpleNamespace(request_id=uuid.uuid4().hex, transcript=text, language_code="hi-IN", model=model,
+                               timestamps=timestamps)
+
+    def transcribe(self, file, model="saarika:v2.5", with_timestamps=False, **kwargs):
+        return self._respond(file, model, translate=False, with_timestamps=with_timestamps)
+
+    def translate(self, file, model="saaras:v2.5", **kwargs):
+        return self._respond(file, model, translate=True)
+
+
+class _SarvamJob:
+    STATES = ("Accepted", "Pending", "Running", "Completed")
+
+    def __init__(self, backend, key, model, options):
+        self._backend = backend
+        self._key = key
+        self.job_id = self._job_id = uuid.uuid4().hex
+        self.model = model
+        self.options = options
+        self.files = []
+        self.failed = set()
+        self.started_at = None
+
+    def upload_files(self, file_paths, timeout=60.0):
+        for path in file_paths:
+            self._backend.call(self._key)
+            self.files.append(path)
+
+    def start(self):
+        self._backend.call(self._key)
+        self.started_at = time.time()
+        rate = self._backend.config.batch_error_rate
+        self.failed = {os.path.basename(path) for path in self.files if random.random() < rate}
+
+    def get_status(self):
+        if self.started_at is None:
+            return SimpleNamespace(job_state="Accepted")
+        return SimpleNamespace(job_state=_timed_state(self.started_at, self._backend.config.job_seconds, self.STATES))
+
+    def wait_until_complete(self, poll_interval=5, timeout=600):
+        deadline = time.time() + timeout
+        while self.get_status().job_state != "Completed":
+            if time.time() > deadline:
+                raise TimeoutError(f"Mock job {self.job_id} did not finish in {timeout}s")
+            time.sleep(min(poll_interval, 0.5))
+        return self.get_status()
+
+    def is_failed(self):
+        return False
+
+    def get_file_results(self):
+        names = [os.path.basename(path) for path in self.files]
+        return {
+            "successful": [{"file_name": name, "status": "Success"} for name in names if name not in self.failed],
+            "failed": [{"file_name": name, "status": "Failed", "error_message": "mock file failure"}
+                       for name in names if name in self.failed],
+        }
+
+    def download_outputs(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        for path in self.files:
+            name = os.path.basename(path)
+            if name in self.failed:
+                continue
+            with open(os.path.join(output_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump({"request_id": self.job_id, "transcript": f"[mock {self.model} output of {name}]"}, f)
+
+
+class _SarvamJobs:
+    def __init__(self, backend, key, jobs):
+        self._backend = backend
+        self._key = key
+        self._jobs = jobs
+
+    def create_job(self, model, **options):
+        self._backend.call(self._key)
+        job = _SarvamJob(self._backend, self._key, model, options)
+        self._jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise MockAPIError(404, f"job {job_id} not found")
+        return job
+
+
+class MockSarvam:
+    """Drop-in for ``SarvamAI``; clients built on one backend share its limits and jobs."""
+
+    def __init__(self, api_subscription_key="mock-key", backend=None, jobs=None, **kwargs):
+        self.backend = backend or Backend(MockConfig.from_env())
+        jobs = {} if jobs is None else jobs
+        self.speech_to_text = _SarvamSpeechToText(self.backend, api_subscription_key)
+        self.speech_to_text_job = _SarvamJobs(self.backend, api_subscription_key, jobs)
+        self.speech_to_text_translate_job = _SarvamJobs(self.backend, api_subscription_key, jobs)
+
+
+# --------------------------------------------------------------------------- Gemini
+
+
+class _ResultServer:
+    """Serves batch result files at the Files API download path."""
+
+    def __init__(self):
+        self.files = {}
+        files = self.files
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                name = self.path.split("/v1beta/", 1)[-1].split(":download", 1)[0]
+                body = files.get(name)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.url = f"http://{host}:{port}/download/v1beta/{{name}}:download?alt=media"
+
+
+class _GeminiFiles:
+    def __init__(self, gemini):
+        self._gemini = gemini
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def upload(self, file, config=None):
+        backend = self._gemini.backend
+        backend.call(self._gemini.key)
+        mime_type = (config or {}).get("mime_type") or ("audio/mpeg" if str(file).endswith(".mp3") else "audio/wav")
+        name = f"files/mock-{uuid.uuid4().hex[:12]}"
+        entry = {
+            "name": name,
+            "uri": f"https://generativelanguage.googleapis.com/v1beta/{name}",
+            "mime_type": mime_type,
+            "display_name": (config or {}).get("display_name"),
+            "path": file,
+            "created": time.time(),
+            "expires": time.time() + backend.config.file_ttl,
+        }
+        with self._lock:
+            self._files[name] = entry
+        return self._view(entry)
+
+    def _view(self, entry):
+        processing = time.time() - entry["created"] < self._gemini.backend.config.processing_seconds
+        return SimpleNamespace(
+            name=entry["name"],
+            uri=entry["uri"],
+            mime_type=entry["mime_type"],
+            display_name=entry["display_name"],
+            state=SimpleNamespace(name="PROCESSING" if processing else "ACTIVE"),
+            create_time=datetime.datetime.fromtimestamp(entry["created"], tz=datetime.timezone.utc),
+            expiration_time=datetime.datetime.fromtimestamp(entry["expires"], tz=datetime.timezone.utc),
+        )
+
+    def _live(self, name):
+        with self._lock:
+            entry = self._files.get(name)
+            if entry is not None and entry["expires"] <= time.time():
+                del self._files[name]
+                entry = None
+        if entry is None:
+            raise MockAPIError(404, f"{name} not found")
+        return entry
+
+    def get(self, name):
+        return self._view(self._live(name))
+
+    def path(self, name):
+        return self._live(name)["path"]
+
+    def list(self):
+        with self._lock:
+            entries = [entry for entry in self._files.values() if entry["expires"] > time.time()]
+        return [self._view(entry) for entry in entries]
+
+    def delete(self, name):
+        with self._lock:
+            self._files.pop(name, None)
+
+
+class _GeminiModels:
+    def __init__(self, gemini):
+        self._gemini = gemini
+
+    def _audio_seconds(self, contents):
+        config = self._gemini.backend.config
+        audio_seconds = config.audio_seconds_per_request
+        for part in contents:
+            inline = getattr(part, "inline_data", None)
+            if inline is not None:
+                audio_seconds = _audio_seconds(inline.data, config)
+        return audio_seconds
+
+    def generate_content(self, model, contents, config=None):
+        audio_seconds = self._audio_seconds(contents)
+        self._gemini.backend.call(self._gemini.key, audio_seconds)
+        return self._response(model, contents, config, audio_seconds)
+
+    @staticmethod
+    def _response(model, contents, config, audio_seconds):
+        text = f"[mock {model} response for {audio_seconds:.1f}s of audio]"
+        schema = config.get("response_schema") if isinstance(config, dict) else None
+        if "translations" in getattr(schema, "model_fields", {}):  # text-only batch from stt_translate.translation
+            segments = json.loads(contents[-1])
+            text = json.dumps({"translations": [{"id": s["id"], "english": f"[mock English of {len(s['text'])} chars]"}
+                                                for s in segments]})
+            usage = SimpleNamespace(prompt_token_count=len(contents[-1]) // 2, candidates_token_count=len(text) // 4)
+            return SimpleNamespace(text=text, parsed=None, usage_metadata=usage)
+        if config and (config.get("response_mime_type") if isinstance(config, dict) else None) == "application/json":
+            segment = {"start": "00:00", "end": f"00:{min(int(audio_seconds), 59):02d}", "language": "Hindi",
+                       "native_text": text, "english_text": text}
+            text = json.dumps({"segments": [segment]}, ensure_ascii=False)
+        usage = SimpleNamespace(prompt_token_count=int(32 * audio_seconds), candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, parsed=None, usage_metadata=usage)
+
+
+class _AsyncGeminiModels(_GeminiModels):
+    async def generate_content(self, model, contents, config=None):
+        audio_seconds = self._audio_seconds(contents)
+        await self._gemini.backend.acall(self._gemini.key, audio_seconds)
+        return self._response(model, contents, config, audio_seconds)
+
+
+class _AsyncGeminiFiles:
+    def __init__(self, files):
+        self._files = files
+
+    async def upload(self, file, config=None):
+        return await asyncio.to_thread(self._files.upload, file, config)
+
+    async def get(self, name):
+        return self._files.get(name)
+
+
+class _GeminiBatches:
+    STATES = ("JOB_STATE_PENDING", "JOB_STATE_RUNNING", "JOB_STATE_SUCCEEDED")
+
+    def __init__(self, gemini):
+        self._gemini = gemini
+        self._jobs = {}
+        self._server = None
+
+    def create(self, model, src, config=None):
+        self._gemini.backend.call(self._gemini.key)
+        name = f"batches/mock-{uuid.uuid4().hex[:12]}"
+        self._jobs[name] = {"name": name, "model": model, "src": src, "created": time.time(), "dest": None}
+        return self.get(name)
+
+    def _finish(self, job):
+        if self._server is None:
+            self._server = _ResultServer()
+            os.environ["GEMINI_DOWNLOAD_URL"] = self._server.url
+        lines = []
+        with open(self._gemini.files.path(job["src"]), encoding="utf-8") as f:
+            for line in f:
+                key = json.loads(line)["key"]
+                if random.random() < self._gemini.backend.config.batch_error_rate:
+                    lines.append(json.dumps({"key": key, "error": {"code": 500, "message": "mock request failure"}}))
+                    continue
+                text = f"[mock {job['model']} batch response for {key}]"
+                lines.append(json.dumps({"key": key, "response": {
+                    "candidates": [{"content": {"parts": [{"text": text}]}}],
+                    "usageMetadata": {"promptTokenCount": 32 * 29, "candidatesTokenCount": len(text) // 4},
+                }}))
+        dest = f"files/mock-result-{uuid.uuid4().hex[:12]}"
+        self._server.files[dest] = ("\n".join(lines) + "\n").encode("utf-8")
+        job["dest"] = dest
+
+    def get(self, name):
+        job = self._jobs.get(name)
+        if job is None:
+            raise MockAPIError(404, f"{name} not found")
+        state = _timed_state(job["created"], self._gemini.backend.config.job_seconds, self.STATES)
+        if state == "JOB_STATE_SUCCEEDED" and job["dest"] is None:
+            self._finish(job)
+        return SimpleNamespace(name=name, state=SimpleNamespace(name=state),
+                               dest=SimpleNamespace(file_name=job["dest"]))
+
+
+class MockGemini:
+    """Drop-in for ``genai.Client`` covering files, models and batches."""
+
+    def __init__(self, api_key="mock-key", backend=None, **kwargs):
+        self.key = api_key
+        self.backend = backend or Backend(MockConfig.from_env())
+        self.files = _GeminiFiles(self)
+        self.models = _GeminiModels(self)
+        self.batches = _GeminiBatches(self)
+        self.aio = SimpleNamespace(models=_AsyncGeminiModels(self), files=_AsyncGeminiFiles(self.files))
+
+
+def enabled():
+    return os.getenv("STT_MOCK", "").lower() in ("1", "true", "yes")
@@ -0,0 +1,497 @@
+"""Provider/mode pipelines behind ``python -m stt_translate run``.
+
+Each per-file runner takes one audio path and returns the text to save; it
+asks ``stt_translate.clients`` for its provider's pooled client, so a run
+over many files opens one set of connections and imports one SDK. Results go
+through the shared ``ResultCache`` exactly as in the standalone scripts.
+Every finished file is also written to the ``SegmentStore``, one row per
+chunk or segment; the per-file outputs are plain views of those rows.
+"""
+import json
+import os
+import time
+
+from stt_translate import clients, tracing
+from stt_translate.cache import ResultCache, file_digest
+from stt_translate.chunking import ChunkFailure, stream_chunks, stream_speech_chunks, write_failures
+from stt_translate.compact import CompactStats, chunk_encoding, compact_chunk, compact_file, upload_encoding
+from stt_translate.concurrency import AdaptiveLimiter, RetryPolicy, map_ordered
+from stt_translate.demux import VIDEO_EXTENSIONS, is_video, iter_extracted
+from stt_translate.estimate import probe_duration
+from stt_translate.journal import ChunkJournal, append_partial, clear_checkpoint, journal_path, partial_path
+from stt_translate.routing import TierRouter, TierStats, parse_tiers, response_confidence
+from stt_translate.sarvam_batch import AUDIO_EXTENSIONS, find_audio_files
+from stt_translate.segment_store import SegmentStore, StoredSegment, sarvam_batch_segments
+from stt_translate.segmenter import SilenceSegmenter
+from stt_translate.stitch import (Stitcher, TimedText, dump_piece, load_piece, repr_language, repr_transcripts,
+                                  response_text, response_words, stitch)
+
+STT_PROMPT = (
+    "You are a professional multilingual transcription assistant.\n"
+    "Transcribe the audio exactly as spoken, preserving both spoken language and script.\n"
+    "Automatically detect when the speaker switches between Hindi and Gujarati.\n"
+    "For Hindi speech, use Devanagari script (e.g., नमस्ते, क्या हाल है?).\n"
+    "For Gujarati speech, use Gujarati script (e.g., કેમ છો?, તમારું સ્વાગત છે.).\n"
+    "Do NOT transliterate or translate; use the native script of each detected language.\n\n"
+    "Return the output as plain text transcription without timestamps.\n"
+    "Maintain proper punctuation and spacing for readability."
+)
+TRANSLATE_PROMPT = (
+    "You are a professional speech translation assistant.\n"
+    "Listen to the given audio clip carefully and translate everything spoken "
+    "into clear, natural English.\n\n"
+    "The speaker may use Hindi, Gujarati, or a mix of both.\n"
+    "Do not provide the transcription in the original language—only output "
+    "the English translation.\n"
+    "Maintain the tone and meaning accurately, and ensure proper grammar and "
+    "punctuation in English.\n"
+)
+
+DEFAULT_MODELS = {
+    ("sarvam", False): "saarika:v2.5",
+    ("sarvam", True): "saaras:v2.5",
+    ("gemini", False): "gemini-2.5-flash",
+    ("gemini", True): "gemini-2.5-flash",
+}
+
+
+def sarvam_realtime(path, cache, model, translate=False, max_workers=8, per_key_limit=4,
+                    silence_aware=True, limiter=None, retry=None, failures=None, overlap=0.0, chunk_codec=None,
+                    checkpoint=None, segments=None):
+    """Chunk ``path`` in memory and send the chunks concurrently over all Sarvam keys.
+
+    Chunks that still fail after ``retry`` leave a placeholder in the text and
+    a ``ChunkFailure`` in ``failures``. With ``overlap`` seconds, fixed-length
+    chunks overlap and their transcripts are stitched without the repeats.
+    Chunks are re-encoded with ``chunk_codec`` (default ``STT_CHUNK_CODEC``) before sending.
+
+    With a ``checkpoint`` (the output path), finished chunks are journaled
+    as they complete and the ordered text so far is kept in
+    ``<checkpoint>.partial``. A rerun after a crash only sends the chunks
+    missing from the journal. The caller clears the checkpoint once the
+    output is written.
+
+    Per-chunk ``StoredSegment``s are appended to ``segments`` when given.
+    With ``overlap``, each holds only the words its chunk adds to the stitched text.
+    """
+    sarvam = clients.sarvam_clients()
+    encoding = chunk_encoding(chunk_codec)
+    compacted = CompactStats()
+    audio_hash = file_digest(path)
+    if overlap:
+        chunks = stream_chunks(path, chunk_duration=29, overlap=overlap)
+        silence_aware = False
+    elif silence_aware:
+        segmenter = SilenceSegmenter(max_chunk=29.0)
+        chunks = stream_speech_chunks(path, segmenter=segmenter)
+    else:
+        chunks = stream_chunks(path, chunk_duration=29)
+    chunks = tracing.traced_iter("split", chunks)
+
+    journal = None
+    if checkpoint:
+        chunking = "silence:29" if silence_aware else f"fixed:29:{overlap}"
+        journal = ChunkJournal(journal_path(checkpoint), {"audio": audio_hash, "provider": "sarvam", "model": model,
+                                                          "translate": translate, "chunking": chunking})
+        if len(journal):
+            print(f"{path}: resuming, {len(journal)} chunks already done")
+
+    latencies = {}  # chunk start -> seconds the request took (cache/journal hits have none)
+    # Overlapping transcripts are stitched by word timestamps (translations have none)
+    timed = bool(overlap) and not translate
+
+    def send(job):
+        idx, chunk = job
+        if journal is not None:
+            text = journal.get(chunk)
+            if text is not None:
+                # The journal keeps text only, so these boundaries are aligned by text
+                return TimedText(chunk.start, chunk.end, text)
+        # Stitching needs the bare transcript (and timings) rather than the response repr, so it is cached apart
+        cache_key = cache.make_key(audio_hash, "sarvam", model,
+                                   prompt="timed" if timed else "transcript" if overlap else "",
+                                   start=chunk.start, end=chunk.end)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            piece = load_piece(chunk.start, chunk.end, cached) if timed else TimedText(chunk.start, chunk.end, cached)
+        else:
+            api = sarvam[idx % len(sarvam)].speech_to_text
+            call = api.translate if translate else api.transcribe
+            upload = compact_chunk(chunk, encoding, compacted)
+            with tracing.span("request", provider="sarvam", model=model, chunk=idx, bytes=len(upload.data)):
+                started = time.perf_counter()
+                response = call(file=upload.as_upload(), model=model, **({"with_timestamps": True} if timed else {}))
+                latencies[chunk.start] = time.perf_counter() - started
+            piece = TimedText(chunk.start, chunk.end, response_text(response) if overlap else str(response),
+                              response_words(response, chunk.start) if timed else None)
+            cache.put(cache_key, dump_piece(piece) if timed else piece.text, provider="sarvam", model=model,
+                      audio_hash=audio_hash, start=chunk.start, end=chunk.end)
+        if journal is not None:
+            journal.record(chunk, piece.text)
+        return piece
+
+    def record_failure(job, error):
+        failure = ChunkFailure.from_error(job[1], error)
+        print(f"{path}: chunk {job[0] + 1} failed after retries: {failure.error}")
+        if failures is not None:
+            failures.append(failure)
+        return TimedText(failure.start, failure.end, failure.placeholder())
+
+    if limiter is None:
+        limiter = AdaptiveLimiter(per_key_limit)
+    results = map_ordered(send, enumerate(chunks), max_workers=max_workers, key=lambda job: job[0] % len(sarvam),
+                          limiter=limiter, retry=retry or RetryPolicy(), on_error=record_failure)
+    if checkpoint:
+        results = append_partial(results, partial_path(checkpoint))
+    try:
+        pieces = list(results)
+    finally:
+        if journal is not None:
+            journal.close()
+    text = stitch(pieces, overlap).strip()
+    if segments is not None:
+        stitcher = Stitcher(overlap)
+        for index, piece in enumerate(pieces):
+            words = " ".join(stitcher.add(piece)) if overlap else " ".join(repr_transcripts(piece.text)) or piece.text
+            segments.append(StoredSegment(piece.start, piece.end, language=repr_language(piece.text),
+                                          latency=latencies.get(piece.start), chunk_index=index,
+                                          **{"english_text" if translate else "native_text": words.strip()}))
+    if silence_aware:
+        print(f"{path}: {segmenter.stats.summary()}")
+    if compacted.items:
+        print(f"{path}: {compacted.summary()}")
+    return text
+
+
+def sarvam_window_transcriber(model, translate=False, chunk_codec=None, timestamps=False):
+    """Blocking ``transcribe(chunk)`` for ``streaming``, spreading windows over all Sarvam keys.
+
+    With ``timestamps`` (transcription only) it returns a ``TimedText`` with word timings for stitching.
+    """
+    sarvam = clients.sarvam_clients()
+    encoding = chunk_encoding(chunk_codec)
+    timed = timestamps and not translate
+
+    def transcribe(chunk):
+        api = sarvam[chunk.index % len(sarvam)].speech_to_text
+        call = api.translate if translate else api.transcribe
+        upload = compact_chunk(chunk, encoding)
+        with tracing.span("request", provider="sarvam", model=model, chunk=chunk.index, bytes=len(upload.data)):
+            response = call(file=upload.as_upload(), model=model, **({"with_timestamps": True} if timed else {}))
+        if timed:
+            return TimedText(chunk.start, chunk.end, response_text(response), response_words(response, chunk.start))
+        return response_text(response)
+
+    return transcribe
+
+
+def _gemini_generate(path, cache, model, prompt, audio_part):
+    audio_hash = file_digest(path)
+    cache_key = cache.make_key(audio_hash, "gemini", model, prompt=prompt)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    part = audio_part()
+    with tracing.span("request", provider="gemini", model=model) as span:
+        response = clients.gemini_client().models.generate_content(model=model, contents=[prompt, part])
+        span.set(**tracing.usage_attributes(response))
+    if response.text:
+        cache.put(cache_key, response.text, provider="gemini", model=model, audio_hash=audio_hash)
+    return response.text or ""
+
+
+def gemini_upload(path, cache, model, translate=False, uploads=None):
+    """Transcribe or translate ``path`` through a (reused) Files API upload."""
+    prompt = TRANSLATE_PROMPT if translate else STT_PROMPT
+    return _gemini_generate(path, cache, model, prompt, lambda: uploads.get(path).as_part())
+
+
+def gemini_auto(path, cache, model, translate=False, uploads=None):
+    """Like ``gemini_upload``, but audio small enough for one request is sent inline instead."""
+    prompt = TRANSLATE_PROMPT if translate else STT_PROMPT
+    return _gemini_generate(path, cache, model, prompt, lambda: uploads.part(path)[0])
+
+
+def gemini_inline(path, cache, model, translate=False, upload_codec=None):
+    """Transcribe or translate ``path`` with the (compacted) audio bytes inlined in the request."""
+    from google.genai import types
+
+    def part():
+        send_path, mime_type = compact_file(path, upload_encoding(upload_codec))
+        with open(send_path, "rb") as f:
+            return types.Part.from_bytes(data=f.read(), mime_type=mime_type)
+
+    prompt = TRANSLATE_PROMPT if translate else STT_PROMPT
+    return _gemini_generate(path, cache, model, prompt, part)
+
+
+def async_output(result, failures, segments, translate=False):
+    """Text of one ``gemini_async.AsyncResult``; a failed file leaves one ``ChunkFailure`` spanning it."""
+    duration = probe_duration(result.item)
+    text = result.text
+    if result.error:
+        failures.append(ChunkFailure(0, 0.0, duration, os.path.basename(result.item), result.error))
+        text = failures[-1].placeholder()
+    segments.append(StoredSegment(0.0, duration, latency=result.latency,
+                                  **{"english_text" if translate else "native_text": text}))
+    return text
+
+
+def gemini_combined(path, cache, model, uploads=None):
+    """Native transcript and English translation in one call; returns segments JSON."""
+    from stt_translate.gemini_combined import PROMPT, records_to_json, transcribe_and_translate
+
+    audio_hash = file_digest(path)
+    cache_key = cache.make_key(audio_hash, "gemini-combined", model, prompt=PROMPT)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    part = uploads.get(path).as_part()
+    with tracing.span("request", provider="gemini", model=model):
+        records = transcribe_and_translate(clients.gemini_client(), part, model=model)
+    text = records_to_json(records)
+    if records:
+        cache.put(cache_key, text, provider="gemini-combined", model=model, audio_hash=audio_hash)
+    return text
+
+
+def chunk_generator(cache, audio_hash, translate=False):
+    """Cached ``generate(provider, model, chunk) -> (text, confidence)`` for ``TierRouter``."""
+    prompt = TRANSLATE_PROMPT if translate else STT_PROMPT
+    upload, sarvam_chunk = upload_encoding(), chunk_encoding()
+
+    def generate(provider, model, chunk):
+        # Sarvam entries keep the confidence next to the text, so a low-confidence hit is escalated again
+        key_prompt = f"routed:{'translate' if translate else 'transcript'}" if provider == "sarvam" else prompt
+        cache_key = cache.make_key(audio_hash, provider, model, prompt=key_prompt, start=chunk.start, end=chunk.end)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            if provider == "sarvam":
+                entry = json.loads(cached)
+                return entry["text"], entry["confidence"]
+            return cached, None
+        if provider == "sarvam":
+            sarvam = clients.sarvam_clients()
+            api = sarvam[chunk.index % len(sarvam)].speech_to_text
+            call = api.translate if translate else api.transcribe
+            compacted = compact_chunk(chunk, sarvam_chunk)
+            with tracing.span("request", provider=provider, model=model, chunk=chunk.index, bytes=len(compacted.data)):
+                response = call(file=compacted.as_upload(), model=model)
+            text, confidence = response_text(response), response_confidence(response)
+        else:
+            from google.genai import types
+
+            chunk = compact_chunk(chunk, upload)
+            part = types.Part.from_bytes(data=chunk.data, mime_type=chunk.mime_type)
+            with tracing.span("request", provider=provider, model=model, chunk=chunk.index,
+                              bytes=len(chunk.data)) as span:
+                response = clients.gemini_client().models.generate_content(model=model, contents=[prompt, part])
+                span.set(**tracing.usage_attributes(response))
+            text, confidence = (response.text or "").strip(), None
+        if text:
+            value = text
+            if provider == "sarvam":
+                value = json.dumps({"text": text, "confidence": confidence}, ensure_ascii=False)
+            cache.put(cache_key, value, provider=provider, model=model, audio_hash=audio_hash,
+                      start=chunk.start, end=chunk.end)
+        return text, confidence
+
+    return generate
+
+
+def routed(path, cache, tiers=None, translate=False, max_workers=8, failures=None, stats=None, segments=None):
+    """Cut ``path`` at pauses and route every chunk through the model tiers, cheapest first.
+
+    ``tiers`` is a ``"provider:model,..."`` spec (default ``STT_ROUTER_TIERS``);
+    pass a shared ``TierStats`` as ``stats`` to total the hit rates over a run.
+    Per-chunk ``StoredSegment``s are appended to ``segments`` when given.
+    """
+    tiers = parse_tiers(tiers)
+    router = TierRouter(tiers, chunk_generator(cache, file_digest(path), translate), translate=translate, stats=stats)
+    segmenter = SilenceSegmenter(max_chunk=29.0)
+
+    def transcribe(chunk):
+        started = time.perf_counter()
+        text, _ = router.transcribe(chunk)
+        return chunk, text, time.perf_counter() - started
+
+    def record_failure(chunk, error):
+        failure = ChunkFailure.from_error(chunk, error)
+        print(f"{path}: chunk {chunk.index + 1} failed after retries: {failure.error}")
+        if failures is not None:
+            failures.append(failure)
+        return chunk, failure.placeholder(), None
+
+    chunks = tracing.traced_iter("split", stream_speech_chunks(path, segmenter=segmenter))
+    results = list(map_ordered(transcribe, chunks, max_workers=max_workers, retry=RetryPolicy(),
+                               on_error=record_failure))
+    text = " ".join(text for _, text, _ in results if text).strip()
+    if segments is not None:
+        field = "english_text" if translate else "native_text"
+        segments.extend(StoredSegment(chunk.start, chunk.end, latency=latency, chunk_index=chunk.index,
+                                      **{field: text.strip()}) for chunk, text, latency in results)
+    print(f"{path}: {segmenter.stats.summary()}")
+    return text
+
+
+def sarvam_batch(paths, output_dir, model, translate=False, input_root=None, max_jobs_in_flight=4):
+    """Run ``paths`` through resumable Sarvam batch jobs; outputs land in ``output_dir``.
+
+    Returns ``{path: error}`` for the files that failed.
+    """
+    from stt_translate.sarvam_batch import BatchManifest, SarvamBatchDriver
+
+    manifest = BatchManifest(os.path.join(output_dir, "manifest.sqlite"))
+    driver = SarvamBatchDriver(
+        clients.sarvam_client(),
+        manifest,
+        output_dir,
+        model=model,
+        translate=translate,
+        job_options={} if translate else dict(with_timestamps=True),
+        input_root=input_root,
+        max_jobs_in_flight=max_jobs_in_flight,
+    )
+    driver.run(paths)
+    return manifest.file_errors(paths)
+
+
+MODES = {
+    "sarvam": ("realtime", "batch"),
+    "gemini": ("auto", "async", "upload", "inline", "combined", "routed"),
+}
+
+
+def collect_inputs(inputs):
+    """Expand files and directories into a sorted list of audio and video paths."""
+    paths = []
+    for path in inputs:
+        paths.extend(find_audio_files(path, AUDIO_EXTENSIONS + VIDEO_EXTENSIONS) if os.path.isdir(path) else [path])
+    return paths
+
+
+def output_path(path, output_dir, input_root, suffix):
+    relative = os.path.relpath(path, input_root) if input_root else os.path.basename(path)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + suffix)
+
+
+def run(provider, mode, inputs, output_dir, translate=False, model=None, max_workers=8, per_key_limit=4,
+        overlap=0.0, upload_codec=None, chunk_codec=None, tiers=None, max_in_flight=None, timeout=None):
+    """Process every audio or video file in ``inputs`` with one provider/mode; returns the saved paths.
+
+    Video audio tracks are demuxed across a worker pool ahead of the file being processed.
+    Gemini ``async`` mode sends every file at once from one event loop, with up to
+    ``max_in_flight`` requests pending and ``timeout`` seconds per request.
+    """
+    if mode not in MODES.get(provider, ()):
+        raise ValueError(f"Unknown provider/mode '{provider}/{mode}'; choose from {MODES}")
+    model = model or DEFAULT_MODELS[(provider, translate)]
+    paths = collect_inputs(inputs)
+    input_root = inputs[0] if len(inputs) == 1 and os.path.isdir(inputs[0]) else None
+    if provider == "sarvam" and mode == "batch":
+        extracted = list(iter_extracted(paths, input_root=input_root))
+        audio_paths = [audio for _, audio in extracted]
+        if any(map(is_video, paths)):
+            # Extracted tracks live outside input_root, so batch outputs are named by file name alone
+            input_root = None
+        errors = sarvam_batch(audio_paths, output_dir, model, translate=translate, input_root=input_root)
+        saved = []
+        store = SegmentStore()
+        for path, audio in extracted:
+            target = output_path(audio, output_dir, input_root, os.path.splitext(audio)[1] + ".json")
+            if not os.path.exists(target):
+                print(f"{path}: batch job returned no output ({errors.get(audio) or 'not processed'})")
+                continue
+            with open(target, encoding="utf-8") as f:
+                store.replace_file(path, provider, model, sarvam_batch_segments(json.load(f), translate))
+            saved.append(target)
+        store.close()
+        if len(saved) < len(paths):
+            print(f"{len(paths) - len(saved)} of {len(paths)} files failed")
+        return saved
+
+    cache = ResultCache()
+    extracted = None  # (source, audio) pairs, when a mode needs them all before the main loop
+    if provider == "sarvam":
+        # One limiter across files so the per-key cap and its AIMD state hold for the whole run
+        limiter = AdaptiveLimiter(per_key_limit)
+        runner = lambda path, failures, target, segments: sarvam_realtime(
+            path, cache, model, translate=translate, max_workers=max_workers, limiter=limiter, failures=failures,
+            overlap=overlap, chunk_codec=chunk_codec, checkpoint=target, segments=segments)
+    elif mode == "routed":
+        # Each chunk starts at the cheapest of ``tiers`` instead of one ``model``
+        model = ",".join(f"{provider}:{name}" for provider, name in parse_tiers(tiers))
+        tier_stats = TierStats(parse_tiers(tiers))
+        runner = lambda path, failures, target, segments: routed(
+            path, cache, tiers, translate=translate, max_workers=max_workers, failures=failures, stats=tier_stats,
+            segments=segments)
+    elif mode == "inline":
+        runner = lambda path, failures, target, segments: gemini_inline(
+            path, cache, model, translate=translate, upload_codec=upload_codec)
+    else:
+        from stt_translate.gemini_files import UploadManager
+
+        uploads = UploadManager(clients.gemini_client(), codec=upload_codec)
+        if mode == "combined":
+            runner = lambda path, failures, target, segments: gemini_combined(path, cache, model, uploads=uploads)
+        elif mode == "async":
+            from stt_translate.gemini_async import (DEFAULT_MAX_IN_FLIGHT, DEFAULT_TIMEOUT, AsyncGeminiEngine,
+                                                    progress_printer)
+
+            prompt = TRANSLATE_PROMPT if translate else STT_PROMPT
+            engine = AsyncGeminiEngine(clients.gemini_client(), model, prompt, uploads=uploads, cache=cache,
+                                       max_in_flight=max_in_flight or DEFAULT_MAX_IN_FLIGHT,
+                                       timeout=timeout or DEFAULT_TIMEOUT)
+            # Every file is in flight at once; the loop below only saves the finished results. Videos are
+            # probed and extracted once here and the same (source, audio) pairs drive that loop
+            extracted = list(iter_extracted(paths, input_root=input_root))
+            audio_paths = [audio for _, audio in extracted]
+            results = dict(zip(audio_paths, engine.run(audio_paths, on_result=progress_printer(len(audio_paths)))))
+            runner = lambda path, failures, target, segments: async_output(results[path], failures, segments,
+                                                                           translate=translate)
+        elif mode == "auto":
+            runner = lambda path, failures, target, segments: gemini_auto(
+                path, cache, model, translate=translate, uploads=uploads)
+        else:
+            runner = lambda path, failures, target, segments: gemini_upload(
+                path, cache, model, translate=translate, uploads=uploads)
+
+    suffix = "_segments.json" if mode == "combined" else ".txt"
+    saved = []
+    store = SegmentStore()
+    for path, audio in extracted if extracted is not None else iter_extracted(paths, input_root=input_root):
+        print(f"Processing {path} ({provider}/{mode}, {model})")
+        failures, segments = [], []
+        target = output_path(path, output_dir, input_root, suffix)
+        started = time.perf_counter()
+        with tracing.span("file", provider=provider, model=model, path=path, mode=mode):
+            text = runner(audio, failures, target, segments)
+        if mode == "combined":
+            from stt_translate.gemini_combined import records_from_json
+
+            segments = [StoredSegment(record.start, record.end, record.native_text, record.english_text,
+                                      record.language) for record in records_from_json(text)]
+        elif not segments:
+            # Whole-file request: one segment spanning the file
+            segments = [StoredSegment(0.0, probe_duration(audio), latency=time.perf_counter() - started,
+                                      **{"english_text" if translate else "native_text": text})]
+        with tracing.span("write", provider=provider, model=model, path=target, bytes=len(text.encode("utf-8"))):
+            store.replace_file(path, provider, model, segments)
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(text)
+            clear_checkpoint(target, keep_journal=bool(failures))
+        if failures:
+            write_failures(failures, target + ".failed.json")
+            print(f"{len(failures)} chunks of {path} failed; see {target}.failed.json")
+        saved.append(target)
+    if mode == "routed":
+        print("Model tiers:\n" + tier_stats.summary())
+    if mode in ("auto", "async") and uploads.routes:
+        print("Audio sent: " + ", ".join(f"{route} {count}" for route, count in sorted(uploads.routes.items())))
+    if len(saved) < len(paths):
+        print(f"{len(paths) - len(saved)} of {len(paths)} files were skipped")
+    print(f"Segments stored in: {store.path}")
+    store.close()
+    cache.close()
+    return saved
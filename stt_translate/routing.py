@@ -0,0 +1,161 @@
+"""Send each chunk to the cheapest model tier and escalate only the bad results.
+
+A ``TierRouter`` tries its tiers in order, e.g. ``gemini-2.5-flash-lite``,
+then ``gemini-2.5-flash``, then ``gemini-2.5-pro``. It keeps the first
+result that passes ``quality_issues`` and sends the chunk up a tier only when
+the result looks wrong:
+
+* ``empty``: no text for a chunk that the segmenter says holds speech
+* ``script``: too few letters in the expected scripts (Devanagari/Gujarati
+  for transcripts, Latin for English translations)
+* ``repetition``: a decoding loop, seen as one word repeated many times in
+  a row or text that compresses far better than speech does
+* ``too_short``: far fewer words than the chunk's duration implies
+* ``low_confidence``: the provider reported a confidence under the floor
+  (Sarvam, when the response carries one)
+
+The last tier's result is kept whatever it looks like. ``TierStats`` counts,
+per tier, how many chunks it served and why others were escalated, so the
+share of audio served by the fast model is visible after every run.
+"""
+import os
+import threading
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+
+DEFAULT_TIERS = ("gemini:gemini-2.5-flash-lite", "gemini:gemini-2.5-flash", "gemini:gemini-2.5-pro")
+
+SCRIPTS = {
+    "Devanagari": (0x0900, 0x097F),
+    "Gujarati": (0x0A80, 0x0AFF),
+}
+MIN_SCRIPT_SHARE = 0.6  # of letters, in the expected scripts
+MAX_RUN = 6  # same word this many times in a row is a loop
+MAX_COMPRESSION_RATIO = 2.4  # zlib ratio above which text is repetitive rather than speech
+MIN_WORDS_PER_SECOND = 0.4  # conversational speech is ~2 words/s
+MIN_CONFIDENCE = 0.5
+
+
+def parse_tiers(spec=None):
+    """``[(provider, model)]`` from ``"provider:model,..."`` (default ``STT_ROUTER_TIERS``)."""
+    spec = spec or os.getenv("STT_ROUTER_TIERS") or ",".join(DEFAULT_TIERS)
+    tiers = []
+    for item in spec.split(","):
+        provider, _, model = item.strip().partition(":")
+        if provider not in ("sarvam", "gemini") or not model:
+            raise ValueError(f"Tier '{item}' must look like sarvam:<model> or gemini:<model>")
+        tiers.append((provider, model))
+    return tiers
+
+
+def script_share(text, scripts):
+    """Share of ``text``'s letters that belong to ``scripts`` (names from ``SCRIPTS``, or "Latin")."""
+    letters = [ch for ch in text if unicodedata.category(ch).startswith(("L", "M"))]
+    if not letters:
+        return 0.0
+
+    def expected(ch):
+        if "Latin" in scripts and ch.isascii():
+            return True
+        return any(low <= ord(ch) <= high for low, high in (SCRIPTS[name] for name in scripts if name in SCRIPTS))
+
+    return sum(map(expected, letters)) / len(letters)
+
+
+def longest_run(words):
+    best = run = 0
+    previous = None
+    for word in words:
+        run = run + 1 if word == previous else 1
+        best = max(best, run)
+        previous = word
+    return best
+
+
+def quality_issues(text, seconds=None, translate=False, confidence=None, scripts=("Devanagari", "Gujarati")):
+    """Reasons ``text`` should be escalated to a stronger tier; empty when it looks fine."""
+    words = (text or "").split()
+    if not words:
+        return ["empty"]
+    issues = []
+    if script_share(text, ("Latin",) if translate else scripts) < MIN_SCRIPT_SHARE:
+        issues.append("script")
+    encoded = text.encode("utf-8")
+    if longest_run(words) >= MAX_RUN or (
+        len(encoded) >= 200 and len(encoded) / len(zlib.compress(encoded)) > MAX_COMPRESSION_RATIO
+    ):
+        issues.append("repetition")
+    if seconds and seconds >= 10 and len(words) / seconds < MIN_WORDS_PER_SECOND:
+        issues.append("too_short")
+    if confidence is not None and confidence < MIN_CONFIDENCE:
+        issues.append("low_confidence")
+    return issues
+
+
+def response_confidence(response):
+    """Confidence a provider response reports about itself, if any (0-1), else None."""
+    for name in ("confidence", "language_probability"):
+        value = getattr(response, name, None)
+        if isinstance(value, (int, float)):
+            return float(value)
+    return None
+
+
+class TierStats:
+    """Per-tier counts of chunks served and escalated (thread-safe)."""
+
+    def __init__(self, tiers):
+        self.tiers = [f"{provider}:{model}" for provider, model in tiers]
+        self.served = Counter()
+        self.escalated = defaultdict(Counter)  # tier -> reason -> chunks
+        self.seconds = Counter()  # audio seconds served per tier
+        self._lock = threading.Lock()
+
+    def record(self, tier, seconds=0.0, issues=None):
+        with self._lock:
+            if issues:
+                self.escalated[tier].update(issues)
+            else:
+                self.served[tier] += 1
+                self.seconds[tier] += seconds
+
+    def summary(self):
+        total = sum(self.served.values())
+        total_seconds = sum(self.seconds.values())
+        lines = []
+        for tier in self.tiers:
+            served = self.served[tier]
+            share = 100 * served / total if total else 0.0
+            audio = 100 * self.seconds[tier] / total_seconds if total_seconds else 0.0
+            reasons = ", ".join(f"{reason} {count}" for reason, count in self.escalated[tier].most_common())
+            lines.append(f"{tier}: served {served} chunks ({share:.0f}% of chunks, {audio:.0f}% of audio)"
+                         + (f"; escalated {reasons}" if reasons else ""))
+        return "\n".join(lines)
+
+
+class TierRouter:
+    """Calls ``generate(provider, model, chunk)`` tier by tier until a result passes the checks.
+
+    ``generate`` returns ``(text, confidence)``. It should be cached, because
+    a retried chunk starts over from the first tier.
+    """
+
+    def __init__(self, tiers, generate, translate=False, stats=None):
+        self.tiers = list(tiers)
+        self.generate = generate
+        self.translate = translate
+        self.stats = stats or TierStats(self.tiers)
+
+    def transcribe(self, chunk):
+        """(text, tier) for ``chunk``."""
+        seconds = chunk.end - chunk.start
+        for number, (provider, model) in enumerate(self.tiers):
+            tier = f"{provider}:{model}"
+            text, confidence = self.generate(provider, model, chunk)
+            issues = quality_issues(text, seconds, translate=self.translate, confidence=confidence)
+            if not issues or number == len(self.tiers) - 1:
+                self.stats.record(tier, seconds)
+                return text, tier
+            print(f"{chunk.filename}: escalating from {model} ({', '.join(issues)})")
+            self.stats.record(tier, issues=issues)
@@ -0,0 +1,345 @@
+"""Resumable corpus-scale driver for Sarvam batch STT / STT-translate jobs.
+
+A directory of audio files is sharded into batch jobs that respect the
+per-job file limit, several jobs are kept in flight at once, and each job is
+polled with exponential backoff on a ``BatchPoller``. That poller can be
+shared with Gemini batch jobs. Files that fail inside an otherwise finished
+job are requeued on their own, up to ``max_attempts`` submissions. Job IDs
+and per-file state are recorded in a local SQLite manifest, so a crashed or
+restarted run re-attaches to the jobs that are already running on Sarvam
+instead of uploading the files again.
+"""
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stt_translate import tracing
+from stt_translate.batch_poller import BatchPoller
+
+AUDIO_EXTENSIONS = (".wav", ".mp3")
+MAX_FILES_PER_JOB = 20
+
+# File states
+PENDING = "pending"
+SUBMITTED = "submitted"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Job states kept in the manifest (Sarvam's own states are Accepted/Pending/Running/Completed/Failed)
+UPLOADING = "uploading"
+RUNNING = "running"
+DONE = "done"
+ABANDONED = "abandoned"
+
+
+class BatchManifest:
+    """SQLite record of which file went to which job and how it ended."""
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                sarvam_state TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                job_id TEXT,
+                output_path TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_state ON files (state);
+            CREATE INDEX IF NOT EXISTS files_job ON files (job_id);
+            """
+        )
+        self._conn.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._conn.commit()
+            return rows
+
+    def add_files(self, paths):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO files (path, state, updated_at) VALUES (?, ?, ?)",
+                [(path, PENDING, now) for path in paths],
+            )
+            self._conn.commit()
+
+    def files_in_state(self, state):
+        return [row[0] for row in self._execute("SELECT path FROM files WHERE state = ? ORDER BY path", (state,))]
+
+    def job_files(self, job_id, state=None):
+        sql = "SELECT path FROM files WHERE job_id = ?" + (" AND state = ?" if state else "") + " ORDER BY path"
+        return [row[0] for row in self._execute(sql, (job_id, state) if state else (job_id,))]
+
+    def jobs_in_state(self, state):
+        return [row[0] for row in self._execute("SELECT job_id FROM jobs WHERE state = ? ORDER BY created_at", (state,))]
+
+    def record_job(self, job_id, paths):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT INTO jobs VALUES (?, ?, NULL, ?, ?)", (job_id, UPLOADING, now, now))
+            self._conn.executemany(
+                "UPDATE files SET state = ?, job_id = ?, error = NULL, updated_at = ? WHERE path = ?",
+                [(SUBMITTED, job_id, now, path) for path in paths],
+            )
+            self._conn.commit()
+
+    def set_job_state(self, job_id, state, sarvam_state=None):
+        self._execute(
+            "UPDATE jobs SET state = ?, sarvam_state = COALESCE(?, sarvam_state), updated_at = ? WHERE job_id = ?",
+            (state, sarvam_state, time.time(), job_id),
+        )
+
+    def set_file_state(self, path, state, output_path=None, error=None):
+        self._execute(
+            "UPDATE files SET state = ?, output_path = ?, error = ?, updated_at = ? WHERE path = ?",
+            (state, output_path, error, time.time(), path),
+        )
+
+    def release_job_files(self, job_id):
+        """Send the unfinished files of an abandoned job back to the queue."""
+        self._execute(
+            "UPDATE files SET state = ?, job_id = NULL, updated_at = ? WHERE job_id = ? AND state = ?",
+            (PENDING, time.time(), job_id, SUBMITTED),
+        )
+
+    def retry_failed(self):
+        self._execute("UPDATE files SET state = ?, job_id = NULL, updated_at = ? WHERE state = ?",
+                      (PENDING, time.time(), FAILED))
+
+    def file_errors(self, paths):
+        """{path: error} for those of ``paths`` that are in the failed state."""
+        wanted = set(paths)
+        rows = self._execute("SELECT path, error FROM files WHERE state = ?", (FAILED,))
+        return {path: error for path, error in rows if path in wanted}
+
+    def counts(self):
+        return dict(self._execute("SELECT state, COUNT(*) FROM files GROUP BY state"))
+
+
+def find_audio_files(input_dir, extensions=AUDIO_EXTENSIONS):
+    paths = []
+    for root, _, names in os.walk(input_dir):
+        for name in names:
+            if name.lower().endswith(extensions):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def shard_files(paths, max_files=MAX_FILES_PER_JOB, max_bytes=None):
+    """Split paths into job-sized shards.
+
+    Sarvam stores a job's inputs by base name, so a shard never holds two
+    files with the same base name.
+    """
+    shards = []
+    current, names, size = [], set(), 0
+    for path in paths:
+        name = os.path.basename(path)
+        file_size = os.path.getsize(path) if max_bytes else 0
+        full = len(current) >= max_files or (max_bytes and current and size + file_size > max_bytes)
+        if full or name in names:
+            shards.append(current)
+            current, names, size = [], set(), 0
+        current.append(path)
+        names.add(name)
+        size += file_size
+    if current:
+        shards.append(current)
+    return shards
+
+
+class SarvamBatchJob:
+    """``BatchPoller`` adapter for one Sarvam batch job.
+
+    ``on_finished(job, state)`` receives the lower-cased final state and
+    returns any follow-up jobs; ``on_status(job, state)`` sees every polled state.
+    """
+
+    provider = "sarvam"
+
+    def __init__(self, job, model, on_finished, on_status=None):
+        self.job = job
+        self.name = job.job_id
+        self.model = model
+        self.on_finished = on_finished
+        self.on_status = on_status
+
+    def poll(self):
+        state = self.job.get_status().job_state
+        if self.on_status is not None:
+            self.on_status(self.job, state)
+        return state
+
+    def finished(self, state):
+        return state.lower() in ("completed", "failed")
+
+    def collect(self, state):
+        return self.on_finished(self.job, state.lower())
+
+
+class SarvamBatchDriver:
+    """Runs a whole corpus through Sarvam batch jobs, resuming from the manifest."""
+
+    def __init__(self, client, manifest, output_dir, model="saarika:v2.5", translate=False,
+                 job_options=None, input_root=None, max_files_per_job=MAX_FILES_PER_JOB,
+                 max_bytes_per_job=None, max_jobs_in_flight=4, poll_interval=5.0,
+                 max_poll_interval=120.0, upload_timeout=600.0, max_attempts=2, poller=None):
+        self.client = client
+        self.manifest = manifest
+        self.output_dir = output_dir
+        self.model = model
+        self.translate = translate
+        self.job_options = job_options or {}
+        self.input_root = input_root
+        self.max_files_per_job = max_files_per_job
+        self.max_bytes_per_job = max_bytes_per_job
+        self.max_jobs_in_flight = max_jobs_in_flight
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.upload_timeout = upload_timeout
+        self.max_attempts = max_attempts
+        # Pass a shared poller to track Gemini batch jobs in the same loop
+        self.poller = poller or BatchPoller(poll_interval, max_poll_interval)
+        self._active = set()  # IDs of this driver's jobs on the poller
+        self._queue = []  # shards waiting for a job slot
+        self._attempts = {}  # path -> submissions in this run
+
+    @property
+    def _jobs_api(self):
+        return self.client.speech_to_text_translate_job if self.translate else self.client.speech_to_text_job
+
+    def _track(self, job):
+        self._active.add(job.job_id)
+        self.poller.add(SarvamBatchJob(job, self.model, self.finish, on_status=self._status))
+
+    def _status(self, job, sarvam_state):
+        self.manifest.set_job_state(job.job_id, RUNNING, sarvam_state=sarvam_state)
+
+    def resume(self):
+        """Re-attach to running jobs; jobs that never finished uploading are abandoned."""
+        for job_id in self.manifest.jobs_in_state(UPLOADING):
+            print(f"Job {job_id} was interrupted during upload, requeueing its files")
+            self.manifest.set_job_state(job_id, ABANDONED)
+            self.manifest.release_job_files(job_id)
+        for job_id in self.manifest.jobs_in_state(RUNNING):
+            print(f"Re-attaching to running job {job_id}")
+            self._track(self._jobs_api.get_job(job_id))
+
+    def submit(self, paths):
+        """Create, upload and start one job; returns the job handle."""
+        job = self._jobs_api.create_job(model=self.model, **self.job_options)
+        self.manifest.record_job(job.job_id, paths)
+        for path in paths:
+            self._attempts[path] = self._attempts.get(path, 0) + 1
+        print(f"Job created: {job.job_id} ({len(paths)} files)")
+        try:
+            with tracing.span("upload", provider="sarvam", model=self.model, job=job.job_id, files=len(paths),
+                              bytes=sum(os.path.getsize(path) for path in paths)):
+                job.upload_files(file_paths=paths, timeout=self.upload_timeout)
+            job.start()
+        except Exception:
+            self.manifest.set_job_state(job.job_id, ABANDONED)
+            raise
+        self.manifest.set_job_state(job.job_id, RUNNING)
+        return job
+
+    def _output_path(self, path):
+        relative = os.path.relpath(path, self.input_root) if self.input_root else os.path.basename(path)
+        return os.path.join(self.output_dir, f"{relative}.json")
+
+    def collect(self, job, sarvam_state):
+        """Download a finished job's outputs and record each file's result."""
+        job_dir = os.path.join(self.output_dir, ".jobs", job.job_id)
+        results = job.get_file_results()
+        if results["successful"]:
+            with tracing.span("download", provider="sarvam", model=self.model, job=job.job_id,
+                              files=len(results["successful"])):
+                job.download_outputs(output_dir=job_dir)
+        by_name = {os.path.basename(path): path for path in self.manifest.job_files(job.job_id)}
+
+        for detail in results["successful"]:
+            path = by_name.pop(detail["file_name"], None)
+            if path is None:
+                continue
+            output_path = self._output_path(path)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            os.replace(os.path.join(job_dir, f"{detail['file_name']}.json"), output_path)
+            self.manifest.set_file_state(path, COMPLETED, output_path=output_path)
+        for detail in results["failed"]:
+            path = by_name.pop(detail["file_name"], None)
+            if path is not None:
+                self.manifest.set_file_state(path, FAILED, error=detail["error_message"] or detail["status"])
+        for path in by_name.values():
+            self.manifest.set_file_state(path, FAILED, error=f"no result (job {sarvam_state})")
+
+        shutil.rmtree(job_dir, ignore_errors=True)
+        self.manifest.set_job_state(job.job_id, DONE, sarvam_state=sarvam_state)
+        print(f"Job {job.job_id} {sarvam_state}: {len(results['successful'])} ok, {len(results['failed'])} failed")
+
+    def finish(self, job, sarvam_state):
+        """Collect a finished job and requeue its failed files that have submissions left."""
+        self.collect(job, sarvam_state)
+        self._active.discard(job.job_id)
+        # Files re-attached from an earlier run count as submitted once
+        retry = [path for path in self.manifest.job_files(job.job_id, FAILED)
+                 if self._attempts.get(path, 1) < self.max_attempts]
+        if retry:
+            print(f"Requeueing {len(retry)} failed files of job {job.job_id}")
+            for path in retry:
+                self.manifest.set_file_state(path, PENDING)
+            self._queue.extend(shard_files(retry, self.max_files_per_job, self.max_bytes_per_job))
+        return []
+
+    def run(self, paths, retry_failed=False):
+        """Process ``paths`` to completion and return the manifest's file-state counts."""
+        self.manifest.add_files(paths)
+        if retry_failed:
+            self.manifest.retry_failed()
+        self.resume()
+
+        self._queue = shard_files(self.manifest.files_in_state(PENDING), self.max_files_per_job,
+                                  self.max_bytes_per_job)
+        uploads = {}
+        with ThreadPoolExecutor(max_workers=self.max_jobs_in_flight) as pool:
+            while self._queue or uploads or self._active:
+                # Keep the in-flight window full; uploads run in the pool while polling continues
+                while self._queue and len(uploads) + len(self._active) < self.max_jobs_in_flight:
+                    shard = self._queue.pop(0)
+                    uploads[pool.submit(self.submit, shard)] = shard
+                for future in [f for f in uploads if f.done()]:
+                    shard = uploads.pop(future)
+                    try:
+                        self._track(future.result())
+                    except Exception as e:
+                        print(f"Submitting {len(shard)} files failed: {e}")
+                        for path in shard:
+                            self.manifest.set_file_state(path, FAILED, error=str(e))
+
+                self.poller.poll_due()
+
+                if self._active or uploads:
+                    next_due = self.poller.next_due() or time.monotonic() + 1
+                    time.sleep(max(0.0, min(next_due - time.monotonic(), 1.0 if uploads else self.max_poll_interval)))
+
+        counts = self.manifest.counts()
+        print(f"Corpus run finished: {counts}")
+        return counts
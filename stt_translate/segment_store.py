@@ -0,0 +1,300 @@
+"""One queryable table of every transcribed or translated segment.
+
+Runs used to leave one ``.txt`` per input, with no timing, language or
+provenance. Sarvam batch outputs were left as raw JSON. A ``SegmentStore``
+keeps one row per chunk or segment in a single SQLite file
+(``output/segments.sqlite``, ``STT_SEGMENT_STORE``). Each row holds the
+source file, chunk index, start/end seconds, language, native text, English
+text, provider, model and request latency. Every processed file is written in
+one transaction as soon as it finishes, replacing that file's earlier rows for
+the same provider/model, so a crash loses at most the file in progress. Reads
+go through SQLite's memory-mapped I/O (``STT_SEGMENT_MMAP_MB``, default
+``1024``), and queries stream rows from a cursor. Analytics over a large
+corpus are SQL aggregates rather than walks over millions of small files.
+
+``python -m stt_translate segments`` prints a per-provider/model summary,
+re-exports per-file ``txt``/``srt``/``vtt`` from the table, and imports
+outputs written before the store existed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import astuple, dataclass, fields
+
+from stt_translate.stitch import repr_language, repr_transcripts
+
+DEFAULT_STORE_PATH = os.path.join("output", "segments.sqlite")
+DEFAULT_MMAP_MB = 1024
+EXPORT_FORMATS = ("txt", "srt", "vtt")
+
+
+@dataclass
+class StoredSegment:
+    start: float  # seconds in the source audio
+    end: float
+    native_text: str = ""
+    english_text: str = ""
+    language: str = None
+    latency: float = None  # seconds the request for this chunk took
+    chunk_index: int = 0
+    source: str = None  # filled in by ``SegmentStore.replace_file``
+    provider: str = None
+    model: str = None
+
+
+COLUMNS = [field.name for field in fields(StoredSegment)]
+
+
+class SegmentStore:
+    """SQLite table of ``StoredSegment`` rows, safe to share between threads."""
+
+    def __init__(self, path=None, mmap_mb=None):
+        path = path or os.getenv("STT_SEGMENT_STORE", DEFAULT_STORE_PATH)
+        if mmap_mb is None:
+            mmap_mb = int(os.getenv("STT_SEGMENT_MMAP_MB", DEFAULT_MMAP_MB))
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            f"""
+            PRAGMA journal_mode=WAL;
+            PRAGMA mmap_size={mmap_mb * 1024 * 1024};
+            CREATE TABLE IF NOT EXISTS segments (
+                start REAL,
+                end REAL,
+                native_text TEXT NOT NULL,
+                english_text TEXT NOT NULL,
+                language TEXT,
+                latency REAL,
+                chunk_index INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS segments_source ON segments (source, provider, model, chunk_index);
+            CREATE INDEX IF NOT EXISTS segments_model ON segments (provider, model);
+            """
+        )
+        self._conn.commit()
+
+    def replace_file(self, source, provider, model, segments):
+        """Store ``segments`` as ``source``'s result from ``provider``/``model``, dropping earlier rows."""
+        now = time.time()
+        rows = []
+        for index, segment in enumerate(segments):
+            segment.source, segment.provider, segment.model = source, provider, model
+            segment.chunk_index = segment.chunk_index or index
+            segment.native_text, segment.english_text = segment.native_text or "", segment.english_text or ""
+            rows.append(astuple(segment) + (now,))
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM segments WHERE source = ? AND provider = ? AND model = ?",
+                                   (source, provider, model))
+                self._conn.executemany(f"INSERT INTO segments VALUES ({', '.join('?' * (len(COLUMNS) + 1))})", rows)
+
+    def query(self, source=None, provider=None, model=None, language=None, batch_size=1000):
+        """Yield matching ``StoredSegment``s ordered by source, provider, model and chunk."""
+        filters = {"source": source, "provider": provider, "model": model, "language": language}
+        where = [f"{name} = ?" for name, value in filters.items() if value is not None]
+        sql = (f"SELECT {', '.join(COLUMNS)} FROM segments"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + " ORDER BY source, provider, model, chunk_index")
+        with self._lock:
+            cursor = self._conn.execute(sql, [value for value in filters.values() if value is not None])
+            rows = cursor.fetchmany(batch_size)
+        while rows:
+            yield from (StoredSegment(*row) for row in rows)
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+
+    def summary(self):
+        """[(provider, model, files, segments, audio hours, mean latency)] over the whole store."""
+        with self._lock:
+            return self._conn.execute(
+                """
+                SELECT provider, model, COUNT(DISTINCT source), COUNT(*),
+                       COALESCE(SUM(end - start), 0) / 3600.0, AVG(latency)
+                FROM segments GROUP BY provider, model ORDER BY provider, model
+                """
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _timestamp(seconds, separator):
+    millis = round((seconds or 0.0) * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    seconds, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}"
+
+
+def _text(segment, english):
+    return (segment.english_text if english else segment.native_text) or ""
+
+
+def to_text(segments, english=False):
+    return " ".join(_text(segment, english).strip() for segment in segments).strip()
+
+
+def to_srt(segments, english=False):
+    cues = []
+    for number, segment in enumerate(segments, 1):
+        cues.append(f"{number}\n{_timestamp(segment.start, ',')} --> {_timestamp(segment.end, ',')}\n"
+                    f"{_text(segment, english).strip()}\n")
+    return "\n".join(cues)
+
+
+def to_vtt(segments, english=False):
+    cues = [f"{_timestamp(segment.start, '.')} --> {_timestamp(segment.end, '.')}\n{_text(segment, english).strip()}\n"
+            for segment in segments]
+    return "\n".join(["WEBVTT\n"] + cues)
+
+
+def _safe_part(part):
+    return re.sub(r'[<>:"|?*\x00-\x1f]', "_", part)
+
+
+def export_stem(source, input_root=None):
+    """Relative output path (no extension) for ``source``.
+
+    Sources under ``input_root`` keep their layout below it. Anything else (absolute Windows paths,
+    ``..``, other drives) becomes its basename plus a digest of the full path, so it cannot leave the
+    export directory and two files of the same name do not collide.
+    """
+    if input_root:
+        try:
+            relative = os.path.relpath(os.path.abspath(source), os.path.abspath(input_root))
+        except ValueError:  # another drive on Windows
+            relative = None
+        parts = re.split(r"[\\/]+", relative) if relative else []
+        if parts and not os.path.isabs(relative) and all(part not in ("", ".", "..") for part in parts):
+            return os.path.join(*(_safe_part(part) for part in parts[:-1]), _safe_part(os.path.splitext(parts[-1])[0]))
+    name = re.split(r"[\\/]", source)[-1]
+    name = _safe_part(os.path.splitext(name)[0]).strip(". ") or "audio"
+    return f"{name}-{hashlib.sha256(source.encode('utf-8')).hexdigest()[:8]}"
+
+
+def export(store, output_dir, fmt="txt", english=False, input_root=None, **filters):
+    """Write one ``fmt`` file per source/provider/model matching ``filters``; returns the paths.
+
+    Files are laid out as ``<output_dir>/<provider>/<model>/<export_stem(source, input_root)>``.
+    """
+    render = {"txt": to_text, "srt": to_srt, "vtt": to_vtt}[fmt]
+    saved, group, key = [], [], None
+    root = os.path.abspath(output_dir)
+
+    def flush():
+        source, provider, model = key
+        target = os.path.join(output_dir, _safe_part(provider), _safe_part(model),
+                              export_stem(source, input_root) + (".en" if english else "") + f".{fmt}")
+        if os.path.commonpath([root, os.path.abspath(target)]) != root:
+            raise ValueError(f"Export path for {source} resolves outside {output_dir}: {target}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(render(group, english))
+        saved.append(target)
+
+    for segment in store.query(**filters):
+        if (segment.source, segment.provider, segment.model) != key:
+            if group:
+                flush()
+            group, key = [], (segment.source, segment.provider, segment.model)
+        group.append(segment)
+    if group:
+        flush()
+    return saved
+
+
+def sarvam_batch_segments(data, translate=False):
+    """``StoredSegment``s of one parsed Sarvam batch output (timestamped sentences when present)."""
+    language = data.get("language_code")
+    stamps = data.get("timestamps") or {}
+    entries = (data.get("diarized_transcript") or {}).get("entries") or []
+    if stamps.get("words"):
+        timed = zip(stamps["words"], stamps["start_time_seconds"], stamps["end_time_seconds"])
+    elif entries:
+        timed = [(entry["transcript"], entry["start_time_seconds"], entry["end_time_seconds"]) for entry in entries]
+    else:
+        timed = [(data.get("transcript") or "", None, None)]
+    field = "english_text" if translate else "native_text"
+    return [StoredSegment(start, end, language=language, chunk_index=index, **{field: text.strip()})
+            for index, (text, start, end) in enumerate(timed)]
+
+
+def file_segments(path, translate=False):
+    """``StoredSegment``s of an output file written before the store: batch/combined JSON or text."""
+    from stt_translate.gemini_combined import records_from_json
+
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    if path.endswith("_segments.json"):
+        return [StoredSegment(record.start, record.end, record.native_text, record.english_text, record.language)
+                for record in records_from_json(content)]
+    if path.endswith(".json"):
+        return sarvam_batch_segments(json.loads(content), translate)
+    text = " ".join(repr_transcripts(content)) or content
+    field = "english_text" if translate else "native_text"
+    return [StoredSegment(None, None, language=repr_language(content), **{field: text.strip()})]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m stt_translate segments",
+                                     description="Summarize, export or import the segment store")
+    parser.add_argument("--store", help=f"Segment store path (default STT_SEGMENT_STORE or {DEFAULT_STORE_PATH})")
+    actions = parser.add_subparsers(dest="action", required=True)
+    actions.add_parser("summary", help="Files, segments, audio hours and latency per provider/model")
+    export_parser = actions.add_parser("export", help="Write per-file text or subtitles from the store")
+    export_parser.add_argument("--output-dir", default="output/export")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="txt")
+    export_parser.add_argument("--english", action="store_true", help="Export English instead of native text")
+    export_parser.add_argument("--input-root", help="Mirror source paths below this directory "
+                                                    "(default: basename plus a digest of the source path)")
+    for name in ("source", "provider", "model", "language"):
+        export_parser.add_argument(f"--{name}", help=f"Only rows with this {name}")
+    import_parser = actions.add_parser("import", help="Load .txt/.json outputs written by earlier runs or scripts")
+    import_parser.add_argument("inputs", nargs="+", help="Output files or directories")
+    import_parser.add_argument("--provider", required=True)
+    import_parser.add_argument("--model", required=True)
+    import_parser.add_argument("--translate", action="store_true", help="The outputs hold English translations")
+    args = parser.parse_args(argv)
+
+    store = SegmentStore(args.store)
+    try:
+        if args.action == "summary":
+            print(f"{'provider':<10} {'model':<28} {'files':>7} {'segments':>9} {'hours':>9} {'latency':>8}")
+            for provider, model, files, segments, hours, latency in store.summary():
+                latency = f"{latency:.2f}s" if latency is not None else "-"
+                print(f"{provider:<10} {model:<28} {files:>7} {segments:>9} {hours:>9.2f} {latency:>8}")
+        elif args.action == "export":
+            filters = {name: getattr(args, name) for name in ("source", "provider", "model", "language")}
+            saved = export(store, args.output_dir, args.format, english=args.english, input_root=args.input_root,
+                           **filters)
+            print(f"Exported {len(saved)} files under: {args.output_dir}")
+        else:
+            paths = []
+            for path in args.inputs:
+                if os.path.isdir(path):
+                    paths.extend(os.path.join(root, name) for root, _, names in os.walk(path) for name in sorted(names)
+                                 if name.endswith((".txt", ".json")) and not name.endswith(".failed.json"))
+                else:
+                    paths.append(path)
+            for path in paths:
+                store.replace_file(path, args.provider, args.model, file_segments(path, args.translate))
+            print(f"Imported {len(paths)} files into: {store.path}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
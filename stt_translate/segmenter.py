@@ -0,0 +1,130 @@
+"""Energy-based speech segmenter that cuts chunks at pauses.
+
+Fixed 29 s cuts split words in half and still send (and bill) long silences.
+The segmenter looks at 30 ms frame energies, drops silence outside speech,
+and packs speech into chunks of at most ``max_chunk`` seconds, cutting at the
+latest pause that fits. It works incrementally on PCM blocks so it can sit
+behind the ffmpeg pipe in ``stt_translate.chunking``.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class SegmenterStats:
+    input_seconds: float = 0.0
+    kept_seconds: float = 0.0
+    chunks: int = 0
+    forced_cuts: int = 0  # cuts made mid-speech because no pause fitted
+
+    @property
+    def removed_seconds(self):
+        return self.input_seconds - self.kept_seconds
+
+    def summary(self):
+        share = 100 * self.removed_seconds / self.input_seconds if self.input_seconds else 0.0
+        return (
+            f"{self.chunks} chunks, {self.kept_seconds:.1f}s of {self.input_seconds:.1f}s kept, "
+            f"{self.removed_seconds:.1f}s of silence removed ({share:.1f}%)"
+        )
+
+
+def frame_energy_db(samples, frame_len):
+    """RMS level of each whole frame of int16 samples, in dBFS."""
+    n_frames = len(samples) // frame_len
+    frames = samples[: n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames / 32768.0), axis=1) + 1e-12)
+    return 20 * np.log10(rms)
+
+
+def silence_runs(speech):
+    """(start, end) frame ranges of consecutive non-speech frames."""
+    padded = np.concatenate(([True], speech, [True]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+class SilenceSegmenter:
+    """Incrementally turns 16-bit mono PCM into speech-only chunks.
+
+    ``feed`` and ``flush`` yield ``(start_seconds, end_seconds, samples)``
+    tuples, where the times are positions in the source audio and
+    ``samples`` is an int16 array. ``stats`` reports how much audio was
+    dropped.
+    """
+
+    def __init__(self, sample_rate=16000, max_chunk=29.0, frame_ms=30,
+                 threshold_db=-40.0, min_silence=0.3, padding=0.15):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.max_frames = int(max_chunk * 1000 // frame_ms)
+        self.threshold_db = threshold_db
+        self.min_silence_frames = max(1, round(min_silence * 1000 / frame_ms))
+        self.pad_frames = round(padding * 1000 / frame_ms)
+        self.stats = SegmenterStats()
+        self._buffer = np.zeros(0, dtype=np.int16)
+        self._offset = 0  # source sample index of self._buffer[0]
+
+    def feed(self, pcm):
+        samples = np.frombuffer(pcm, dtype="<i2")
+        self.stats.input_seconds += len(samples) / self.sample_rate
+        self._buffer = np.concatenate((self._buffer, samples))
+        yield from self._drain(final=False)
+
+    def flush(self):
+        yield from self._drain(final=True)
+
+    def _consume(self, n_samples):
+        self._buffer = self._buffer[n_samples:]
+        self._offset += n_samples
+
+    def _emit(self, n_frames):
+        n_samples = min(n_frames * self.frame_len, len(self._buffer))
+        start = self._offset / self.sample_rate
+        end = (self._offset + n_samples) / self.sample_rate
+        samples = self._buffer[:n_samples].copy()
+        self.stats.kept_seconds += end - start
+        self.stats.chunks += 1
+        return start, end, samples
+
+    def _drain(self, final):
+        while True:
+            n_frames = len(self._buffer) // self.frame_len
+            # Keep a full window of lookahead so the cut can land on the latest pause
+            if not final and n_frames <= self.max_frames:
+                return
+            energy = frame_energy_db(self._buffer, self.frame_len)
+            speech = energy > self.threshold_db
+            voiced = np.flatnonzero(speech)
+
+            if voiced.size == 0:
+                self._consume(len(self._buffer) if final else n_frames * self.frame_len)
+                return
+
+            first = max(int(voiced[0]) - self.pad_frames, 0)
+            if first > 0:
+                self._consume(first * self.frame_len)
+                continue
+
+            last = min(int(voiced[-1]) + 1 + self.pad_frames, n_frames)
+            if final and last <= self.max_frames:
+                yield self._emit(last)
+                self._consume(len(self._buffer))
+                return
+
+            emit_frames, resume_frames = self._find_cut(speech[: self.max_frames], energy[: self.max_frames])
+            yield self._emit(emit_frames)
+            self._consume(resume_frames * self.frame_len)
+
+    def _find_cut(self, speech, energy):
+        """Pick (frames to emit, frames to skip) inside one max-length window."""
+        for start, end in reversed(silence_runs(speech)):
+            if start > 0 and end - start >= self.min_silence_frames:
+                emit = min(start + self.pad_frames, end)
+                return emit, max(end - self.pad_frames, emit)
+        # No usable pause: cut at the quietest frame in the back half of the window
+        self.stats.forced_cuts += 1
+        half = len(energy) // 2
+        cut = half + int(np.argmin(energy[half:]))
+        return max(cut, 1), max(cut, 1)
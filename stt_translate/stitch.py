@@ -0,0 +1,207 @@
+"""Join transcripts of overlapping chunks without repeating the overlap.
+
+Neighbouring chunks from ``stream_chunks(..., overlap=N)`` share N seconds
+of audio, so the end of one transcript and the start of the next repeat the
+same words. Either may also hold a half word cut at the boundary. When both
+pieces carry word timestamps, each word is kept by the chunk whose half of
+the overlap it falls in. Otherwise the longest run of words that ends one
+piece and starts the next is found with a KMP prefix function, allowing
+one cut word on either side. A cut word that is a fragment (or a close
+misspelling) of the full word on the other side counts towards the match,
+so a one-word overlap next to a cut word is still found. If that fails too,
+the overlap is split evenly by speaking rate. Each boundary only looks at a window of words
+sized to the overlap, so stitching is linear in the transcript length.
+
+Word timings come from Sarvam's ``with_timestamps`` option, which the
+overlapping transcribe paths request (``response_words``). Translations carry
+no timestamps, so they are always aligned by text.
+"""
+import json
+import re
+import unicodedata
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+
+MIN_MATCH = 2  # shortest word run accepted as a real overlap
+FUZZY_RATIO = 0.75  # similarity at which a garbled cut word counts as the full word
+WINDOW_FACTOR = 2.0  # words looked at per boundary, relative to the words expected in the overlap
+
+# ``transcript='...'`` / ``language_code='...'`` fields of a saved Sarvam response repr
+REPR_FIELD = r"{}=(?P<quote>['\"])(?P<text>.*?)(?<!\\)(?P=quote)"
+REPR_TRANSCRIPT = re.compile(REPR_FIELD.format("transcript"), re.S)
+REPR_LANGUAGE = re.compile(REPR_FIELD.format("language_code"))
+
+
+@dataclass
+class TimedText:
+    start: float  # seconds in the source audio
+    end: float
+    text: str
+    words: list = None  # optional [(word, start, end)] in source seconds
+
+
+def normalize(word):
+    """Case-folded word without punctuation; keeps Indic vowel signs intact."""
+    return "".join(ch for ch in word.casefold() if not unicodedata.category(ch).startswith("P"))
+
+
+def response_text(response):
+    """Plain transcript of a Sarvam response (``str(response)`` is the whole model repr)."""
+    return getattr(response, "transcript", None) or str(response)
+
+
+def response_words(response, offset=0.0):
+    """``[(word, start, end)]`` in source seconds from a Sarvam response's ``timestamps``, or None.
+
+    Sarvam times whole phrases, so each phrase's span is shared evenly among its words.
+    ``offset`` is the chunk's start in the source audio.
+    """
+    stamps = getattr(response, "timestamps", None)
+    if stamps is None:
+        return None
+    get = stamps.get if isinstance(stamps, dict) else lambda name: getattr(stamps, name, None)
+    words = []
+    for phrase, start, end in zip(get("words") or [], get("start_time_seconds") or [], get("end_time_seconds") or []):
+        parts = phrase.split()
+        step = (end - start) / max(len(parts), 1)
+        words.extend((word, offset + start + i * step, offset + start + (i + 1) * step) for i, word in enumerate(parts))
+    return words or None
+
+
+def dump_piece(piece):
+    """Cache value holding a piece's text and word timings."""
+    return json.dumps({"text": piece.text, "words": piece.words}, ensure_ascii=False)
+
+
+def load_piece(start, end, value):
+    """``TimedText`` back from ``dump_piece``'s value."""
+    data = json.loads(value)
+    return TimedText(start, end, data["text"], [tuple(word) for word in data["words"]] if data["words"] else None)
+
+
+def _unescape(text):
+    return text.replace("\\'", "'").replace('\\"', '"').replace("\\n", "\n")
+
+
+def repr_transcripts(text):
+    """Transcripts inside ``text`` made of saved Sarvam response reprs; empty if there are none."""
+    return [_unescape(match.group("text")) for match in REPR_TRANSCRIPT.finditer(text)]
+
+
+def repr_language(text):
+    """``language_code`` of the first Sarvam response repr in ``text``, or None."""
+    match = REPR_LANGUAGE.search(text)
+    return match.group("text") if match else None
+
+
+def suffix_prefix_overlap(left, right):
+    """Length of the longest suffix of ``left`` that is also a prefix of ``right``."""
+    sequence = right + [None] + left
+    prefix = [0] * len(sequence)
+    for i in range(1, len(sequence)):
+        k = prefix[i - 1]
+        while k and sequence[i] != sequence[k]:
+            k = prefix[k - 1]
+        if sequence[i] == sequence[k]:
+            k += 1
+        prefix[i] = k
+    return prefix[-1] if sequence else 0
+
+
+def _partial(cut, full):
+    """True when ``cut`` looks like ``full`` cut at the boundary: a fragment of it, or a near match."""
+    if not cut or not full:
+        return False
+    if len(cut) >= 2 and (full.startswith(cut) or full.endswith(cut)):
+        return True
+    return SequenceMatcher(None, cut, full).ratio() >= FUZZY_RATIO
+
+
+def _window(piece, words, overlap):
+    duration = max(piece.end - piece.start, 1e-6)
+    expected = len(words) / duration * overlap
+    return max(MIN_MATCH + 2, int(expected * WINDOW_FACTOR) + 2)
+
+
+def _merge_by_text(left, right, left_piece, right_piece, overlap):
+    """(words to keep from ``left``, words to skip from ``right``) for one boundary."""
+    window = max(_window(left_piece, left, overlap), _window(right_piece, right, overlap))
+    tail = [normalize(word) for word in left[-window:]]
+    head = [normalize(word) for word in right[:window]]
+    best = None
+    # A word cut at the boundary may be garbled at the end of left or the start of right
+    for trim_left, trim_right in ((0, 0), (1, 0), (0, 1), (1, 1)):
+        length = suffix_prefix_overlap(tail[: len(tail) - trim_left], head[trim_right:])
+        if not length:
+            continue
+        # A trimmed word that is part of the word beside the match on the other side backs the match up
+        score = length
+        if trim_right and len(tail) - trim_left - length > 0:
+            score += _partial(head[0], tail[len(tail) - trim_left - length - 1])
+        if trim_left and trim_right + length < len(head):
+            score += _partial(tail[-1], head[trim_right + length])
+        if score >= MIN_MATCH and (best is None or score > best[0]):
+            best = (score, length, trim_left, trim_right)
+    if best is not None:
+        _, length, trim_left, trim_right = best
+        return len(left) - trim_left, trim_right + length
+
+    # No reliable match: assume even speech and give each side half of the overlap
+    left_rate = len(left) / max(left_piece.end - left_piece.start, 1e-6)
+    right_rate = len(right) / max(right_piece.end - right_piece.start, 1e-6)
+    half = overlap / 2
+    return len(left) - min(len(left), round(left_rate * half)), min(len(right), round(right_rate * half))
+
+
+class Stitcher:
+    """Incremental ``stitch``: add pieces in order as they arrive.
+
+    ``add`` returns the words the piece contributes beyond the overlap with
+    the previous one. ``text`` is the transcript so far. A boundary may
+    retract the last word or so of the previous piece (a cut word or words
+    past the timestamp midpoint), so only ``text`` is authoritative.
+    """
+
+    def __init__(self, overlap):
+        self.overlap = overlap
+        self.words = []
+        self._previous = None
+        self._tail = []  # words the previous piece added to self.words
+        self._timed = None  # word timings of self._tail, when known
+
+    def add(self, piece):
+        words = piece.text.split() if piece.text else []
+        if not words:
+            return []
+        previous, tail = self._previous, self._tail
+        # Timings are only usable when they line up one to one with the transcript's words
+        timed = piece.words if piece.words and len(piece.words) == len(words) else None
+        if previous is None or self.overlap <= 0:
+            keep, new = len(tail), words
+        elif self._timed and len(self._timed) == len(tail) and timed:
+            cut = (piece.start + previous.end) / 2
+            keep = sum(1 for _, start, end in self._timed if (start + end) / 2 < cut)
+            timed = [entry for entry in timed if (entry[1] + entry[2]) / 2 >= cut]
+            new = words[len(words) - len(timed):]
+        else:
+            keep, skip = _merge_by_text(tail, words, previous, piece, self.overlap)
+            new, timed = words[skip:], None
+        del self.words[len(self.words) - (len(tail) - keep):]
+        self.words.extend(new)
+        self._previous, self._tail, self._timed = piece, new, timed
+        return new
+
+    @property
+    def text(self):
+        return " ".join(self.words)
+
+
+def stitch(pieces, overlap):
+    """Join ``TimedText`` pieces (in order) whose audio overlaps by ``overlap`` seconds."""
+    pieces = [piece for piece in pieces if piece.text and piece.text.strip()]
+    if overlap <= 0:
+        return " ".join(piece.text.strip() for piece in pieces)
+    stitcher = Stitcher(overlap)
+    for piece in pieces:
+        stitcher.add(piece)
+    return stitcher.text
@@ -0,0 +1,160 @@
+"""Low-latency streaming transcription of a live or growing audio source.
+
+``stream_transcripts`` decodes a file that is still being written, a pipe,
+or stdin (``"-"``) through ffmpeg and cuts a rolling window every ``window``
+seconds of audio as it arrives. It does not wait for the whole input.
+Up to ``max_in_flight`` windows are transcribed at once. Results come back
+in window order as ``StreamResult`` partials, followed by one final result
+with the stitched transcript. A file replayed with ``realtime=True`` arrives
+at 1x speed, which is the easiest way to see time-to-first-text.
+
+The sync provider SDK calls run in worker threads under the usual
+``RetryPolicy``, so the event loop only reads audio and orders results.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+
+from stt_translate.chunking import SAMPLE_RATE, SAMPLE_WIDTH, AudioChunk, ChunkFailure, pcm_command, pcm_to_wav
+from stt_translate.concurrency import RetryPolicy, call_with_retry
+from stt_translate.stitch import Stitcher, TimedText
+
+WINDOW_SECONDS = 5.0  # audio per request; shorter windows give earlier text but lose context
+
+
+@dataclass
+class StreamResult:
+    index: int  # window number; the final result repeats the last one
+    start: float  # seconds in the source audio
+    end: float
+    text: str  # words this window added (partial) or the whole transcript (final)
+    transcript: str  # stitched transcript so far
+    latency: float  # seconds from the window's audio being read to this result
+    final: bool = False
+
+
+async def _read_exact(stream, size):
+    try:
+        return await stream.readexactly(size)
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+
+
+async def iter_windows(source, window=WINDOW_SECONDS, overlap=0.0, sample_rate=SAMPLE_RATE,
+                       realtime=False, follow=False):
+    """Yield ``AudioChunk``s of ``window`` seconds as soon as each one has been decoded.
+
+    Windows overlap like ``stream_chunks``; the last may be shorter.
+    """
+    if not 0 <= overlap < window:
+        raise ValueError("overlap must be at least 0 and shorter than window")
+    base_name = "stdin" if source == "-" else os.path.splitext(os.path.basename(source))[0]
+    bytes_per_second = sample_rate * SAMPLE_WIDTH
+    overlap_bytes = int(overlap * sample_rate) * SAMPLE_WIDTH
+    step_bytes = int(window * sample_rate) * SAMPLE_WIDTH - overlap_bytes
+
+    process = await asyncio.create_subprocess_exec(
+        *pcm_command(source, sample_rate, realtime=realtime, follow=follow),
+        stdin=None if source == "-" else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        offset = 0
+        tail = b""
+        index = 0
+        while True:
+            pcm = await _read_exact(process.stdout, step_bytes)
+            pcm = pcm[: len(pcm) - len(pcm) % SAMPLE_WIDTH]
+            if not pcm:
+                break
+            data = tail + pcm
+            start = (offset - len(tail)) / bytes_per_second
+            offset += len(pcm)
+            yield AudioChunk(
+                index=index,
+                start=start,
+                end=offset / bytes_per_second,
+                data=pcm_to_wav(data, sample_rate),
+                filename=f"{base_name}_{index:03d}.wav",
+            )
+            tail = data[len(data) - overlap_bytes:] if overlap_bytes else b""
+            index += 1
+        stderr = await process.stderr.read()
+        if await process.wait() != 0:
+            message = stderr.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed on '{source}' (code {process.returncode}): {message}")
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+async def stream_transcripts(source, transcribe, window=WINDOW_SECONDS, overlap=0.0, max_in_flight=4,
+                             realtime=False, follow=False, retry=None, failures=None, sample_rate=SAMPLE_RATE):
+    """Async iterator of ``StreamResult``s for ``source``, in window order.
+
+    ``transcribe(chunk)`` is a blocking call returning the text of one
+    ``AudioChunk``. Windows that still fail after ``retry`` give a
+    placeholder and a ``ChunkFailure`` in ``failures``. Reading stops while
+    ``max_in_flight`` windows are pending, so a slow provider holds back
+    ffmpeg instead of buffering the whole input.
+    """
+    retry = retry or RetryPolicy()
+    slots = asyncio.Semaphore(max_in_flight)
+    pending = asyncio.Queue()
+
+    async def run(chunk):
+        try:
+            text = await asyncio.to_thread(call_with_retry, transcribe, chunk, retry)
+            if isinstance(text, TimedText):
+                return text
+        except Exception as e:
+            failure = ChunkFailure.from_error(chunk, e)
+            print(f"{source}: window {chunk.index + 1} failed after retries: {failure.error}")
+            if failures is not None:
+                failures.append(failure)
+            text = failure.placeholder()
+        finally:
+            slots.release()
+        return TimedText(chunk.start, chunk.end, text)
+
+    async def produce():
+        try:
+            async for chunk in iter_windows(source, window, overlap, sample_rate, realtime, follow):
+                await slots.acquire()
+                pending.put_nowait((chunk, time.monotonic(), asyncio.create_task(run(chunk))))
+        finally:
+            pending.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    stitcher = Stitcher(overlap)
+    last = None
+    try:
+        while (item := await pending.get()) is not None:
+            chunk, read_at, task = item
+            piece = await task
+            added = stitcher.add(piece)
+            last = StreamResult(chunk.index, chunk.start, chunk.end, " ".join(added), stitcher.text,
+                                time.monotonic() - read_at)
+            yield last
+        await producer  # surfaces ffmpeg errors
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if item is not None:
+                item[2].cancel()
+
+    if last is not None:
+        yield StreamResult(last.index, 0.0, last.end, stitcher.text, stitcher.text, last.latency, final=True)
+
+
+async def run_stream(source, transcribe, on_result, **options):
+    """Call ``on_result(result)`` for every ``StreamResult``; returns the final transcript."""
+    transcript = ""
+    async for result in stream_transcripts(source, transcribe, **options):
+        on_result(result)
+        transcript = result.transcript
+    return transcript
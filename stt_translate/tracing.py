@@ -0,0 +1,299 @@
+"""Spans and metrics that show where a run spends its time.
+
+The scripts only print one ``Total transcription time``, which lumps
+imports, ffmpeg and every API call together. With tracing on, each stage of
+a run is a span: ``file``, ``extract``, ``split``, ``encode``, ``upload``,
+``request``, ``poll``, ``download`` and ``write``. Spans carry attributes
+such as provider, model, chunk index, bytes and tokens. A span opened inside
+another span (including one in a ``map_ordered`` worker thread) records
+it as its parent, and inherits its provider and model.
+
+Two exporters, each switched on separately:
+
+* ``STT_TRACE_FILE`` (or ``--trace``): every finished span is appended to a
+  JSON trace in Chrome trace-event format. Open it in Perfetto
+  (ui.perfetto.dev) or ``chrome://tracing`` to see stages and threads on a
+  timeline. The file is valid while the run is still going.
+* ``STT_METRICS_PORT`` (or ``--metrics-port``): a Prometheus text endpoint at
+  ``http://127.0.0.1:<port>/metrics`` (``STT_METRICS_HOST`` binds another address). It has span-duration histograms
+  and span, error, byte and token counters, labelled by span name, provider
+  and model.
+
+With neither set, spans cost a context-variable switch and nothing is kept.
+When tracing is on, a per-stage summary is printed at exit.
+"""
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LABELS = ("provider", "model")  # span attributes that become metric labels and pass to child spans
+COUNTED = ("bytes", "input_tokens", "output_tokens")  # numeric span attributes summed into counters
+
+_current = contextvars.ContextVar("stt_translate_span", default=None)
+
+
+class Span:
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = {key: parent.attributes[key] for key in LABELS if parent and key in parent.attributes}
+        self.set(**attributes)
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes):
+        """Add attributes known only once the work is done (bytes sent, tokens billed...)."""
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in sorted(labels.items()))
+
+
+class Metrics:
+    """Prometheus-style counters and histograms fed by finished spans (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)  # (metric, labels) -> value
+        self.histograms = {}  # labels -> [count per bucket..., +Inf count, sum]
+
+    def observe(self, span):
+        labels = _labels(span=span.name, **{key: span.attributes[key] for key in LABELS if key in span.attributes})
+        with self._lock:
+            buckets = self.histograms.setdefault(labels, [0] * (len(BUCKETS) + 1) + [0.0])
+            for index, bound in enumerate(BUCKETS + (float("inf"),)):
+                if span.duration <= bound:
+                    buckets[index] += 1
+            buckets[-1] += span.duration
+            self.counters[("stt_spans_total", labels)] += 1
+            if span.error:
+                self.counters[("stt_span_errors_total", labels)] += 1
+            for name in COUNTED:
+                value = span.attributes.get(name)
+                if isinstance(value, (int, float)):
+                    self.counters[(f"stt_{name}_total", labels)] += value
+
+    def render(self):
+        """Metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = ["# TYPE stt_span_seconds histogram"]
+            for labels, buckets in sorted(self.histograms.items()):
+                for bound, count in zip(BUCKETS + ("+Inf",), buckets):
+                    lines.append(f'stt_span_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"stt_span_seconds_sum{{{labels}}} {buckets[-1]:.6f}")
+                lines.append(f"stt_span_seconds_count{{{labels}}} {buckets[-2]}")
+            for metric in sorted({metric for metric, _ in self.counters}):
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{{{labels}}} {value:g}"
+                             for (name, labels), value in sorted(self.counters.items()) if name == metric)
+        return "\n".join(lines) + "\n"
+
+    def totals(self):
+        """{span name: [count, seconds]} summed over providers and models."""
+        totals = defaultdict(lambda: [0, 0.0])
+        with self._lock:
+            for labels, buckets in self.histograms.items():
+                name = labels.split('span="', 1)[1].split('"', 1)[0]
+                totals[name][0] += buckets[-2]
+                totals[name][1] += buckets[-1]
+        return dict(totals)
+
+    def counter(self, metric, span=None):
+        """Total of counter ``metric`` (e.g. ``stt_input_tokens_total``), optionally for one span name."""
+        wanted = f'span="{span}"'
+        with self._lock:
+            return sum(value for (name, labels), value in self.counters.items()
+                       if name == metric and (span is None or wanted in labels.split(",")))
+
+    def summary(self):
+        """Seconds, count and mean per span name, busiest first."""
+        totals = self.totals()
+        lines = [f"{'stage':<10} {'spans':>7} {'seconds':>10} {'mean':>8}"]
+        for name, (count, seconds) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<10} {count:>7} {seconds:>10.2f} {seconds / count:>8.3f}")
+        return "\n".join(lines)
+
+
+class MetricsServer:
+    """Serves ``metrics.render()`` at ``/metrics`` from a daemon thread."""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Tracer:
+    """Opens spans and hands finished ones to the trace file and the metrics."""
+
+    def __init__(self, trace_file=None, metrics_port=None, metrics_host=None, collect=False):
+        self.metrics = Metrics()
+        # ``collect`` keeps metrics in memory with neither exporter, for ``capture``
+        self.enabled = bool(trace_file) or metrics_port is not None or collect
+        self._lock = threading.Lock()
+        self._file = None
+        self._events = 0
+        self.server = None
+        if trace_file:
+            if os.path.dirname(trace_file):
+                os.makedirs(os.path.dirname(trace_file), exist_ok=True)
+            # The trace-event array format tolerates a missing "]", so the file is usable mid-run
+            self._file = open(trace_file, "w", encoding="utf-8")
+            self._file.write("[")
+            self.trace_file = trace_file
+        if metrics_port is not None:
+            host = metrics_host or "127.0.0.1"
+            self.server = MetricsServer(self.metrics, metrics_port, host)
+            print(f"Metrics at http://{host}:{self.server.port}/metrics")
+
+    @contextmanager
+    def span(self, name, **attributes):
+        span = Span(name, _current.get(), attributes)
+        token = _current.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current.reset(token)
+            if self.enabled:
+                self._finish(span)
+
+    def _finish(self, span):
+        self.metrics.observe(span)
+        if self._file is None:
+            return
+        event = {
+            "name": span.name,
+            "cat": "stt",
+            "ph": "X",
+            "ts": round(span.start * 1e6),
+            "dur": round(span.duration * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {**span.attributes, "span_id": span.span_id, "parent_id": span.parent_id,
+                     **({"error": span.error} if span.error else {})},
+        }
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(("\n" if not self._events else ",\n") + line)
+                self._file.flush()
+                self._events += 1
+
+    def close(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._file.write("\n]\n")
+                self._file.close()
+                print(f"Trace written to: {self.trace_file}")
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        if self.metrics.histograms:
+            print("Time per stage (summed over threads):\n" + self.metrics.summary())
+        self.enabled = False
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def configure(trace_file=None, metrics_port=None, metrics_host=None):
+    """Install the process-wide tracer; arguments default to the ``STT_TRACE_FILE``/``STT_METRICS_*`` variables."""
+    global _tracer
+    trace_file = trace_file or os.getenv("STT_TRACE_FILE") or None
+    if metrics_port is None and os.getenv("STT_METRICS_PORT"):
+        metrics_port = int(os.getenv("STT_METRICS_PORT"))
+    metrics_host = metrics_host or os.getenv("STT_METRICS_HOST") or None
+    previous, _tracer = _tracer, Tracer(trace_file, metrics_port, metrics_host)
+    if previous is not None:
+        previous.close()
+    atexit.register(_tracer.close)
+    return _tracer
+
+
+@contextmanager
+def capture():
+    """Swap in an in-memory tracer for the duration of the block; yields its ``Metrics``.
+
+    The benchmark reads stage times and token counts from the spans the pipeline already emits.
+    """
+    global _tracer
+    with _tracer_lock:
+        previous, _tracer = _tracer, Tracer(collect=True)
+    try:
+        yield _tracer.metrics
+    finally:
+        with _tracer_lock:
+            _tracer = previous
+
+
+def tracer():
+    # Configured lazily from the environment, so the scripts only need spans around their own SDK calls
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                configure()
+    return _tracer
+
+
+def span(name, **attributes):
+    """Context manager timing one stage; yields the ``Span`` so attributes can be added later."""
+    return tracer().span(name, **attributes)
+
+
+def usage_attributes(response):
+    """Token counts of a Gemini response (``usage_metadata``) as span attributes."""
+    usage = getattr(response, "usage_metadata", None)
+    return {"input_tokens": getattr(usage, "prompt_token_count", None),
+            "output_tokens": getattr(usage, "candidates_token_count", None)}
+
+
+def traced_iter(name, iterable, **attributes):
+    """Yield from ``iterable``, recording the production of each item as a ``name`` span."""
+    iterator = iter(iterable)
+    index = 0
+    while True:
+        with span(name, chunk=index, **attributes):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        index += 1
+        yield item
@@ -0,0 +1,227 @@
+"""English translation of existing transcripts, without sending the audio again.
+
+Getting English by re-sending the audio (``saaras``, the Gemini translate
+scripts, the ``02_c1`` batch) pays for the audio a second time, even though
+a native-script transcript already exists. This stage reads the transcripts
+instead:
+
+* plain ``.txt`` outputs, including the ``request_id=... transcript='...'``
+  reprs saved by older Sarvam runs
+* Sarvam batch ``.json`` outputs, using their timestamped sentences when present
+* combined ``_segments.json`` files
+
+It splits them into sentence segments and packs consecutive segments into
+text requests up to a token budget. The requests run concurrently. Each
+segment travels with a numeric ID and the response schema returns
+translations by ID, so results map back even if the model merges or drops
+a line. Segments missing from a response are retried in smaller requests.
+Each request is cached by its exact payload, so a rerun costs nothing.
+
+Every translated segment is also stored in the ``SegmentStore`` under the
+transcript file it came from (provider ``gemini-text``). Each row holds the
+native sentence next to its English, with timestamps when the transcript had them.
+"""
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+
+from pydantic import BaseModel
+
+from stt_translate import clients, tracing
+from stt_translate.cache import ResultCache, text_digest
+from stt_translate.concurrency import RetryPolicy, map_ordered
+from stt_translate.segment_store import SegmentStore, StoredSegment
+from stt_translate.stitch import repr_transcripts
+
+PROMPT = (
+    "You are a professional translation assistant.\n"
+    "Below is a JSON list of consecutive transcript segments in Hindi, Gujarati, or a mix of both.\n"
+    "Translate every segment into clear, natural English, using the neighbouring segments as context.\n"
+    "Maintain the tone and meaning accurately. Do not merge, split, skip or reorder segments.\n"
+    "Return exactly one translation for each input id."
+)
+DEFAULT_MODEL = "gemini-2.5-flash"
+MAX_TOKENS = 4000  # input tokens per request; the English reply is of similar size
+MAX_SEGMENTS = 80
+CHARS_PER_TOKEN = 2  # conservative for Devanagari/Gujarati text
+TRANSCRIPT_EXTENSIONS = (".txt", ".json")
+
+SENTENCE_END = re.compile(r"(?<=[।॥.!?])\s+|\n+")
+
+
+class TranslatedSegment(BaseModel):
+    id: int
+    english: str
+
+
+class TranslationSchema(BaseModel):
+    translations: list[TranslatedSegment]
+
+
+@dataclass
+class Segment:
+    source: str  # transcript file the segment came from
+    index: int  # position within that file
+    text: str
+    start: float = None  # seconds, when the transcript has timestamps
+    end: float = None
+    english: str = None
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence and sentence.strip()]
+
+
+def load_segments(path):
+    """Sentence ``Segment``s of one transcript file, in order."""
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    timed = []  # [(text, start, end)]
+    if path.lower().endswith(".json"):
+        data = json.loads(content)
+        if isinstance(data, list):  # combined segments
+            timed = [(entry["native_text"], entry["start"], entry["end"]) for entry in data]
+        else:
+            stamps = data.get("timestamps") or {}
+            sentences = stamps.get("words") or []
+            if sentences:
+                timed = list(zip(sentences, stamps["start_time_seconds"], stamps["end_time_seconds"]))
+            else:
+                content = data.get("transcript") or ""
+    elif repr_transcripts(content):
+        content = " ".join(repr_transcripts(content))
+    if not timed:
+        timed = [(sentence, None, None) for sentence in split_sentences(content)]
+    return [Segment(path, index, text.strip(), start, end)
+            for index, (text, start, end) in enumerate((t for t in timed if t[0] and t[0].strip()))]
+
+
+def pack(segments, max_tokens=MAX_TOKENS, max_segments=MAX_SEGMENTS):
+    """Split ``segments`` into consecutive batches within the token and count limits."""
+    batches, batch, tokens = [], [], 0
+    for segment in segments:
+        cost = estimate_tokens(segment.text)
+        if batch and (tokens + cost > max_tokens or len(batch) >= max_segments):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(segment)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def translate_batch(batch, cache, model=DEFAULT_MODEL):
+    """{position in ``batch``: English} for one request; missing positions were dropped by the model."""
+    payload = json.dumps([{"id": i, "text": segment.text} for i, segment in enumerate(batch)], ensure_ascii=False)
+    cache_key = cache.make_key(text_digest(payload), "gemini-text", model, prompt=PROMPT)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        translations = TranslationSchema.model_validate_json(cached).translations
+        return {item.id: item.english.strip() for item in translations if 0 <= item.id < len(batch)}
+    with tracing.span("request", provider="gemini", model=model, segments=len(batch)) as span:
+        response = clients.gemini_client().models.generate_content(
+            model=model,
+            contents=[PROMPT, payload],
+            config={"response_mime_type": "application/json", "response_schema": TranslationSchema},
+        )
+        span.set(**tracing.usage_attributes(response))
+    parsed = response.parsed
+    if not isinstance(parsed, TranslationSchema):
+        parsed = TranslationSchema.model_validate_json(response.text or '{"translations": []}')
+    english = {item.id: item.english.strip() for item in parsed.translations if 0 <= item.id < len(batch)}
+    # An answer that dropped ids is not cached, so the retry pass (and a rerun) asks again
+    if all(english.get(position) for position in range(len(batch))):
+        cache.put(cache_key, parsed.model_dump_json(), provider="gemini-text", model=model)
+    return english
+
+
+def translate_segments(segments, cache, model=DEFAULT_MODEL, max_tokens=MAX_TOKENS, max_segments=MAX_SEGMENTS,
+                       max_workers=8, retry=None):
+    """Fill in ``segment.english`` for every segment; returns the segments still untranslated."""
+    retry = retry or RetryPolicy()
+    pending = list(segments)
+
+    def failed_batch(batch, error):
+        print(f"Translating {len(batch)} segments of {batch[0].source} failed after retries: {error}")
+        return {}
+
+    # Segments the model skipped go around once more, in requests a tenth of the size
+    for limit in (max_segments, max(1, max_segments // 10)):
+        batches = pack(pending, max_tokens, limit)
+        if not batches:
+            break
+        print(f"Translating {len(pending)} segments in {len(batches)} requests ({model})")
+        # A batch that still fails after retries leaves its segments pending instead of aborting the corpus
+        results = map_ordered(lambda batch: translate_batch(batch, cache, model), batches,
+                              max_workers=max_workers, retry=retry, on_error=failed_batch)
+        for batch, english in zip(batches, results):
+            for position, segment in enumerate(batch):
+                if english.get(position):
+                    segment.english = english[position]
+        pending = [segment for segment in pending if not segment.english]
+    return pending
+
+
+def write_translation(segments, output_dir, input_root=None):
+    """Write ``<name>.en.txt`` and ``<name>.en.json`` per source file; returns the text paths."""
+    by_source = {}
+    for segment in segments:
+        by_source.setdefault(segment.source, []).append(segment)
+    saved = []
+    for source, items in by_source.items():
+        relative = os.path.relpath(source, input_root) if input_root else os.path.basename(source)
+        target = os.path.join(output_dir, os.path.splitext(relative)[0])
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        with open(target + ".en.txt", "w", encoding="utf-8") as f:
+            f.write(" ".join(segment.english or "" for segment in items).strip())
+        with open(target + ".en.json", "w", encoding="utf-8") as f:
+            json.dump([asdict(segment) for segment in items], f, ensure_ascii=False, indent=2)
+        saved.append(target + ".en.txt")
+    return saved
+
+
+def store_translation(segments, store, model=DEFAULT_MODEL):
+    """Replace each transcript's ``gemini-text`` rows in ``store`` with its native/English segment pairs."""
+    by_source = {}
+    for segment in segments:
+        by_source.setdefault(segment.source, []).append(
+            StoredSegment(segment.start, segment.end, segment.text, segment.english or "", chunk_index=segment.index))
+    for source, rows in by_source.items():
+        store.replace_file(source, "gemini-text", model, rows)
+
+
+def run(inputs, output_dir, model=DEFAULT_MODEL, max_tokens=MAX_TOKENS, max_segments=MAX_SEGMENTS, max_workers=8):
+    """Translate every transcript in ``inputs`` (files or directories); returns the saved paths."""
+    paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                paths.extend(os.path.join(root, name) for name in names if name.lower().endswith(TRANSCRIPT_EXTENSIONS)
+                             and not name.endswith((".en.txt", ".en.json", ".failed.json")))
+        else:
+            paths.append(path)
+    input_root = inputs[0] if len(inputs) == 1 and os.path.isdir(inputs[0]) else None
+
+    segments = [segment for path in sorted(paths) for segment in load_segments(path)]
+    tokens = sum(estimate_tokens(segment.text) for segment in segments)
+    print(f"{len(segments)} segments (~{tokens} tokens) from {len(paths)} transcripts")
+    cache = ResultCache()
+    try:
+        missing = translate_segments(segments, cache, model, max_tokens, max_segments, max_workers)
+    finally:
+        cache.close()
+    if missing:
+        print(f"{len(missing)} segments were not translated; they are empty in the .en.json outputs")
+    store = SegmentStore()
+    try:
+        store_translation(segments, store, model)
+        print(f"Segments stored in: {store.path}")
+    finally:
+        store.close()
+    return write_translation(segments, output_dir, input_root)
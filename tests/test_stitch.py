@@ -0,0 +1,41 @@
+from stt_translate.stitch import Stitcher, TimedText, stitch
+
+
+def timed(start, end, text):
+    words = text.split()
+    step = (end - start) / len(words)
+    return [(word, start + i * step, start + (i + 1) * step) for i, word in enumerate(words)]
+
+
+def test_one_word_overlap_next_to_cut_word():
+    left = TimedText(0.0, 10.0, "one two three four five six seven eight")
+    right = TimedText(8.0, 18.0, "ven eight nine ten")
+    assert stitch([left, right], 2.0) == "one two three four five six seven eight nine ten"
+
+
+def test_garbled_cut_word_at_end_of_left():
+    left = TimedText(0.0, 10.0, "one two three four five six seven eig")
+    right = TimedText(8.0, 18.0, "seven eight nine ten")
+    assert stitch([left, right], 2.0) == "one two three four five six seven eight nine ten"
+
+
+def test_mismatched_timestamps_fall_back_to_text():
+    # Sarvam times phrases, so the timings can hold fewer entries than the transcript has words
+    first = TimedText(0.0, 10.0, "alpha beta gamma delta epsilon zeta", [("alpha beta gamma", 0.0, 5.0)])
+    second_text = "epsilon zeta eta theta iota kappa"
+    second = TimedText(8.0, 18.0, second_text, timed(8.0, 18.0, second_text))
+    stitcher = Stitcher(2.0)
+    stitcher.add(first)
+    stitcher.add(second)
+    assert stitcher.text == "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+
+
+def test_timestamps_split_the_overlap_at_its_midpoint():
+    first_text = "a b c d e f g h i j"
+    second_text = "i j k l m n o p q r"
+    first = TimedText(0.0, 10.0, first_text, timed(0.0, 10.0, first_text))
+    second = TimedText(8.0, 18.0, second_text, timed(8.0, 18.0, second_text))
+    stitcher = Stitcher(2.0)
+    stitcher.add(first)
+    stitcher.add(second)
+    assert stitcher.text == "a b c d e f g h i j k l m n o p q r"